@@ -1,97 +1,183 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.resume import ResumeSubmission, ResumeAnalysis, ResumeSearchResult
-from app.services.openai_service import OpenAIService
-from typing import List
-import uuid
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from app.core.config import settings
+from app.models.resume import (
+    ResumeSubmission, ResumeAnalysis, ResumeFeedback, ResumeSearchResult,
+    ResumeSearchHit, ResumeSearchResponse, BatchResumeSubmission, BatchAnalysisResponse, AnalysisJob
+)
+from app.services.container import ServiceContainer, services
+from app.services.document_service import document_service, DocumentError, UPLOAD_FIELDS, UPLOAD_REQUEST_BODY
+from typing import List, Optional
+import json
+import time
 
 resume_router = APIRouter()
 
-# Initialize services
-openai_service = OpenAIService()
+# include_content=false leaves the resume text out of the echoed submission;
+# the client sent it, and it is usually most of the response
+SUBMISSION_CONTENT = {"submission": {"content"}}
+BATCH_SUBMISSION_CONTENT = {"results": {"__all__": SUBMISSION_CONTENT}}
 
-# Try to initialize Pinecone, but don't fail if it doesn't work
-try:
-    from app.services.pinecone_service import PineconeService
-    pinecone_service = PineconeService()
-    PINECONE_AVAILABLE = pinecone_service.pinecone_available
-except Exception as e:
-    print(f"Warning: Pinecone not available: {e}")
-    pinecone_service = None
-    PINECONE_AVAILABLE = False
+async def get_services() -> ServiceContainer:
+    """Services are built during startup warmup; requests arriving earlier wait for it"""
+    if not await services.wait_ready():
+        raise HTTPException(status_code=503, detail=f"Service unavailable: {services.error}")
+    return services
 
-@resume_router.post("/analyze", response_model=ResumeAnalysis)
-async def analyze_resume(submission: ResumeSubmission):
+@resume_router.post(
+    "/analyze",
+    response_model=ResumeAnalysis,
+    responses={202: {"model": AnalysisJob, "description": "Analysis queued (background=true)"}}
+)
+async def analyze_resume(submission: ResumeSubmission, background: bool = False, include_content: bool = True,
+                         services: ServiceContainer = Depends(get_services)):
     """
-    Analyze a resume using GPT-4 and return detailed feedback
+    Analyze a resume using GPT-4 and return detailed feedback.
+    
+    With `background=true` the analysis is queued and a job is returned
+    immediately; poll `/feedback/{id}` for the result. `include_content=false`
+    omits the resume text from the echoed submission.
     """
     try:
-        start_time = datetime.now()
+        if background:
+            job = await services.job_queue.submit(submission)
+            return _model_response(job, status_code=202)
         
-        # Analyze resume using OpenAI
-        feedback = await openai_service.analyze_resume(submission)
+        analysis = await services.analysis_pipeline.analyze(submission)
+        return _model_response(analysis, exclude=None if include_content else SUBMISSION_CONTENT)
         
-        # Calculate processing time
-        processing_time = (datetime.now() - start_time).total_seconds()
-        
-        # Generate unique ID
-        analysis_id = str(uuid.uuid4())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@resume_router.post(
+    "/analyze/upload",
+    response_model=ResumeAnalysis,
+    responses={202: {"model": AnalysisJob, "description": "Analysis queued (background=true)"}},
+    openapi_extra=UPLOAD_REQUEST_BODY
+)
+async def analyze_resume_upload(request: Request, background: bool = False, include_content: bool = True,
+                                services: ServiceContainer = Depends(get_services)):
+    """
+    Analyze an uploaded resume file (PDF, DOCX or plain text).
+    
+    Send multipart/form-data with the file in `file` and optionally `job_title`,
+    `industry`, `experience_level` and `tier`. Text is extracted server-side and
+    analyzed like a submission to `/analyze`, with the same query parameters.
+    """
+    try:
+        content, fields = await document_service.ingest(request)
+    except DocumentError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    submission = ResumeSubmission(content=content, **{name: fields.get(name) or None for name in UPLOAD_FIELDS})
+    try:
+        if background:
+            job = await services.job_queue.submit(submission)
+            return _model_response(job, status_code=202)
         
-        # Store in Pinecone for similarity search (if available)
-        if PINECONE_AVAILABLE and pinecone_service:
-            try:
-                await pinecone_service.store_resume(
-                    resume_id=analysis_id,
-                    content=submission.content,
-                    feedback=feedback.dict()
-                )
-            except Exception as e:
-                print(f"Warning: Failed to store in Pinecone: {e}")
+        analysis = await services.analysis_pipeline.analyze(submission)
+        return _model_response(analysis, exclude=None if include_content else SUBMISSION_CONTENT)
         
-        return ResumeAnalysis(
-            id=analysis_id,
-            submission=submission,
-            feedback=feedback,
-            created_at=start_time,
-            processing_time=processing_time,
-            model_version="gpt-3.5-turbo"
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@resume_router.post("/analyze/stream")
+async def analyze_resume_stream(submission: ResumeSubmission, include_content: bool = True,
+                                services: ServiceContainer = Depends(get_services)):
+    """
+    Analyze a resume, streaming feedback fields as Server-Sent Events.
+    
+    Emits a `field` event per completed feedback field (scores first), then a
+    `complete` event carrying the full ResumeAnalysis, or an `error` event.
+    """
+    exclude = None if include_content else SUBMISSION_CONTENT
+    
+    async def event_stream():
+        try:
+            async for event, data in services.analysis_pipeline.analyze_stream(submission):
+                yield _format_sse(event, data, exclude)
+        except Exception as e:
+            yield _format_sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _format_sse(event: str, data, exclude=None) -> str:
+    payload = data.model_dump_json(exclude=exclude) if isinstance(data, BaseModel) else json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+def _feedback_summary(feedback: Optional[ResumeFeedback], overall_score: Optional[float]) -> str:
+    if feedback is None:
+        # Indexed but no longer (or not yet) in this store: fall back to the indexed score
+        return f"Overall score {overall_score:.0f}/100" if overall_score is not None else ""
+    summary = f"Overall score {feedback.overall_score:.0f}/100"
+    if feedback.strengths:
+        summary += f". Strengths: {'; '.join(feedback.strengths[:2])}"
+    return summary
+
+def _model_response(model: BaseModel, status_code: int = 200, exclude=None) -> Response:
+    """Serialize a model straight to JSON in pydantic-core, skipping FastAPI's
+    re-validation and re-encoding of the returned response model"""
+    return Response(model.model_dump_json(exclude=exclude), status_code=status_code, media_type="application/json")
+
+@resume_router.post("/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_resume_batch(batch: BatchResumeSubmission, include_content: bool = True,
+                               services: ServiceContainer = Depends(get_services)):
+    """
+    Analyze many resumes in one request with bounded parallelism
+    """
+    if len(batch.submissions) > settings.BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: at most {settings.BATCH_MAX_SIZE} submissions allowed"
         )
+    
+    try:
+        response = await services.analysis_pipeline.analyze_batch(batch.submissions)
+        return _model_response(response, exclude=None if include_content else BATCH_SUBMISSION_CONTENT)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @resume_router.get("/similar/{analysis_id}", response_model=List[ResumeSearchResult])
-async def get_similar_resumes(analysis_id: str, top_k: int = 5):
+async def get_similar_resumes(analysis_id: str, top_k: int = 5, services: ServiceContainer = Depends(get_services)):
     """
     Find similar resumes based on content similarity
     """
     try:
-        if not PINECONE_AVAILABLE or not pinecone_service:
-            # Return mock data if Pinecone is not available
-            return [
-                ResumeSearchResult(
-                    id="mock_1",
-                    similarity_score=0.85,
-                    content_preview="Software Engineer with 5 years experience...",
-                    feedback_summary="Strong technical skills, good structure"
-                )
-            ]
-        
-        # Get the original analysis to extract content
-        # In a real implementation, you'd fetch this from a database
-        # For now, we'll use a mock approach
+        analysis = await services.analysis_store.get(analysis_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    try:
+        if not services.vector_service:
+            return []
         
-        similar_resumes = await pinecone_service.find_similar_resumes(
-            content="",  # This would be the actual content from analysis_id
-            top_k=top_k
-        )
+        # Reuse the stored vector; only embed the content if indexing has not caught up yet
+        similar_resumes = await services.vector_service.find_similar_by_id(analysis_id, top_k=top_k)
+        if similar_resumes is None:
+            similar_resumes = await services.vector_service.find_similar_resumes(
+                content=analysis.submission.content,
+                top_k=top_k + 1
+            )
+            similar_resumes = [r for r in similar_resumes if r["id"] != analysis_id][:top_k]
         
+        # Vector metadata only carries scores and a preview; summaries come from
+        # the stored feedback, fetched in one query for just these matches
+        feedback = await services.analysis_store.get_feedback_many([r["id"] for r in similar_resumes])
         return [
             ResumeSearchResult(
                 id=resume["id"],
                 similarity_score=resume["similarity_score"],
                 content_preview=resume["content_preview"],
-                feedback_summary=str(resume["feedback_summary"])
+                feedback_summary=_feedback_summary(feedback.get(resume["id"]), resume.get("overall_score"))
             )
             for resume in similar_resumes
         ]
@@ -99,79 +185,103 @@ async def get_similar_resumes(analysis_id: str, top_k: int = 5):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@resume_router.get("/search", response_model=ResumeSearchResponse)
+async def search_resumes(q: str = Query(..., min_length=1, description="Keywords or a free-text description"),
+                         top_k: int = Query(10, ge=1, le=settings.SEARCH_MAX_RESULTS),
+                         mode: str = Query("hybrid", pattern="^(hybrid|lexical|vector)$"),
+                         services: ServiceContainer = Depends(get_services)):
+    """
+    Search stored resumes.
+    
+    `lexical` ranks by BM25 over the local keyword index and makes no API call,
+    so exact skills ("Kubernetes", "SQL") match exactly. `vector` ranks by
+    embedding similarity. `hybrid` fuses both rankings (reciprocal rank fusion).
+    """
+    started = time.perf_counter()
+    try:
+        hits = await services.search_service.search(q, top_k=top_k, mode=mode)
+        return ResumeSearchResponse(
+            query=q,
+            mode=mode,
+            results=[
+                ResumeSearchHit(
+                    id=hit["id"],
+                    score=hit["score"],
+                    lexical_score=hit["lexical_score"],
+                    similarity_score=hit["similarity_score"],
+                    content_preview=hit["content_preview"],
+                    feedback_summary=_feedback_summary(hit["feedback"], hit["overall_score"])
+                )
+                for hit in hits
+            ],
+            took_ms=round((time.perf_counter() - started) * 1000, 3)
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @resume_router.get("/feedback/{analysis_id}")
-async def get_feedback(analysis_id: str):
+async def get_feedback(analysis_id: str, services: ServiceContainer = Depends(get_services)):
     """
     Retrieve feedback for a specific analysis
     """
     try:
-        # In a real implementation, you'd fetch this from a database
-        # For now, return mock data
-        return {
-            "id": analysis_id,
-            "feedback": {
-                "overall_score": 85.0,
-                "technical_clarity": 88.0,
-                "impact_phrasing": 82.0,
-                "structure_format": 90.0,
-                "suggestions": [
-                    "Add more quantifiable achievements",
-                    "Use stronger action verbs",
-                    "Improve keyword optimization"
-                ],
-                "strengths": [
-                    "Clear structure",
-                    "Good technical skills",
-                    "Relevant experience"
-                ],
-                "areas_for_improvement": [
-                    "Quantify achievements",
-                    "Add more industry-specific keywords"
-                ],
-                "keyword_analysis": {
-                    "relevant_keywords": ["Python", "Machine Learning", "Data Analysis"],
-                    "missing_keywords": ["AWS", "Docker", "Kubernetes"],
-                    "keyword_density": 0.75
-                },
-                "industry_alignment": 85.0
-            }
-        }
-        
+        # Before the analysis lookup: a job's status is dropped only after its analysis is stored
+        job = await services.job_queue.lookup(analysis_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if job is not None and job.status == "failed":
+        return {"id": analysis_id, "status": job.status, "error": job.error}
+    if job is not None and job.status != "completed":
+        # Still queued or running
+        return JSONResponse(status_code=202, content={"id": analysis_id, "status": job.status})
+    
+    try:
+        analysis = await services.analysis_store.get(analysis_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return {
+        "id": analysis_id,
+        "status": "completed",
+        "feedback": analysis.feedback
+    }
 
 @resume_router.delete("/{analysis_id}")
-async def delete_analysis(analysis_id: str):
+async def delete_analysis(analysis_id: str, services: ServiceContainer = Depends(get_services)):
     """
     Delete a resume analysis
     """
     try:
-        if PINECONE_AVAILABLE and pinecone_service:
-            await pinecone_service.delete_resume(analysis_id)
+        await services.job_queue.discard(analysis_id)
+        await services.analysis_pipeline.delete(analysis_id)
         return {"message": "Analysis deleted successfully"}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @resume_router.get("/stats")
-async def get_stats():
+async def get_stats(services: ServiceContainer = Depends(get_services)):
     """
     Get application statistics
     """
     try:
-        # In a real implementation, you'd calculate these from your database
+        stats = await services.analysis_store.get_stats()
         return {
-            "total_analyses": 1250,
-            "average_score": 78.5,
-            "user_satisfaction": 92.0,
-            "processing_time_avg": 2.3,
-            "top_industries": [
-                "Technology",
-                "Finance", 
-                "Healthcare",
-                "Consulting"
-            ]
+            **stats,
+            "cache": services.analysis_cache.get_stats(),
+            "tokens": services.openai_service.token_usage.get_stats(),
+            "llm": services.openai_service.get_llm_stats(),
+            "routing": services.openai_service.router.get_stats(),
+            "embeddings": services.embedding_service.get_stats(),
+            "jobs": services.job_queue.get_stats(),
+            "indexing": services.indexer.get_stats() if services.indexer else None,
+            "prescreen": services.prescreener.get_stats(),
+            "uploads": document_service.get_stats(),
+            "search": services.search_service.get_stats()
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
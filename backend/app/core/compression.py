@@ -0,0 +1,73 @@
+from starlette.datastructures import Headers, MutableHeaders
+from typing import Optional
+import gzip
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only without it
+    brotli = None
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing response bodies of at least ``minimum_size`` bytes.
+    
+    Brotli is used when the client accepts it and the ``brotli`` package is
+    installed, gzip otherwise. Only bodies sent in one piece are compressed:
+    streamed responses (Server-Sent Events) pass through as they are, since a
+    compressor would hold events back until its buffer fills.
+    """
+    
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope, receive, send):
+        encoding = self._choose_encoding(Headers(scope=scope)) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            
+            initial, start_message = start_message, None
+            headers = MutableHeaders(raw=initial["headers"])
+            body = message.get("body", b"")
+            if (not message.get("more_body", False) and len(body) >= self.minimum_size
+                    and "content-encoding" not in headers):
+                body = self._compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            await send(initial)
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+    
+    def _choose_encoding(self, headers: Headers) -> Optional[str]:
+        accepted = set()
+        for part in headers.get("accept-encoding", "").lower().split(","):
+            coding, _, params = part.partition(";")
+            if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                accepted.add(coding.strip())
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+    
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     # API Settings
@@ -8,14 +8,124 @@ class Settings(BaseSettings):
     
     # OpenAI Settings
     OPENAI_API_KEY: str
+    OPENAI_TIMEOUT: float = 60.0  # Seconds allowed for a single completion request
+    OPENAI_CONNECT_TIMEOUT: float = 5.0
+    OPENAI_MAX_RETRIES: int = 2  # SDK retries for embeddings; analysis calls use the LLM_RETRY_* settings
+    OPENAI_MAX_CONNECTIONS: int = 100  # Pooled HTTP connections shared by all services
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_MAX_CONCURRENCY: int = 50  # In-flight OpenAI calls per worker
     
     # Pinecone Settings
     PINECONE_API_KEY: str
     PINECONE_ENVIRONMENT: str
     PINECONE_INDEX_NAME: str = "resume-grader"
     
+    # Write-behind Indexing Settings
+    INDEXING_QUEUE_MAX_SIZE: int = 10000  # Producers wait when this many resumes are pending
+    INDEXING_BATCH_SIZE: int = 100  # Vectors per upsert
+    INDEXING_FLUSH_INTERVAL_MS: float = 200.0  # Max time a resume waits for its batch to fill
+    INDEXING_MAX_RETRIES: int = 5
+    
+    # Embedding Settings
+    EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000  # ~6KB each as float32 at 1536 dimensions
+    EMBEDDING_CACHE_PATH: Optional[str] = None  # e.g. ./embedding_cache.npz to persist across restarts
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0  # How long to wait for more texts before calling the API
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_MAX_INPUT_TOKENS: int = 8191  # Model input limit; longer texts are truncated
+    
+    # Vector Index Settings
+    VECTOR_BACKEND: str = "auto"  # pinecone, local, or auto (Pinecone when reachable, else local)
+    VECTOR_DIMENSION: int = 1536  # OpenAI embedding dimension
+    LOCAL_VECTOR_INDEX_PATH: Optional[str] = "./vector_index"  # None keeps the local index in memory
+    LOCAL_VECTOR_INDEX_MODE: str = "exact"  # exact or ivf (approximate, for large indexes)
+    LOCAL_VECTOR_IVF_NPROBE: int = 8
+    
+    # Offline Scoring Settings
+    SCORING_DICTIONARY_PATH: Optional[str] = None  # JSON of {industry: {category: [keywords]}} extending the built-ins
+    
+    # Model Routing Settings
+    LLM_MODEL_FAST: str = "gpt-3.5-turbo"  # Short resumes, and the fallback under load
+    LLM_MODEL_STANDARD: str = "gpt-3.5-turbo"
+    LLM_MODEL_PREMIUM: str = "gpt-4o"  # Only when requested or configured by experience level
+    ROUTER_PREMIUM_EXPERIENCE_LEVELS: str = ""  # Comma-separated, e.g. "senior,executive"
+    ROUTER_FAST_MAX_WORDS: int = 150
+    ROUTER_OVERLOAD_IN_FLIGHT: int = 40  # Calls in flight on a model before new ones fall back
+    ROUTER_OVERLOAD_P95_SECONDS: float = 20.0
+    ROUTER_OVERLOAD_WINDOW_SECONDS: float = 60.0  # Latency samples older than this are ignored
+    LLM_MODEL_PRICES: Dict[str, List[float]] = {  # USD per 1K [input, output] tokens
+        "gpt-3.5-turbo": [0.0005, 0.0015],
+        "gpt-4o": [0.0025, 0.01],
+        "gpt-4o-mini": [0.00015, 0.0006]
+    }
+    
+    # LLM Resilience Settings
+    LLM_RETRY_MAX_ATTEMPTS: int = 3  # Including the first try; covers 429, timeouts and 5xx
+    LLM_RETRY_BASE_DELAY: float = 0.5  # Seconds; doubles per attempt, with full jitter
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    LLM_HEDGE_ENABLED: bool = False  # Send a second request when one outlives the latency quantile
+    LLM_HEDGE_QUANTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # Successful calls observed before hedging starts
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failed calls that open the circuit
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # Time the circuit stays open before a trial call
+    LLM_RATE_LIMIT_RPS: float = 0.0  # Client-side requests per second per worker; 0 disables
+    LLM_RATE_LIMIT_BURST: int = 10
+    
+    # Prompt Budget Settings
+    PROMPT_MAX_CONTENT_TOKENS: int = 2500  # Longer resumes are trimmed section by section
+    OPENAI_MAX_OUTPUT_TOKENS: int = 1000  # The feedback JSON is typically 300-500 tokens
+    OPENAI_RESPONSE_FORMAT: str = "tool"  # tool (function calling), json_object, or text
+    
+    # Pre-screen Settings (local tier in front of the LLM)
+    PRESCREEN_ENABLED: bool = True
+    PRESCREEN_MIN_WORDS: int = 30  # Shorter submissions are answered locally
+    PRESCREEN_RECENT_SIZE: int = 5000  # Analyzed submissions remembered for near-duplicate detection
+    PRESCREEN_SIMHASH_THRESHOLD: int = 3  # Max differing bits (of 64) to count as a near-duplicate
+    
+    # File Upload Settings
+    UPLOAD_MAX_BYTES: int = 5 * 1024 * 1024
+    UPLOAD_SPOOL_MAX_BYTES: int = 1024 * 1024  # Uploads are buffered in memory up to this, then on disk
+    UPLOAD_EXTRACT_WORKERS: int = 2  # Processes parsing PDF/DOCX; 0 parses in a thread instead
+    UPLOAD_EXTRACT_TIMEOUT_SECONDS: float = 30.0
+    UPLOAD_MAX_TEXT_CHARS: int = 100000  # Extracted text beyond this is dropped
+    UPLOAD_TEXT_CACHE_MAX_ENTRIES: int = 1000  # Extracted texts kept by file hash
+    
+    # Search Settings
+    SEARCH_MAX_RESULTS: int = 50
+    SEARCH_CANDIDATES: int = 100  # Results taken from each ranker before fusion
+    SEARCH_RRF_K: int = 60  # Reciprocal rank fusion constant; larger flattens rank differences
+    LEXICAL_SYNC_INTERVAL_SECONDS: float = 2.0  # How often searches pick up resumes stored by other workers
+    LEXICAL_SYNC_LOOKBACK_SECONDS: float = 300.0
+    
+    # Batch Analysis Settings
+    BATCH_MAX_SIZE: int = 500
+    BATCH_MAX_CONCURRENCY: int = 10  # Parallel LLM calls per batch request
+    
+    # Background Job Settings
+    JOB_WORKERS: int = 4  # Concurrent background analyses per process
+    JOB_MAX_RETAINED: int = 10000  # Finished jobs kept for polling before the oldest are dropped
+    JOB_FAILED_RETENTION_SECONDS: int = 86400  # Stored status of failed jobs is pruned after this
+    
+    # Response Settings
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024  # Smaller responses are sent uncompressed
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_BROTLI_QUALITY: int = 4  # Used when the brotli package is installed
+    
+    # Analysis Cache Settings
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 1024
+    ANALYSIS_CACHE_TTL_SECONDS: int = 86400
+    REDIS_URL: Optional[str] = None  # Enables the shared Redis cache tier when set
+    
     # Database Settings
     DATABASE_URL: Optional[str] = None
+    SQLITE_BUSY_TIMEOUT_SECONDS: float = 30.0  # How long a SQLite writer waits for the lock
+    
+    # Server Settings (serve.py)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # Worker processes; 0 starts one per CPU
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: float = 30.0  # In-flight requests get this long on SIGTERM
+    SHARED_MEMORY_DIR: Optional[str] = None  # Worker-shared caches and stats live here when set
     
     # Security
     SECRET_KEY: str = "your-secret-key-here"
@@ -0,0 +1,30 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from app.core.config import settings
+
+# SQLite is used locally when DATABASE_URL is not configured
+DATABASE_URL = settings.DATABASE_URL or "sqlite:///./resume_grader.db"
+
+connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+engine = create_engine(DATABASE_URL, connect_args=connect_args, pool_pre_ping=True)
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(connection, _):
+        # WAL lets readers run alongside the writer, and a busy timeout makes
+        # concurrent writers (threads or worker processes) queue instead of failing
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_SECONDS * 1000)}")
+        cursor.close()
+
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+class Base(DeclarativeBase):
+    pass
+
+def init_db():
+    """Create tables that do not exist yet"""
+    # Import models so they are registered on Base.metadata
+    from app.models import analysis_record  # noqa: F401
+    Base.metadata.create_all(bind=engine)
@@ -0,0 +1,194 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+import time
+
+# Seconds; spans cache hits (sub-millisecond) to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    type = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+    
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+    
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+class Counter(Metric):
+    type = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1.0, *labels: str):
+        # Plain dict updates: the event loop thread is the only writer on the hot path
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+    
+    def samples(self) -> List[Sample]:
+        return [(self.name + "_total", self._labels(labels), value) for labels, value in self._values.items()]
+
+class Histogram(Metric):
+    type = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+    
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+    
+    def samples(self) -> List[Sample]:
+        samples = []
+        for labels, (counts, total) in self._series.items():
+            base = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append((self.name + "_bucket", {**base, "le": _format_value(bound)}, cumulative))
+            samples.append((self.name + "_sum", base, total))
+            samples.append((self.name + "_count", base, cumulative))
+        return samples
+
+class GaugeCallback(Metric):
+    """Gauge (or counter) read from existing service state at scrape time, so the
+    services pay nothing on their hot paths"""
+    
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[Tuple[str, ...], float]],
+                 labelnames: Sequence[str] = (), type: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.type = type
+    
+    def samples(self) -> List[Sample]:
+        suffix = "_total" if self.type == "counter" else ""
+        return [
+            (self.name + suffix, self._labels(labels), value)
+            for labels, value in self.callback().items() if value is not None
+        ]
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        # Re-registration (e.g. a module reloaded in tests) replaces the old metric
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def gauge_callback(self, name: str, documentation: str, callback: Callable[[], Dict[Tuple[str, ...], float]],
+                       labelnames: Sequence[str] = (), type: str = "gauge") -> GaugeCallback:
+        return self.register(GaugeCallback(name, documentation, callback, labelnames, type))
+    
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                lines.append(f"# {metric.name} collection failed: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# Shared instruments; services record into these directly
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+STAGE_SECONDS = registry.histogram(
+    "analysis_stage_duration_seconds",
+    "Time spent per pipeline stage (text_extract, prompt_build, llm_call, json_parse, embedding, vector_upsert, vector_query, store_save)",
+    ("stage",)
+)
+LLM_TOKENS = registry.counter("llm_tokens", "Tokens sent to and received from the LLM", ("model", "kind"))
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage)
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request by its route template.
+    
+    Streaming responses are timed until the last body chunk is sent.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status = "500"
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # The template keeps label cardinality bounded (/feedback/{analysis_id}, not each id)
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], path, status)
@@ -0,0 +1,85 @@
+from app.core.config import settings
+from typing import Optional
+import numpy as np
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so every worker keeps its own copies
+    fcntl = None
+
+HEADER_SIZE = 64
+MAGIC = b"RGSHM1"
+
+def shared_path(name: str) -> Optional[str]:
+    """Path of a worker-shared file, or None when sharing is not configured"""
+    if not settings.SHARED_MEMORY_DIR or fcntl is None:
+        return None
+    os.makedirs(settings.SHARED_MEMORY_DIR, mode=0o700, exist_ok=True)
+    return os.path.join(settings.SHARED_MEMORY_DIR, name)
+
+class FileLock:
+    """Exclusive lock across the threads and processes of one machine (flock on a side file).
+    
+    The descriptor is reopened after a fork: flock locks belong to the open file,
+    which a forked child would otherwise share with its parent. Without flock
+    (Windows) it only excludes the threads of one process.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+        self._thread_lock = threading.Lock()
+    
+    def __enter__(self):
+        if self._pid != os.getpid():
+            self._thread_lock = threading.Lock()
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        self._thread_lock.acquire()
+        if fcntl is None:
+            return self
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return self
+    
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+def map_array(path: str, dtype: np.dtype, count: int, kind: str) -> np.memmap:
+    """Map a fixed-size array of ``count`` records from a file shared by all workers.
+    
+    The first process creates the file; later ones attach to it. A file whose
+    layout does not match (other kind, record size or count) is replaced.
+    """
+    dtype = np.dtype(dtype)
+    header = MAGIC + f"{kind}:{dtype.itemsize}:{count}".encode("ascii")
+    if len(header) > HEADER_SIZE:
+        raise ValueError(f"Shared array kind too long: {kind}")
+    header = header.ljust(HEADER_SIZE, b"\0")
+    size = HEADER_SIZE + dtype.itemsize * count
+    
+    with FileLock(path + ".lock"):
+        if not _has_layout(path, header, size):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.truncate(size)  # Sparse; pages are allocated as slots fill
+            os.replace(tmp_path, path)
+    return np.memmap(path, dtype=dtype, mode="r+", offset=HEADER_SIZE, shape=(count,))
+
+def _has_layout(path: str, header: bytes, size: int) -> bool:
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        with open(path, "rb") as f:
+            return f.read(HEADER_SIZE) == header
+    except OSError:
+        return False
@@ -1,12 +1,37 @@
+import time
+
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api.routes import resume_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, registry
+from app.services.container import services
+from app.services.document_service import document_service
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:  # Falls back to the standard library encoder
+    DefaultResponse = JSONResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warmup runs in the background so /health answers immediately; /ready reports when it is done
+    services.start(import_seconds=time.perf_counter() - _import_started)
+    yield
+    await services.stop()
 
 app = FastAPI(
     title="AI Resume Grader API",
     description="GPT-4 powered resume review tool with real-time feedback",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -18,13 +43,103 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for larger, non-streamed responses
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES,
+    gzip_level=settings.RESPONSE_GZIP_LEVEL,
+    brotli_quality=settings.RESPONSE_BROTLI_QUALITY
+)
+
+# Request timing for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(resume_router, prefix="/api/v1")
 
+# Services appear once warmup has built them; until then their series are simply absent
+def _cache_lookups():
+    uploads = document_service.get_stats()
+    lookups = {
+        ("upload_text", "hit"): uploads["cache_hits"],
+        ("upload_text", "miss"): uploads["cache_misses"]
+    }
+    if services.analysis_cache:
+        analysis = services.analysis_cache.get_stats()
+        lookups[("analysis", "hit")] = analysis["hits"]
+        lookups[("analysis", "redis_hit")] = analysis["redis_hits"]
+        lookups[("analysis", "miss")] = analysis["misses"]
+    if services.embedding_service:
+        embeddings = services.embedding_service.get_stats()
+        lookups[("embedding", "hit")] = embeddings["cache_hits"]
+        lookups[("embedding", "miss")] = embeddings["cache_misses"]
+    similar_cache = getattr(services.vector_service, "similar_cache", None)
+    if similar_cache:
+        similar = similar_cache.get_stats()
+        lookups[("similar", "hit")] = similar["hits"]
+        lookups[("similar", "miss")] = similar["misses"]
+    return lookups
+
+def _queue_depths():
+    depths = {}
+    if services.job_queue:
+        depths[("jobs",)] = services.job_queue.get_stats()["queue_depth"]
+    if services.indexer:
+        depths[("indexing",)] = services.indexer.get_stats()["pending"]
+    return depths
+
+def _llm_stats():
+    return services.openai_service.get_llm_stats() if services.openai_service else {}
+
+# Collected from the services' own counters at scrape time
+registry.gauge_callback("cache_lookups", "Cache lookups by cache and result", _cache_lookups,
+                        ("cache", "result"), type="counter")
+registry.gauge_callback("queue_depth", "Items waiting per background queue", _queue_depths, ("queue",))
+registry.gauge_callback(
+    "indexing_lag_seconds", "Age of the oldest resume waiting to be indexed",
+    lambda: {(): services.indexer.get_stats()["lag_seconds"]} if services.indexer else {}
+)
+registry.gauge_callback(
+    "llm_calls", "LLM call outcomes per model", lambda: {
+        (model, outcome): stats[outcome]
+        for model, stats in _llm_stats().items()
+        for outcome in ("calls", "retries", "failures", "short_circuited", "hedged")
+    }, ("model", "outcome"), type="counter"
+)
+registry.gauge_callback(
+    "llm_circuit_open", "1 while the model's circuit breaker is open", lambda: {
+        (model,): float(stats["breaker_state"] == "open")
+        for model, stats in _llm_stats().items()
+    }, ("model",)
+)
+registry.gauge_callback(
+    "prescreen_decisions", "Submissions per pre-screen outcome", lambda: {
+        (tier,): count for tier, count in services.prescreener.counts.items()
+    } if services.prescreener else {}, ("tier",), type="counter"
+)
+registry.gauge_callback(
+    "startup_seconds", "Time from importing the app to serving, by phase", lambda: {
+        (phase,): services.get_readiness()[f"{phase}_seconds"] for phase in ("import", "warmup")
+    }, ("phase",)
+)
+registry.gauge_callback("service_ready", "1 once startup warmup has finished", lambda: {(): float(services.ready)})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": "AI Resume Grader API", "version": "1.0.0"}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    """Liveness: the process is up, even while services are still warming up"""
+    return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once warmup has finished, with startup timings; 503 until then"""
+    readiness = services.get_readiness()
+    return JSONResponse(status_code=200 if services.ready else 503, content=readiness) 
\ No newline at end of file
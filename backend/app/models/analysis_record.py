@@ -0,0 +1,39 @@
+from sqlalchemy import DateTime, Float, Index, JSON, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+from datetime import datetime
+from typing import Optional
+
+class AnalysisRecord(Base):
+    """Stored resume analysis, one row per ResumeAnalysis"""
+    __tablename__ = "analyses"
+    
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    content: Mapped[str] = mapped_column(Text)
+    job_title: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    industry: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    experience_level: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    overall_score: Mapped[float] = mapped_column(Float)
+    processing_time: Mapped[float] = mapped_column(Float)
+    model_version: Mapped[str] = mapped_column(String(100))
+    feedback: Mapped[dict] = mapped_column(JSON)
+    
+    __table_args__ = (
+        Index("ix_analyses_industry", "industry"),
+    )
+
+class AnalysisJobRecord(Base):
+    """Status of a background analysis that has not completed, visible to every worker process.
+    
+    The row is removed once the analysis itself is stored; failed jobs keep theirs,
+    with the error, for JOB_FAILED_RETENTION_SECONDS.
+    """
+    __tablename__ = "analysis_jobs"
+    
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    status: Mapped[str] = mapped_column(String(20))
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -7,6 +7,12 @@ class ResumeSubmission(BaseModel):
     job_title: Optional[str] = Field(None, description="Target job title")
     industry: Optional[str] = Field(None, description="Target industry")
     experience_level: Optional[str] = Field(None, description="Experience level (entry, mid, senior)")
+    tier: Optional[str] = Field(None, description="Model tier (fast, standard, premium); chosen automatically if omitted")
+
+class KeywordAnalysis(BaseModel):
+    relevant_keywords: List[str] = Field(default_factory=list, description="Relevant keywords found in the resume")
+    missing_keywords: List[str] = Field(default_factory=list, description="Expected keywords the resume lacks")
+    keyword_density: float = Field(0.0, description="Share of expected keywords present")
 
 class ResumeFeedback(BaseModel):
     overall_score: float = Field(..., ge=0, le=100, description="Overall resume score")
@@ -16,7 +22,7 @@ class ResumeFeedback(BaseModel):
     suggestions: List[str] = Field(..., description="List of improvement suggestions")
     strengths: List[str] = Field(..., description="List of resume strengths")
     areas_for_improvement: List[str] = Field(..., description="Areas that need improvement")
-    keyword_analysis: dict = Field(..., description="Keyword analysis results")
+    keyword_analysis: KeywordAnalysis = Field(..., description="Keyword analysis results")
     industry_alignment: float = Field(..., ge=0, le=100, description="Industry alignment score")
 
 class ResumeAnalysis(BaseModel):
@@ -25,10 +31,43 @@ class ResumeAnalysis(BaseModel):
     feedback: ResumeFeedback
     created_at: datetime
     processing_time: float
-    model_version: str = "gpt-4"
+    model_version: str = Field(..., description="Model, or local tier, that produced the feedback")
+
+class BatchResumeSubmission(BaseModel):
+    submissions: List[ResumeSubmission] = Field(..., min_length=1, description="Resumes to analyze")
+
+class BatchAnalysisResponse(BaseModel):
+    results: List[ResumeAnalysis] = Field(..., description="One analysis per submission, in request order")
+    total_submissions: int
+    unique_submissions: int = Field(..., description="Submissions left after removing duplicates")
+    total_time: float = Field(..., description="Wall-clock time for the whole batch in seconds")
+    average_processing_time: float
+
+class AnalysisJob(BaseModel):
+    id: str = Field(..., description="Job id, also the id of the resulting analysis")
+    status: str = Field(..., description="queued, running, completed or failed")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    result: Optional[ResumeAnalysis] = None
+    error: Optional[str] = None
 
 class ResumeSearchResult(BaseModel):
     id: str
     similarity_score: float
     content_preview: str
-    feedback_summary: str 
\ No newline at end of file
+    feedback_summary: str 
+
+class ResumeSearchHit(BaseModel):
+    id: str
+    score: float = Field(..., description="Reciprocal rank fusion score across the rankers that matched")
+    lexical_score: Optional[float] = Field(None, description="BM25 score, when the keyword ranker matched")
+    similarity_score: Optional[float] = Field(None, description="Vector similarity, when the vector ranker matched")
+    content_preview: str
+    feedback_summary: str
+
+class ResumeSearchResponse(BaseModel):
+    query: str
+    mode: str = Field(..., description="hybrid, lexical or vector")
+    results: List[ResumeSearchHit]
+    took_ms: float
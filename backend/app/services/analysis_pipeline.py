@@ -0,0 +1,167 @@
+from app.core.config import settings
+from app.models.resume import ResumeSubmission, ResumeFeedback, ResumeAnalysis, BatchAnalysisResponse
+from app.services.analysis_store import AnalysisStore
+from app.services.cache_service import make_cache_key
+from app.services.indexing_service import IndexingQueue
+from app.services.openai_service import OpenAIService
+from app.services.prescreen_service import PreScreener, ScreenResult
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+import uuid
+
+class AnalysisPipeline:
+    """Turns submissions into stored ResumeAnalysis records"""
+    
+    def __init__(self, openai_service: OpenAIService, store: AnalysisStore,
+                 indexer: Optional[IndexingQueue] = None, prescreener: Optional[PreScreener] = None):
+        self.openai_service = openai_service
+        self.store = store
+        self.indexer = indexer
+        self.prescreener = prescreener
+    
+    async def analyze(self, submission: ResumeSubmission, analysis_id: Optional[str] = None,
+                      persist: bool = True) -> ResumeAnalysis:
+        """Analyze a single resume; unless ``persist`` is False, store it and index it
+        for similarity search"""
+        analysis = await self._analyze(submission, analysis_id)
+        if persist:
+            await self.persist(analysis)
+        return analysis
+    
+    async def persist(self, analysis: ResumeAnalysis):
+        """Store an analysis and queue it for similarity-search indexing"""
+        await self.store.save(analysis)
+        await self._index(analysis)
+    
+    async def delete(self, analysis_id: str) -> bool:
+        """Remove a stored analysis and its similarity-search entry"""
+        deleted = await self.store.delete(analysis_id)
+        if self.indexer:
+            self.indexer.discard(analysis_id)
+            await self.indexer.vector_service.delete_resume(analysis_id)
+        return deleted
+    
+    async def _analyze(self, submission: ResumeSubmission, analysis_id: Optional[str] = None) -> ResumeAnalysis:
+        start_time = datetime.now()
+        started = time.perf_counter()  # Monotonic, for processing_time
+        
+        screened = self._screen(submission)
+        if screened and screened.feedback:
+            return await self._complete(submission, screened.feedback.copy(deep=True),
+                                        self._screened_model(screened), start_time, started, analysis_id)
+        
+        # Analyze resume using OpenAI
+        feedback, source = await self.openai_service.analyze_resume_with_source(
+            submission, on_call=self._count_llm_call(screened)
+        )
+        self._remember(screened, feedback, source)
+        
+        return await self._complete(submission, feedback, source, start_time, started, analysis_id)
+    
+    def _screen(self, submission: ResumeSubmission) -> Optional[ScreenResult]:
+        """Run the local pre-screen tier; a result with feedback means the LLM is skipped"""
+        if not self.prescreener:
+            return None
+        return self.prescreener.screen(submission)
+    
+    def _screened_model(self, screened: ScreenResult) -> str:
+        # Near-duplicates reuse LLM feedback, rejections are scored locally
+        return screened.model or self.prescreener.MODEL
+    
+    def _count_llm_call(self, screened: Optional[ScreenResult]) -> Optional[Callable[[], None]]:
+        # Escalations answered from the analysis cache saved the call too
+        return self.prescreener.record_llm_call if screened else None
+    
+    def _remember(self, screened: Optional[ScreenResult], feedback: ResumeFeedback, source: str):
+        # Only real LLM answers are worth reusing for near-duplicates
+        if screened and source != self.openai_service.LOCAL_MODEL:
+            self.prescreener.remember(screened, feedback, source)
+    
+    async def analyze_stream(self, submission: ResumeSubmission) -> AsyncIterator[Tuple[str, Any]]:
+        """Analyze a resume, yielding ("field", {...}) events as feedback fields arrive
+        and a final ("complete", ResumeAnalysis) event"""
+        start_time = datetime.now()
+        started = time.perf_counter()  # Monotonic, for processing_time
+        
+        screened = self._screen(submission)
+        if screened and screened.feedback:
+            feedback = screened.feedback.copy(deep=True)
+            for name, value in feedback.dict().items():
+                yield "field", {"field": name, "value": value}
+            analysis = await self._complete(submission, feedback, self._screened_model(screened), start_time, started)
+            await self.persist(analysis)
+            yield "complete", analysis
+            return
+        
+        async for kind, payload in self.openai_service.stream_analysis(
+            submission, on_call=self._count_llm_call(screened)
+        ):
+            if kind == "field":
+                name, value = payload
+                yield "field", {"field": name, "value": value}
+            else:
+                feedback, source = payload
+                self._remember(screened, feedback, source)
+                analysis = await self._complete(submission, feedback, source, start_time, started)
+                await self.persist(analysis)
+                yield "complete", analysis
+    
+    async def _complete(self, submission: ResumeSubmission, feedback: ResumeFeedback, model_version: str,
+                        start_time: datetime, started: float, analysis_id: Optional[str] = None) -> ResumeAnalysis:
+        # Calculate processing time
+        processing_time = time.perf_counter() - started
+        
+        # Generate unique ID
+        analysis_id = analysis_id or str(uuid.uuid4())
+        
+        return ResumeAnalysis(
+            id=analysis_id,
+            submission=submission,
+            feedback=feedback,
+            created_at=start_time,
+            processing_time=processing_time,
+            model_version=model_version
+        )
+    
+    async def _index(self, analysis: ResumeAnalysis):
+        # Queue for similarity-search indexing; the upsert happens off the request path
+        if self.indexer:
+            await self.indexer.enqueue(
+                resume_id=analysis.id,
+                content=analysis.submission.content,
+                feedback=analysis.feedback.dict()
+            )
+    
+    async def analyze_batch(self, submissions: List[ResumeSubmission],
+                            max_concurrency: Optional[int] = None) -> BatchAnalysisResponse:
+        """Analyze many resumes with bounded parallelism, analyzing duplicates once"""
+        start_time = time.perf_counter()
+        semaphore = asyncio.Semaphore(max_concurrency or settings.BATCH_MAX_CONCURRENCY)
+        
+        # Identical submissions (after normalization) share one analysis
+        unique: Dict[str, ResumeSubmission] = {}
+        keys = []
+        for submission in submissions:
+            key = make_cache_key(submission, submission.tier or "", self.openai_service.PROMPT_VERSION)
+            unique.setdefault(key, submission)
+            keys.append(key)
+        
+        async def run(submission: ResumeSubmission) -> ResumeAnalysis:
+            async with semaphore:
+                return await self._analyze(submission)
+        
+        analyses = await asyncio.gather(*(run(submission) for submission in unique.values()))
+        await self.store.save_many(analyses)
+        for analysis in analyses:
+            await self._index(analysis)
+        by_key = dict(zip(unique.keys(), analyses))
+        
+        return BatchAnalysisResponse(
+            results=[by_key[key] for key in keys],
+            total_submissions=len(submissions),
+            unique_submissions=len(unique),
+            total_time=time.perf_counter() - start_time,
+            average_processing_time=sum(a.processing_time for a in analyses) / len(analyses)
+        )
@@ -0,0 +1,282 @@
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert, select, update
+from app.core.config import settings
+from app.core.database import SessionLocal, init_db
+from app.core.metrics import stage_timer
+from app.core.shared_memory import shared_path
+from app.models.analysis_record import AnalysisJobRecord, AnalysisRecord
+from app.models.resume import AnalysisJob, ResumeAnalysis, ResumeSubmission, ResumeFeedback
+from app.services.lexical_index import LexicalIndex
+from app.services.stats_service import AnalysisStats, SharedAnalysisStats
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import threading
+import time
+
+STATS_FILE = "analysis_stats.json"
+
+class AnalysisStore:
+    """Repository for persisted analyses.
+    
+    The public methods are async and run the blocking SQLAlchemy work in the
+    threadpool so database I/O never stalls the event loop. Aggregate stats are
+    maintained incrementally on every write, so reading them never scans the table,
+    and so is the BM25 index used for keyword search. The status of unfinished
+    background jobs is stored too, so any worker process can answer a poll.
+    """
+    
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.initialized = False
+        # Shared between worker processes when running under serve.py
+        stats_path = shared_path(STATS_FILE)
+        self.stats = SharedAnalysisStats(stats_path) if stats_path else AnalysisStats()
+        self.lexical = LexicalIndex()
+        self.lexical_ready = False
+        self._lexical_watermark: Optional[datetime] = None
+        self._lexical_synced = 0.0
+        self._sync_lock = threading.Lock()
+    
+    def init(self):
+        """Create tables, seed the running aggregates with one pass over history and
+        fail jobs a previous run left unfinished.
+        
+        Runs once per process tree: serve.py calls it before forking, so workers
+        (including replacements for crashed ones) do not redo it while others serve.
+        """
+        if self.initialized:
+            return
+        init_db()
+        self.stats.rebuild(self._stat_rows)
+        self._fail_unfinished_jobs("Interrupted by a server restart")
+        self.initialized = True
+    
+    def build_lexical_index(self):
+        """Index every stored resume for keyword search in one streaming pass.
+        
+        Runs once per process tree: workers forked by serve.py inherit the index
+        built before the fork and only sync what was stored since.
+        """
+        if self.lexical_ready:
+            return
+        self.lexical.clear()
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(AnalysisRecord.id, AnalysisRecord.content, AnalysisRecord.created_at)
+                .execution_options(yield_per=1000)
+            )
+            for analysis_id, content, created_at in rows:
+                self.lexical.add(analysis_id, content)
+                self._advance_watermark(created_at)
+        self._lexical_synced = time.monotonic()
+        self.lexical_ready = True
+    
+    async def sync_lexical_index(self):
+        """Pick up resumes stored by other worker processes (at most every
+        LEXICAL_SYNC_INTERVAL_SECONDS); this process indexes its own writes directly"""
+        if time.monotonic() - self._lexical_synced < settings.LEXICAL_SYNC_INTERVAL_SECONDS:
+            return
+        self._lexical_synced = time.monotonic()
+        await run_in_threadpool(self._sync_lexical)
+    
+    def _stat_rows(self):
+        with self.session_factory() as session:
+            yield from session.execute(
+                select(
+                    AnalysisRecord.overall_score,
+                    AnalysisRecord.processing_time,
+                    AnalysisRecord.industry
+                ).execution_options(yield_per=1000)
+            )
+    
+    async def save(self, analysis: ResumeAnalysis):
+        await self.save_many([analysis])
+    
+    async def save_many(self, analyses: List[ResumeAnalysis]):
+        """Insert analyses with a single executemany round trip"""
+        if analyses:
+            with stage_timer("store_save"):
+                await run_in_threadpool(self._save_many, analyses)
+    
+    async def get(self, analysis_id: str) -> Optional[ResumeAnalysis]:
+        """Primary-key lookup"""
+        return await run_in_threadpool(self._get, analysis_id)
+    
+    async def get_many(self, analysis_ids: List[str]) -> Dict[str, ResumeAnalysis]:
+        """Fetch several analyses by id in one query"""
+        if not analysis_ids:
+            return {}
+        return await run_in_threadpool(self._get_many, analysis_ids)
+    
+    async def get_feedback_many(self, analysis_ids: List[str]) -> Dict[str, ResumeFeedback]:
+        """Fetch just the feedback of several analyses in one query (no resume text)"""
+        if not analysis_ids:
+            return {}
+        return await run_in_threadpool(self._get_feedback_many, analysis_ids)
+    
+    async def delete(self, analysis_id: str) -> bool:
+        return await run_in_threadpool(self._delete, analysis_id)
+    
+    async def save_job(self, job: AnalysisJob):
+        """Insert or update the stored status of a background job"""
+        await run_in_threadpool(self._save_job, job)
+    
+    async def get_job(self, job_id: str) -> Optional[AnalysisJob]:
+        return await run_in_threadpool(self._get_job, job_id)
+    
+    async def delete_job(self, job_id: str) -> bool:
+        return await run_in_threadpool(self._delete_job, job_id)
+    
+    async def get_stats(self, top_n: int = 4) -> dict:
+        """Constant-time snapshot of the running aggregates"""
+        # Shared stats read a file under a lock another worker may be holding
+        return await run_in_threadpool(self.stats.snapshot, top_n)
+    
+    def _save_many(self, analyses: List[ResumeAnalysis]):
+        rows = [self._to_row(analysis) for analysis in analyses]
+        with self.session_factory() as session:
+            session.execute(insert(AnalysisRecord), rows)
+            session.commit()
+        for row in rows:
+            self.stats.record(row["overall_score"], row["processing_time"], row["industry"])
+            self.lexical.add(row["id"], row["content"])
+    
+    def _get(self, analysis_id: str) -> Optional[ResumeAnalysis]:
+        with self.session_factory() as session:
+            record = session.get(AnalysisRecord, analysis_id)
+            return self._to_model(record) if record else None
+    
+    def _get_many(self, analysis_ids: List[str]) -> Dict[str, ResumeAnalysis]:
+        with self.session_factory() as session:
+            records = session.scalars(
+                select(AnalysisRecord).where(AnalysisRecord.id.in_(analysis_ids))
+            )
+            return {record.id: self._to_model(record) for record in records}
+    
+    def _get_feedback_many(self, analysis_ids: List[str]) -> Dict[str, ResumeFeedback]:
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(AnalysisRecord.id, AnalysisRecord.feedback).where(AnalysisRecord.id.in_(analysis_ids))
+            )
+            return {analysis_id: ResumeFeedback(**feedback) for analysis_id, feedback in rows}
+    
+    def _delete(self, analysis_id: str) -> bool:
+        with self.session_factory() as session:
+            removed = session.execute(
+                delete(AnalysisRecord)
+                .where(AnalysisRecord.id == analysis_id)
+                .returning(
+                    AnalysisRecord.overall_score,
+                    AnalysisRecord.processing_time,
+                    AnalysisRecord.industry
+                )
+            ).all()
+            session.commit()
+        for overall_score, processing_time, industry in removed:
+            self.stats.discard(overall_score, processing_time, industry)
+        self.lexical.remove(analysis_id)
+        return bool(removed)
+    
+    def _save_job(self, job: AnalysisJob):
+        with self.session_factory() as session:
+            session.merge(AnalysisJobRecord(
+                id=job.id,
+                status=job.status,
+                created_at=job.created_at,
+                started_at=job.started_at,
+                completed_at=job.completed_at,
+                error=job.error
+            ))
+            session.commit()
+    
+    def _get_job(self, job_id: str) -> Optional[AnalysisJob]:
+        with self.session_factory() as session:
+            record = session.get(AnalysisJobRecord, job_id)
+            if record is None:
+                return None
+            return AnalysisJob(
+                id=record.id,
+                status=record.status,
+                created_at=record.created_at,
+                started_at=record.started_at,
+                completed_at=record.completed_at,
+                error=record.error
+            )
+    
+    def _delete_job(self, job_id: str) -> bool:
+        with self.session_factory() as session:
+            deleted = session.execute(delete(AnalysisJobRecord).where(AnalysisJobRecord.id == job_id)).rowcount
+            session.commit()
+        return bool(deleted)
+    
+    def _fail_unfinished_jobs(self, error: str):
+        now = datetime.now()
+        with self.session_factory() as session:
+            session.execute(
+                update(AnalysisJobRecord)
+                .where(AnalysisJobRecord.status.in_(("queued", "running")))
+                .values(status="failed", error=error, completed_at=now)
+            )
+            session.execute(
+                delete(AnalysisJobRecord)
+                .where(AnalysisJobRecord.completed_at < now - timedelta(seconds=settings.JOB_FAILED_RETENTION_SECONDS))
+            )
+            session.commit()
+    
+    def _sync_lexical(self):
+        # created_at is when the analysis started, so rows can land out of order;
+        # look back far enough to cover the slowest analysis
+        with self._sync_lock, self.session_factory() as session:
+            recent = select(AnalysisRecord.id, AnalysisRecord.created_at)
+            if self._lexical_watermark is not None:
+                since = self._lexical_watermark - timedelta(seconds=settings.LEXICAL_SYNC_LOOKBACK_SECONDS)
+                recent = recent.where(AnalysisRecord.created_at >= since)
+            missing = []
+            for analysis_id, created_at in session.execute(recent):
+                self._advance_watermark(created_at)
+                if analysis_id not in self.lexical:
+                    missing.append(analysis_id)
+            for start in range(0, len(missing), 500):
+                rows = session.execute(
+                    select(AnalysisRecord.id, AnalysisRecord.content)
+                    .where(AnalysisRecord.id.in_(missing[start:start + 500]))
+                )
+                for analysis_id, content in rows:
+                    self.lexical.add(analysis_id, content)
+    
+    def _advance_watermark(self, created_at: datetime):
+        if self._lexical_watermark is None or created_at > self._lexical_watermark:
+            self._lexical_watermark = created_at
+    
+    @staticmethod
+    def _to_row(analysis: ResumeAnalysis) -> dict:
+        return {
+            "id": analysis.id,
+            "created_at": analysis.created_at,
+            "content": analysis.submission.content,
+            "job_title": analysis.submission.job_title,
+            "industry": analysis.submission.industry,
+            "experience_level": analysis.submission.experience_level,
+            "overall_score": analysis.feedback.overall_score,
+            "processing_time": analysis.processing_time,
+            "model_version": analysis.model_version,
+            "feedback": analysis.feedback.model_dump(mode="json")
+        }
+    
+    @staticmethod
+    def _to_model(record: AnalysisRecord) -> ResumeAnalysis:
+        return ResumeAnalysis(
+            id=record.id,
+            submission=ResumeSubmission(
+                content=record.content,
+                job_title=record.job_title,
+                industry=record.industry,
+                experience_level=record.experience_level
+            ),
+            feedback=ResumeFeedback(**record.feedback),
+            created_at=record.created_at,
+            processing_time=record.processing_time,
+            model_version=record.model_version
+        )
+
+analysis_store = AnalysisStore()
@@ -0,0 +1,149 @@
+from app.core.config import settings
+from app.models.resume import ResumeSubmission, ResumeFeedback
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(submission: ResumeSubmission, model: str, prompt_version: str) -> str:
+    """Hash the normalized submission so trivially different resubmissions share a key"""
+    normalized = [
+        " ".join(submission.content.split()),
+        (submission.job_title or "").strip().lower(),
+        (submission.industry or "").strip().lower(),
+        (submission.experience_level or "").strip().lower(),
+        model,
+        prompt_version
+    ]
+    payload = json.dumps(normalized, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+class AnalysisCache:
+    """Two-tier cache of analysis results: in-process LRU backed by optional Redis"""
+    
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[int] = None, redis_url: Optional[str] = None):
+        self.max_entries = max_entries or settings.ANALYSIS_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.ANALYSIS_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, tuple[float, ResumeFeedback]]" = OrderedDict()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.redis = None
+        
+        redis_url = redis_url or settings.REDIS_URL
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+                self.redis = aioredis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Redis cache tier unavailable: {e}")
+    
+    async def get(self, key: str) -> Optional[ResumeFeedback]:
+        """Return cached feedback for key, checking memory first and then Redis"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, feedback = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return feedback
+            del self._entries[key]
+        
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self._redis_key(key))
+                if raw is not None:
+                    feedback = ResumeFeedback.model_validate_json(raw)
+                    self._put_local(key, feedback)
+                    self.redis_hits += 1
+                    return feedback
+            except Exception as e:
+                logger.warning(f"Redis cache lookup failed: {e}")
+        
+        self.misses += 1
+        return None
+    
+    async def set(self, key: str, feedback: ResumeFeedback):
+        """Store feedback in both tiers"""
+        self._put_local(key, feedback)
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    self._redis_key(key),
+                    feedback.model_dump_json(),
+                    ex=self.ttl_seconds
+                )
+            except Exception as e:
+                logger.warning(f"Redis cache write failed: {e}")
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "redis_enabled": self.redis is not None
+        }
+    
+    def _put_local(self, key: str, feedback: ResumeFeedback):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, feedback)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"resume-analysis:{key}"
+
+class SimilarityCache:
+    """LRU cache of similar-resume results per (resume id, top_k).
+    
+    Any upsert or delete can change any neighbour list, so writes bump a
+    generation counter and clear the cache. Results computed under an older
+    generation are discarded instead of being cached.
+    """
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: "OrderedDict[tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, resume_id: str, top_k: int) -> Optional[List[Dict[str, Any]]]:
+        results = self._entries.get((resume_id, top_k))
+        if results is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end((resume_id, top_k))
+        self.hits += 1
+        return results
+    
+    def put(self, resume_id: str, top_k: int, results: List[Dict[str, Any]], generation: int):
+        if generation != self.generation:
+            return
+        self._entries[(resume_id, top_k)] = results
+        self._entries.move_to_end((resume_id, top_k))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self):
+        self.generation += 1
+        self._entries.clear()
+    
+    def get_stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+analysis_cache = AnalysisCache()
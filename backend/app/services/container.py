@@ -0,0 +1,186 @@
+from app.core.config import settings
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, Optional
+import asyncio
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Imported during warmup rather than with the app, so importing app.main stays
+# cheap; openai, numpy, SQLAlchemy and the vector SDKs load here
+SERVICE_MODULES = (
+    "app.services.analysis_store",
+    "app.services.openai_service",
+    "app.services.analysis_pipeline",
+    "app.services.job_queue",
+    "app.services.indexing_service",
+    "app.services.local_vector_service",
+    "app.services.search_service",
+)
+
+class ServiceContainer:
+    """Owns the application's services and builds them in an explicit warmup phase.
+    
+    Nothing is constructed at import time. ``start`` (run from the app lifespan)
+    imports the service modules in a worker thread, then runs the slow, blocking
+    steps concurrently (database init, vector index setup including Pinecone's
+    network calls, tokenizer load) before wiring up the pipeline and starting the
+    background workers. Requests that arrive before warmup has finished wait for it.
+    """
+    
+    def __init__(self):
+        self.openai_service = None
+        self.analysis_store = None
+        self.analysis_cache = None
+        self.embedding_service = None
+        self.prescreener = None
+        self.vector_service = None
+        self.indexer = None
+        self.analysis_pipeline = None
+        self.job_queue = None
+        self.search_service = None
+        self.import_seconds: Optional[float] = None
+        self.warmup_steps: Dict[str, float] = {}
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._warmup: Optional[asyncio.Task] = None
+    
+    @property
+    def ready(self) -> bool:
+        return self.warmup_seconds is not None and self.error is None
+    
+    def start(self, import_seconds: Optional[float] = None) -> asyncio.Task:
+        """Begin warmup in the background; returns the warmup task"""
+        self.import_seconds = import_seconds
+        if self._warmup is None:
+            self._warmup = asyncio.create_task(self._run_warmup(), name="service-warmup")
+        return self._warmup
+    
+    async def wait_ready(self) -> bool:
+        """Wait for warmup to finish; False if it failed"""
+        if self._warmup is None:
+            self.start()
+        await asyncio.shield(self._warmup)
+        return self.error is None
+    
+    async def stop(self):
+        if self._warmup is not None and not self._warmup.done():
+            self._warmup.cancel()
+            await asyncio.gather(self._warmup, return_exceptions=True)
+        if self.job_queue:
+            await self.job_queue.stop()
+        if self.indexer:
+            await self.indexer.stop()
+        if self.vector_service:
+            self.vector_service.close()
+        if self.embedding_service:
+            self.embedding_service.close()
+        from app.services.document_service import document_service
+        document_service.close()
+        from app.services.openai_client import close_openai_client
+        await close_openai_client()
+    
+    def get_readiness(self) -> Dict[str, Any]:
+        status = "ready" if self.ready else ("failed" if self.error else "starting")
+        ready_seconds = None
+        if self.ready and self.import_seconds is not None:
+            ready_seconds = round(self.import_seconds + self.warmup_seconds, 3)
+        return {
+            "status": status,
+            "import_seconds": round(self.import_seconds, 3) if self.import_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "import_to_ready_seconds": ready_seconds,
+            "warmup_steps": {step: round(seconds, 3) for step, seconds in self.warmup_steps.items()},
+            "error": self.error
+        }
+    
+    async def _run_warmup(self):
+        started = time.perf_counter()
+        try:
+            await self._step("imports", run_in_threadpool(self._import_services))
+            await asyncio.gather(
+                self._init_store(),
+                self._step("vector_index", self._build_vector_service()),
+                self._step("tokenizer", run_in_threadpool(self._load_tokenizer))
+            )
+            self._wire()
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            logger.exception("Service warmup failed")
+            return
+        self.warmup_seconds = time.perf_counter() - started
+        logger.info(f"Services ready after {self.warmup_seconds:.2f}s warmup: {self.get_readiness()['warmup_steps']}")
+    
+    async def _step(self, name: str, awaitable):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.warmup_steps[name] = time.perf_counter() - started
+    
+    async def _init_store(self):
+        await self._step("database", run_in_threadpool(self.analysis_store.init))
+        await self._step("lexical_index", run_in_threadpool(self.analysis_store.build_lexical_index))
+    
+    def _import_services(self):
+        for module in SERVICE_MODULES:
+            importlib.import_module(module)
+        from app.services.analysis_store import analysis_store
+        from app.services.cache_service import analysis_cache
+        from app.services.embedding_service import embedding_service
+        from app.services.openai_service import OpenAIService
+        from app.services.prescreen_service import prescreener
+        self.analysis_store = analysis_store
+        self.analysis_cache = analysis_cache
+        self.embedding_service = embedding_service
+        self.prescreener = prescreener
+        # Constructed here (not on the event loop) because it sets up the HTTP client
+        self.openai_service = OpenAIService()
+    
+    def _load_tokenizer(self):
+        # Every model the router can pick, so no request pays for loading an encoding
+        for model in set(self.openai_service.router.models.values()):
+            self.openai_service.prompt_builder.counter_for(model).count("warmup")
+    
+    async def _build_vector_service(self):
+        """Pinecone when configured and reachable, otherwise the local index.
+        Neither is required; similarity search is simply disabled without one."""
+        if settings.VECTOR_BACKEND in ("pinecone", "auto"):
+            try:
+                pinecone_service = await run_in_threadpool(self._create_pinecone_service)
+                if pinecone_service.pinecone_available:
+                    self.vector_service = pinecone_service
+            except Exception as e:
+                logger.warning(f"Pinecone not available: {e}")
+        if self.vector_service is None and settings.VECTOR_BACKEND in ("local", "auto"):
+            try:
+                from app.services.local_vector_service import LocalVectorService
+                self.vector_service = await run_in_threadpool(LocalVectorService)
+            except Exception as e:
+                logger.warning(f"Local vector index not available: {e}")
+    
+    @staticmethod
+    def _create_pinecone_service():
+        # Deferred: the SDK import is slow and the constructor makes network calls
+        from app.services.pinecone_service import PineconeService
+        return PineconeService()
+    
+    def _wire(self):
+        from app.services.analysis_pipeline import AnalysisPipeline
+        from app.services.indexing_service import IndexingQueue
+        from app.services.job_queue import JobQueue
+        from app.services.search_service import SearchService
+        self.indexer = IndexingQueue(self.vector_service) if self.vector_service else None
+        self.analysis_pipeline = AnalysisPipeline(
+            self.openai_service, self.analysis_store, self.indexer,
+            prescreener=self.prescreener if settings.PRESCREEN_ENABLED else None
+        )
+        self.job_queue = JobQueue(self.analysis_pipeline)
+        self.search_service = SearchService(self.analysis_store, self.vector_service)
+        self.job_queue.start()
+        if self.indexer:
+            self.indexer.start()
+
+services = ServiceContainer()
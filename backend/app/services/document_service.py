@@ -0,0 +1,233 @@
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.services.text_extraction import detect_kind, extract_text
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from typing import AsyncGenerator, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_FIELDS = ("job_title", "industry", "experience_level", "tier")
+FORM_OVERHEAD_BYTES = 64 * 1024  # Multipart boundaries, headers and the small text fields
+
+# Documents the multipart body, which the route reads from the raw request stream
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary", "description": "PDF, DOCX or plain-text resume"},
+                        **{name: {"type": "string"} for name in UPLOAD_FIELDS}
+                    }
+                }
+            }
+        }
+    }
+}
+
+class DocumentError(Exception):
+    """An upload that cannot be turned into resume text, with the HTTP status to answer with"""
+    
+    def __init__(self, message: str, status_code: int = 422):
+        super().__init__(message)
+        self.status_code = status_code
+
+class LimitedMultiPartParser(MultiPartParser):
+    """Starlette's streaming multipart parser with a size limit on the file part.
+    
+    File data is hashed as it arrives and spooled to memory up to ``spool_bytes``,
+    then to a temp file; parsing stops as soon as the limit is crossed instead of
+    after the whole body has been written out.
+    """
+    
+    def __init__(self, headers: Headers, stream: AsyncGenerator[bytes, None], max_bytes: int, spool_bytes: int):
+        super().__init__(headers, stream, max_files=1, max_fields=20)
+        self.max_file_size = spool_bytes
+        self.max_bytes = max_bytes
+        self.received = 0
+        self.digest = hashlib.sha256()
+        self.too_large = False
+    
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._current_part.file is not None:
+            self.received += end - start
+            if self.received > self.max_bytes:
+                self.too_large = True
+                raise MultiPartException("File too large")
+            self.digest.update(data[start:end])
+        super().on_part_data(data, start, end)
+
+@dataclass
+class Upload:
+    file: UploadFile
+    fields: Dict[str, str]
+    sha256: str
+    size: int
+
+class DocumentService:
+    """Turns uploaded resume files into text for the analysis pipeline.
+    
+    Extraction runs in a process pool so PDF/DOCX parsing never blocks the event
+    loop, and extracted text is cached by file hash so re-uploads skip it.
+    """
+    
+    def __init__(self, max_bytes: Optional[int] = None, workers: Optional[int] = None,
+                 cache_entries: Optional[int] = None):
+        self.max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+        self.workers = settings.UPLOAD_EXTRACT_WORKERS if workers is None else workers
+        self.cache_entries = cache_entries or settings.UPLOAD_TEXT_CACHE_MAX_ENTRIES
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.counts = {"uploads": 0, "cache_hits": 0, "cache_misses": 0, "rejected": 0, "failed": 0}
+        self.kinds: Dict[str, int] = {}
+        self.bytes_received = 0
+    
+    async def ingest(self, request: Request) -> Tuple[str, Dict[str, str]]:
+        """Receive a multipart upload and return its text and the form fields"""
+        upload = await self.receive(request)
+        try:
+            return await self.extract(upload), upload.fields
+        finally:
+            await upload.file.close()
+    
+    async def receive(self, request: Request) -> Upload:
+        self.counts["uploads"] += 1
+        if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+            self.counts["rejected"] += 1
+            raise DocumentError("Expected a multipart/form-data upload", 415)
+        
+        # Cheap early rejection; chunked bodies without a length are capped while parsing
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes + FORM_OVERHEAD_BYTES:
+            self.counts["rejected"] += 1
+            raise DocumentError(self._too_large_message(), 413)
+        
+        parser = LimitedMultiPartParser(request.headers, request.stream(), self.max_bytes, settings.UPLOAD_SPOOL_MAX_BYTES)
+        try:
+            form = await parser.parse()
+        except MultiPartException as e:
+            self.counts["rejected"] += 1
+            if parser.too_large:
+                raise DocumentError(self._too_large_message(), 413)
+            raise DocumentError(f"Malformed upload: {e}", 400)
+        
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            await form.close()
+            self.counts["rejected"] += 1
+            raise DocumentError("Upload must include the resume in a 'file' field", 400)
+        
+        self.bytes_received += parser.received
+        fields = {name: value for name, value in form.multi_items() if isinstance(value, str)}
+        return Upload(file=file, fields=fields, sha256=parser.digest.hexdigest(), size=parser.received)
+    
+    async def extract(self, upload: Upload) -> str:
+        cached = self._cache.get(upload.sha256)
+        if cached is not None:
+            self._cache.move_to_end(upload.sha256)
+            self.counts["cache_hits"] += 1
+            return cached
+        self.counts["cache_misses"] += 1
+        
+        head = await upload.file.read(8)
+        kind = detect_kind(upload.file.filename, upload.file.content_type, head)
+        if kind is None:
+            self.counts["rejected"] += 1
+            raise DocumentError("Unsupported file type: upload a PDF, DOCX or plain-text resume", 415)
+        await upload.file.seek(0)
+        data = await upload.file.read()
+        
+        # Decoding text is cheap; not worth the trip to another process
+        pool = None if kind == "txt" or self.workers <= 0 else self._get_pool()
+        try:
+            with stage_timer("text_extract"):
+                text = await asyncio.wait_for(self._run(data, kind, pool), settings.UPLOAD_EXTRACT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # Abandoning the future leaves the worker parsing and holding its slot
+            if pool is not None:
+                logger.warning(f"Text extraction timed out on a {kind} upload; restarting the worker pool")
+                self._discard_pool(pool)
+            self.counts["failed"] += 1
+            raise DocumentError("Timed out extracting text from the file")
+        except ValueError as e:
+            self.counts["failed"] += 1
+            raise DocumentError(str(e))
+        except BrokenProcessPool:
+            # A worker died (e.g. a pathological PDF); start a fresh pool next time
+            logger.warning(f"Text extraction worker crashed on a {kind} upload")
+            self.counts["failed"] += 1
+            self._discard_pool(pool)
+            raise DocumentError("Could not extract text from the file")
+        
+        if not text:
+            self.counts["failed"] += 1
+            raise DocumentError("No text found in the file; scanned documents are not supported")
+        
+        text = text[:settings.UPLOAD_MAX_TEXT_CHARS]
+        self.kinds[kind] = self.kinds.get(kind, 0) + 1
+        self._cache[upload.sha256] = text
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+        return text
+    
+    def get_stats(self) -> dict:
+        return {
+            **self.counts,
+            "by_kind": dict(self.kinds),
+            "bytes_received": self.bytes_received,
+            "cached_texts": len(self._cache)
+        }
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+    
+    async def _run(self, data: bytes, kind: str, pool: Optional[ProcessPoolExecutor]) -> str:
+        if pool is None:
+            return await run_in_threadpool(extract_text, data, kind)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, extract_text, data, kind)
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned (not forked) workers: the server process has threads and open sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+    
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        """Shut a pool down and kill its workers; the next extraction starts a fresh one.
+        
+        Extractions still running in it fail (as for a crashed worker), but a stuck
+        worker no longer holds a slot every later upload would queue behind.
+        """
+        if self._pool is pool:
+            self._pool = None
+        # No public way to stop busy workers before Python 3.14's terminate_workers()
+        processes = list((getattr(pool, "_processes", None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    
+    def _too_large_message(self) -> str:
+        return f"File too large: at most {self.max_bytes // 1024} KB allowed"
+
+document_service = DocumentService()
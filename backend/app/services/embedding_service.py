@@ -0,0 +1,270 @@
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.core.shared_memory import FileLock, map_array, shared_path
+from app.services.openai_client import get_openai_client, get_openai_semaphore
+from app.services.prompt_builder import TokenCounter
+from collections import OrderedDict
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import numpy as np
+import openai
+import os
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """LRU cache of embeddings keyed by a hash of model and text, stored as float32"""
+    
+    def __init__(self, max_entries: int, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load()
+    
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        vector = self._entries.get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+    
+    def put(self, key: str, vector: np.ndarray):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def load(self):
+        try:
+            with np.load(self.path) as data:
+                for key, vector in zip(data["keys"], data["vectors"]):
+                    self.put(str(key), vector)
+            logger.info(f"Loaded {len(self)} cached embeddings from {self.path}")
+        except Exception as e:
+            logger.warning(f"Could not load embedding cache: {e}")
+    
+    def save(self):
+        if not self.path or not self._entries:
+            return
+        try:
+            # np.savez appends .npz unless the name already ends with it
+            tmp_path = self.path + ".tmp.npz"
+            np.savez(
+                tmp_path,
+                keys=np.array(list(self._entries.keys())),
+                vectors=np.stack(list(self._entries.values()))
+            )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save embedding cache: {e}")
+
+class SharedEmbeddingCache:
+    """Embedding cache in a memory-mapped file shared by every worker process.
+    
+    A fixed, two-way set-associative table: each key hashes to a pair of slots
+    and a full pair evicts one of them. Writers serialize on a file lock; readers
+    take no lock and instead re-check the slot's key after copying the vector,
+    so a concurrent overwrite reads as a miss rather than a torn vector.
+    """
+    
+    def __init__(self, max_entries: int, dimension: int, path: str):
+        self.slots = max(2, max_entries + max_entries % 2)
+        self.dimension = dimension
+        dtype = np.dtype([("key", "<u8", (2,)), ("vector", "<f4", (dimension,))])
+        self.table = map_array(path, dtype, self.slots, kind="embeddings")
+        self.keys = self.table["key"]
+        self.vectors = self.table["vector"]
+        self.lock = FileLock(path + ".lock")
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+    
+    key = staticmethod(EmbeddingCache.key)
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        tag, first = self._locate(key)
+        for slot in (first, first + 1):
+            if self._holds(slot, tag):
+                vector = self.vectors[slot].copy()
+                if self._holds(slot, tag):
+                    self.hits += 1
+                    return vector
+        self.misses += 1
+        return None
+    
+    def put(self, key: str, vector: np.ndarray):
+        if vector.shape != (self.dimension,):
+            # A model whose size differs from VECTOR_DIMENSION; serve it uncached
+            if not self.skipped:
+                logger.warning(
+                    f"Embedding has {vector.size} dimensions but the shared cache holds "
+                    f"{self.dimension}; not caching embeddings of this size"
+                )
+            self.skipped += 1
+            return
+        tag, first = self._locate(key)
+        with self.lock:
+            pair = (first, first + 1)
+            slot = next((s for s in pair if self._holds(s, tag)), None)
+            if slot is None:
+                slot = next((s for s in pair if not self.keys[s].any()), first + int(tag[1]) % 2)
+            # Clear the key first so lock-free readers never match a half-written vector
+            self.keys[slot] = 0
+            self.vectors[slot] = vector
+            self.keys[slot] = tag
+    
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.keys.any(axis=1)))
+    
+    def load(self):
+        pass  # The mapped file is the cache
+    
+    def save(self):
+        self.table.flush()
+    
+    def _locate(self, key: str) -> Tuple[np.ndarray, int]:
+        digest = bytes.fromhex(key)
+        tag = np.frombuffer(digest[:16], dtype="<u8").copy()
+        if not tag.any():
+            tag[1] = 1  # All-zero marks an empty slot
+        return tag, int(tag[0] % (self.slots // 2)) * 2
+    
+    def _holds(self, slot: int, tag: np.ndarray) -> bool:
+        stored = self.keys[slot]
+        return stored[0] == tag[0] and stored[1] == tag[1]
+
+class EmbeddingService:
+    """Creates embeddings through a cache and a micro-batcher.
+    
+    Concurrent requests arriving within EMBEDDING_BATCH_WINDOW_MS are coalesced
+    into one multi-input embeddings call; identical texts in flight share a
+    single request. Inputs are truncated to the model's token limit, and a batch
+    the API rejects is retried text by text so one bad input fails only its caller.
+    """
+    
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or settings.EMBEDDING_MODEL
+        shared = shared_path("embeddings.bin")
+        if shared:
+            self.cache = SharedEmbeddingCache(settings.EMBEDDING_CACHE_MAX_ENTRIES, settings.VECTOR_DIMENSION, shared)
+        else:
+            self.cache = EmbeddingCache(settings.EMBEDDING_CACHE_MAX_ENTRIES, settings.EMBEDDING_CACHE_PATH)
+        self.window = settings.EMBEDDING_BATCH_WINDOW_MS / 1000
+        self.max_batch_size = settings.EMBEDDING_BATCH_MAX_SIZE
+        self.max_input_tokens = settings.EMBEDDING_MAX_INPUT_TOKENS
+        self.counter = TokenCounter(self.model)
+        self._pending: List[Tuple[str, str]] = []
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.api_calls = 0
+        self.texts_embedded = 0
+        self.truncated = 0
+    
+    async def embed(self, text: str) -> np.ndarray:
+        """Return the embedding for text as a float32 vector"""
+        key = self.cache.key(self.model, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        future = self._in_flight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._in_flight[key] = future
+            self._pending.append((key, text))
+            if len(self._pending) >= self.max_batch_size:
+                self._flush_now()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush_now)
+        
+        return await asyncio.shield(future)
+    
+    async def embed_many(self, texts: List[str]) -> List[np.ndarray]:
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+    
+    def get_stats(self) -> dict:
+        return {
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "cache_entries": len(self.cache),
+            "api_calls": self.api_calls,
+            "texts_embedded": self.texts_embedded,
+            "truncated": self.truncated
+        }
+    
+    def close(self):
+        self.cache.save()
+    
+    def _flush_now(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+    
+    async def _run_batch(self, batch: List[Tuple[str, str]]):
+        try:
+            inputs, truncated = await run_in_threadpool(self._fit_inputs, [text for _, text in batch])
+            async with get_openai_semaphore():
+                with stage_timer("embedding"):
+                    response = await get_openai_client().embeddings.create(
+                        model=self.model,
+                        input=inputs
+                    )
+            self.api_calls += 1
+            self.texts_embedded += len(batch)
+            self.truncated += truncated
+            for (key, _), item in zip(batch, sorted(response.data, key=lambda d: d.index)):
+                vector = np.asarray(item.embedding, dtype=np.float32)
+                self.cache.put(key, vector)
+                self._resolve(key, vector)
+        except openai.BadRequestError as e:
+            if len(batch) == 1:
+                self._fail(batch[0][0], e)
+                return
+            # One input the API rejects would fail the whole window; isolate it
+            logger.warning(f"Embedding batch of {len(batch)} rejected ({e}), retrying texts one by one")
+            await asyncio.gather(*(self._run_batch([item]) for item in batch))
+        except Exception as e:
+            for key, _ in batch:
+                self._fail(key, e)
+    
+    def _fit_inputs(self, texts: List[str]) -> Tuple[List[str], int]:
+        """Truncate texts past the model's input limit (an over-long input fails the
+        whole call); returns the inputs and how many were cut"""
+        fitted = []
+        for text in texts:
+            # UTF-8 needs at most 4 bytes per character and a token covers at least one byte
+            if len(text) * 4 > self.max_input_tokens:
+                text = self.counter.truncate(text, self.max_input_tokens)
+            fitted.append(text)
+        return fitted, sum(len(fit) < len(text) for fit, text in zip(fitted, texts))
+    
+    def _resolve(self, key: str, vector: np.ndarray):
+        future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(vector)
+    
+    def _fail(self, key: str, error: Exception):
+        future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
+
+embedding_service = EmbeddingService()
@@ -0,0 +1,91 @@
+from app.models.resume import ResumeFeedback
+from app.services.json_stream import parse_json_object
+from typing import Any, Dict, List, Tuple
+
+SCORE_FIELDS = ["overall_score", "technical_clarity", "impact_phrasing", "structure_format", "industry_alignment"]
+LIST_FIELDS = ["suggestions", "strengths", "areas_for_improvement"]
+
+def _strip_titles(schema: Any) -> Any:
+    """Drop pydantic's generated titles; they only cost prompt tokens"""
+    if isinstance(schema, dict):
+        return {key: _strip_titles(value) for key, value in schema.items() if key != "title"}
+    if isinstance(schema, list):
+        return [_strip_titles(value) for value in schema]
+    return schema
+
+def _feedback_parameters() -> Dict[str, Any]:
+    schema = _strip_titles(ResumeFeedback.model_json_schema())
+    # Inline the nested KeywordAnalysis schema instead of referencing $defs, and
+    # require all of its fields; the defaults only exist for lenient parsing
+    keywords = schema.pop("$defs")["KeywordAnalysis"]
+    for field in keywords["properties"].values():
+        field.pop("default", None)
+    keywords["required"] = list(keywords["properties"])
+    keywords["description"] = schema["properties"]["keyword_analysis"]["description"]
+    schema["properties"]["keyword_analysis"] = keywords
+    return schema
+
+# Function-calling tool whose parameters are the ResumeFeedback schema
+FEEDBACK_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "submit_resume_feedback",
+        "description": "Submit the structured feedback for the analyzed resume",
+        "parameters": _feedback_parameters()
+    }
+}
+FEEDBACK_TOOL_CHOICE = {"type": "function", "function": {"name": "submit_resume_feedback"}}
+
+def _score(value: Any) -> float:
+    if isinstance(value, str):
+        value = value.strip().rstrip("%").split("/")[0]  # "85", "85%", "85/100"
+    try:
+        return min(100.0, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return 0.0
+
+def _string_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, (list, tuple)):
+        return [item if isinstance(item, str) else str(item) for item in value if item is not None]
+    return [str(value)]
+
+def _keyword_analysis(value: Any) -> Dict[str, Any]:
+    keywords = value if isinstance(value, dict) else {}
+    try:
+        density = float(keywords.get("keyword_density", 0.0))
+    except (TypeError, ValueError):
+        density = 0.0
+    return {
+        "relevant_keywords": _string_list(keywords.get("relevant_keywords")),
+        "missing_keywords": _string_list(keywords.get("missing_keywords")),
+        "keyword_density": density
+    }
+
+def coerce_field(name: str, value: Any) -> Any:
+    """Coerce one feedback field to the type ResumeFeedback expects; unknown fields pass through"""
+    if name in SCORE_FIELDS:
+        return _score(value)
+    if name in LIST_FIELDS:
+        return _string_list(value)
+    if name == "keyword_analysis":
+        return _keyword_analysis(value)
+    return value
+
+def feedback_from_data(data: Dict[str, Any]) -> ResumeFeedback:
+    """Validate model output into ResumeFeedback, coercing near-misses (scores as strings
+    or out of range, a string where a list belongs, missing fields) instead of failing"""
+    fields = SCORE_FIELDS + LIST_FIELDS + ["keyword_analysis"]
+    return ResumeFeedback.model_validate({name: coerce_field(name, data.get(name)) for name in fields})
+
+def parse_feedback(text: str) -> Tuple[ResumeFeedback, bool]:
+    """Parse a model response into ResumeFeedback, repairing malformed JSON.
+    
+    Returns the feedback and whether the JSON needed repair; raises ValueError when
+    no JSON object can be recovered.
+    """
+    data, repaired = parse_json_object(text)
+    return feedback_from_data(data), repaired
@@ -0,0 +1,147 @@
+from app.core.config import settings
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import itertools
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+class IndexingQueue:
+    """Write-behind buffer that indexes analyses in batches off the request path.
+    
+    Producers enqueue and return immediately; a background task drains the
+    buffer into multi-vector upserts, retrying failed batches with exponential
+    backoff. When the buffer is full, enqueue waits, which pushes back on producers
+    instead of growing memory without bound.
+    """
+    
+    def __init__(self, vector_service, max_size: Optional[int] = None, batch_size: Optional[int] = None,
+                 flush_interval_ms: Optional[float] = None, max_retries: Optional[int] = None):
+        self.vector_service = vector_service
+        self.max_size = max_size or settings.INDEXING_QUEUE_MAX_SIZE
+        self.batch_size = batch_size or settings.INDEXING_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.INDEXING_FLUSH_INTERVAL_MS) / 1000
+        self.max_retries = max_retries if max_retries is not None else settings.INDEXING_MAX_RETRIES
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Pending ids -> (sequence number of their latest enqueue, monotonic enqueue time).
+        # Only that latest operation may index or forget the id: an older copy still in
+        # flight must neither undo a later delete nor swallow a later re-enqueue.
+        self._pending: Dict[str, Tuple[int, float]] = {}
+        self._sequence = itertools.count()
+        self.indexed = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.last_lag = 0.0
+    
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        return self._queue
+    
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run(), name="vector-indexer")
+    
+    async def stop(self, timeout: float = 10.0):
+        """Flush what is pending (up to timeout seconds), then stop the worker"""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping indexer with {self.queue.qsize()} resumes still pending")
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+    
+    async def enqueue(self, resume_id: str, content: str, feedback: Dict[str, Any]):
+        """Schedule a resume for indexing; waits only when the buffer is full"""
+        sequence = next(self._sequence)
+        self._pending[resume_id] = (sequence, time.monotonic())
+        await self.queue.put((sequence, (resume_id, content, feedback)))
+    
+    def discard(self, resume_id: str):
+        """Drop a pending resume so a later delete is not undone by a late upsert"""
+        self._pending.pop(resume_id, None)
+    
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        oldest = min((enqueued_at for _, enqueued_at in self._pending.values()), default=now)
+        return {
+            "pending": len(self._pending),
+            "queue_depth": self.queue.qsize(),
+            "indexed": self.indexed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "batches": self.batches,
+            "lag_seconds": round(now - oldest, 3),  # Age of the oldest unindexed resume
+            "last_batch_lag_seconds": round(self.last_lag, 3)
+        }
+    
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self._index(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+    
+    async def _index(self, batch: List[Tuple[int, Tuple[str, str, Dict[str, Any]]]]):
+        items = {item[0]: (sequence, item) for sequence, item in batch}  # Keep the latest copy of duplicates
+        for attempt in range(self.max_retries + 1):
+            # Skip resumes deleted while they waited, including during a retry backoff,
+            # and copies superseded by a later enqueue (that one indexes the resume)
+            items = {resume_id: entry for resume_id, entry in items.items() if self._is_current(resume_id, entry[0])}
+            if not items:
+                return
+            try:
+                await self.vector_service.store_resumes([item for _, item in items.values()])
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Giving up indexing {len(items)} resumes: {e}")
+                    self.failed += len(items)
+                    self._forget(items)
+                    return
+                self.retries += 1
+                delay = min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning(f"Indexing batch failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        
+        # Deleted while the upsert was in flight: its delete may have reached the
+        # index first, so remove what the upsert just wrote back. Re-enqueued ones
+        # are left to their newer copy.
+        discarded = [resume_id for resume_id in items if resume_id not in self._pending]
+        for resume_id in discarded:
+            await self.vector_service.delete_resume(resume_id)
+        
+        self.batches += 1
+        self.indexed += len(items) - len(discarded)
+        now = time.monotonic()
+        self.last_lag = max(now - self._pending.get(resume_id, (None, now))[1] for resume_id in items)
+        self._forget(items)
+    
+    def _is_current(self, resume_id: str, sequence: int) -> bool:
+        pending = self._pending.get(resume_id)
+        return pending is not None and pending[0] == sequence
+    
+    def _forget(self, items: Dict[str, Tuple[int, Any]]):
+        for resume_id, (sequence, _) in items.items():
+            if self._is_current(resume_id, sequence):
+                del self._pending[resume_id]
@@ -0,0 +1,184 @@
+from app.core.config import settings
+from app.models.resume import ResumeSubmission, AnalysisJob
+from app.services.analysis_pipeline import AnalysisPipeline
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class JobBroker:
+    """Transport for queued jobs; swap in a Redis/Celery-backed broker for multi-process setups"""
+    
+    async def put(self, job_id: str, submission: ResumeSubmission):
+        raise NotImplementedError
+    
+    async def get(self) -> Tuple[str, ResumeSubmission]:
+        raise NotImplementedError
+    
+    def qsize(self) -> int:
+        raise NotImplementedError
+
+class InMemoryBroker(JobBroker):
+    """Process-local broker backed by an asyncio queue"""
+    
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+    
+    @property
+    def queue(self) -> asyncio.Queue:
+        # Created lazily so it binds to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+    
+    async def put(self, job_id: str, submission: ResumeSubmission):
+        await self.queue.put((job_id, submission))
+    
+    async def get(self) -> Tuple[str, ResumeSubmission]:
+        return await self.queue.get()
+    
+    def qsize(self) -> int:
+        return self.queue.qsize()
+
+class JobQueue:
+    """Runs analyses in a pool of asyncio workers and keeps their status for polling.
+    
+    Jobs run in the process that accepted them, but their status is also written
+    to the analysis store until the analysis is stored, so a poll that reaches
+    another serve.py worker still finds a queued, running or failed job.
+    """
+    
+    def __init__(self, pipeline: AnalysisPipeline, broker: Optional[JobBroker] = None,
+                 workers: Optional[int] = None, max_retained: Optional[int] = None):
+        self.pipeline = pipeline
+        self.store = pipeline.store
+        self.broker = broker or InMemoryBroker()
+        self.worker_count = workers or settings.JOB_WORKERS
+        self.max_retained = max_retained or settings.JOB_MAX_RETAINED
+        self.jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._workers: List[asyncio.Task] = []
+    
+    def start(self):
+        """Spawn the worker tasks; must be called from the running event loop"""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"analysis-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+    
+    async def stop(self):
+        """Cancel the workers; queued jobs that have not started are dropped and
+        recorded as failed, as are the ones that were running"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in self.jobs.values():
+            if job.status in ("queued", "running"):
+                self._finish(job, error="Interrupted by server shutdown")
+                await self._record(job)
+    
+    async def submit(self, submission: ResumeSubmission) -> AnalysisJob:
+        """Queue a submission and return its job immediately"""
+        job = AnalysisJob(id=str(uuid.uuid4()), status="queued", created_at=datetime.now())
+        await self.store.save_job(job)
+        self.jobs[job.id] = job
+        self._evict_finished()
+        await self.broker.put(job.id, submission)
+        return job
+    
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        """A job accepted by this process"""
+        return self.jobs.get(job_id)
+    
+    async def lookup(self, job_id: str) -> Optional[AnalysisJob]:
+        """A job accepted by any worker process that has not completed, or
+        failed recently; None once its analysis is stored (or for unknown ids)"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job
+        return await self.store.get_job(job_id)
+    
+    async def discard(self, job_id: str):
+        """Forget a job; one still queued or running here or in another worker is
+        dropped, and an analysis it stores in the meantime is deleted again"""
+        self.jobs.pop(job_id, None)
+        await self.store.delete_job(job_id)
+    
+    def get_stats(self) -> dict:
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {"workers": len(self._workers), "queue_depth": self.broker.qsize(), **counts}
+    
+    async def _worker(self):
+        while True:
+            job_id, submission = await self.broker.get()
+            job = self.jobs.get(job_id)
+            if job is None or not await self._wanted(job):
+                self.jobs.pop(job_id, None)
+                continue
+            
+            job.status = "running"
+            job.started_at = datetime.now()
+            await self._record(job)
+            try:
+                # Persisted only if nobody deleted the job while the model was working
+                analysis = await self.pipeline.analyze(submission, analysis_id=job_id, persist=False)
+                if not await self._wanted(job):
+                    self.jobs.pop(job_id, None)
+                    continue
+                await self.pipeline.persist(analysis)
+                if not await self._wanted(job):
+                    # Deleted between the check and the save; undo the save
+                    self.jobs.pop(job_id, None)
+                    await self.pipeline.delete(job_id)
+                    continue
+                job.result = analysis
+                self._finish(job)
+            except Exception as e:
+                logger.error(f"Analysis job {job_id} failed: {e}")
+                self._finish(job, error=str(e))
+            await self._record(job)
+    
+    async def _wanted(self, job: AnalysisJob) -> bool:
+        """False once the job was discarded here or, its row gone, in another worker"""
+        if self.jobs.get(job.id) is not job:
+            return False
+        try:
+            return await self.store.get_job(job.id) is not None
+        except Exception as e:
+            logger.error(f"Could not check status of analysis job {job.id}: {e}")
+            return True
+    
+    @staticmethod
+    def _finish(job: AnalysisJob, error: Optional[str] = None):
+        job.status = "failed" if error is not None else "completed"
+        job.error = error
+        job.completed_at = datetime.now()
+    
+    async def _record(self, job: AnalysisJob):
+        """Mirror the job's status to the store; the row of a completed job is dropped,
+        since the stored analysis now answers polls"""
+        try:
+            if job.status == "completed":
+                await self.store.delete_job(job.id)
+            else:
+                await self.store.save_job(job)
+        except Exception as e:
+            logger.error(f"Could not record status of analysis job {job.id}: {e}")
+    
+    def _evict_finished(self):
+        # Oldest entries go first; jobs still queued or running are never dropped
+        excess = len(self.jobs) - self.max_retained
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id].status in ("completed", "failed"):
+                del self.jobs[job_id]
+                excess -= 1
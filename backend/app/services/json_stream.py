@@ -0,0 +1,183 @@
+from typing import Any, Dict, List, Tuple
+import json
+
+class IncrementalJSONParser:
+    """Parse a JSON object as it streams in, emitting each top-level field once it is complete.
+    
+    Text before the opening brace (e.g. a markdown code fence) is ignored. A value is only
+    emitted once the following ``,`` or ``}`` has arrived, so partially streamed numbers
+    such as ``8`` (of ``85``) are never reported. Fields a malformed stream prevents from
+    being emitted early are recovered by ``finish()``.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._pos = 0
+        self._started = False
+        self._stalled = False
+        self._decoder = json.JSONDecoder()
+    
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add a chunk of text and return the fields completed by it"""
+        self.buffer += chunk
+        completed = []
+        
+        while not self.complete and not self._stalled:
+            if not self._started:
+                start = self.buffer.find("{", self._pos)
+                if start < 0:
+                    break
+                self._pos = start + 1
+                self._started = True
+            
+            i = self._skip(self._pos, ",")
+            if i >= len(self.buffer):
+                break
+            if self.buffer[i] == "}":
+                self._pos = i + 1
+                self.complete = True
+                break
+            
+            try:
+                key, end = self._decoder.raw_decode(self.buffer, i)
+            except ValueError:
+                break
+            i = self._skip(end)
+            if i >= len(self.buffer):
+                break
+            if self.buffer[i] != ":" or not isinstance(key, str):
+                # Malformed; stop emitting early and leave recovery to finish()
+                self._stalled = True
+                break
+            
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self._skip(i + 1))
+            except ValueError:
+                break
+            i = self._skip(end)
+            if i >= len(self.buffer) or self.buffer[i] not in ",}":
+                break
+            
+            self.fields[key] = value
+            completed.append((key, value))
+            self._pos = end
+        
+        return completed
+    
+    def finish(self) -> List[Tuple[str, Any]]:
+        """Recover the fields still pending when the stream ends, repairing the buffer
+        if the model left it malformed or truncated"""
+        if self.complete:
+            return []
+        data, _ = parse_json_object(self.buffer)
+        self.complete = True
+        remaining = [(key, value) for key, value in data.items() if key not in self.fields]
+        self.fields.update(remaining)
+        return remaining
+    
+    def _skip(self, i: int, extra: str = "") -> int:
+        while i < len(self.buffer) and (self.buffer[i].isspace() or self.buffer[i] in extra):
+            i += 1
+        return i
+
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+def repair_json(text: str) -> str:
+    """Best-effort repair of the JSON object in a model response.
+    
+    Fixes the defects models commonly produce: surrounding prose or code fences,
+    trailing commas, Python literals (True/False/None), raw newlines inside strings,
+    and output cut off by max_tokens (open strings, arrays and objects are closed,
+    backing off to the last complete value).
+    """
+    start = text.find("{")
+    if start < 0:
+        return text
+    out: List[str] = []
+    stack: List[str] = []
+    commas: List[Tuple[int, Tuple[str, ...]]] = []  # Structural comma positions to back off to
+    in_string = False
+    escaped = False
+    i = start
+    
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                ch = "\\n"
+            out.append(ch)
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch == ",":
+            commas.append((len(out), tuple(stack)))
+            out.append(ch)
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            _strip_trailing_comma(out)
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                break  # Anything after the outermost object is prose
+        elif ch.isalpha():
+            word_end = i
+            while word_end < len(text) and text[word_end].isalpha():
+                word_end += 1
+            word = text[i:word_end]
+            out.append(PYTHON_LITERALS.get(word, word))
+            i = word_end
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    
+    if not stack:
+        return "".join(out)
+    
+    # Truncated: close what is open, backing off to earlier commas until the result parses
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    candidate = "".join(out).rstrip().rstrip(",") + "".join(reversed(stack))
+    while commas:
+        try:
+            json.loads(candidate)
+            break
+        except ValueError:
+            position, open_stack = commas.pop()
+            candidate = "".join(out[:position]) + "".join(reversed(open_stack))
+    return candidate
+
+def _strip_trailing_comma(out: List[str]):
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j:]
+
+def parse_json_object(text: str) -> Tuple[Dict[str, Any], bool]:
+    """Parse the JSON object in ``text``, repairing it if needed.
+    
+    Returns the object and whether a repair was required. Raises ValueError when
+    no object can be recovered.
+    """
+    try:
+        data = json.loads(text)
+        repaired = False
+    except ValueError:
+        data = json.loads(repair_json(text))
+        repaired = True
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+    return data, repaired
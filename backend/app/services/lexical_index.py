@@ -0,0 +1,206 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+import numpy as np
+import re
+import threading
+
+# Keeps skill names intact: "c++", "c#", "node.js", "ci/cd" -> "ci", "cd"
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+def _encode_varints(values: Iterable[int], out: bytearray):
+    """LEB128: 7 bits per byte, high bit set on every byte but a value's last"""
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+def _decode_varints(data: bytes) -> np.ndarray:
+    """Vectorized inverse of _encode_varints"""
+    raw = np.frombuffer(bytes(data), dtype=np.uint8)
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    # Position of each byte within its value gives its shift
+    value_of_byte = np.repeat(np.arange(len(ends)), ends - starts + 1)
+    shifts = (np.arange(len(raw)) - starts[value_of_byte]) * 7
+    return np.add.reduceat((raw & 0x7F).astype(np.int64) << shifts, starts)
+
+class LexicalIndex:
+    """In-process BM25 inverted index over resume text.
+    
+    Documents get increasing numbers, so each term's posting list is an
+    append-only byte string of (doc-number gap, term frequency) varints; on
+    typical resumes that is 2-3 bytes per posting. Queries decode the lists of
+    the query terms with numpy and score only the documents they contain.
+    Deleted and replaced documents are masked out until they make up more than
+    ``compact_fraction`` of the index; compaction then renumbers the live
+    documents and rewrites every posting list, so memory follows the live set.
+    """
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75, preview_chars: int = 200,
+                 compact_fraction: float = 0.5, compact_min_deleted: int = 64):
+        self.k1 = k1
+        self.b = b
+        self.preview_chars = preview_chars
+        self.compact_fraction = compact_fraction
+        self.compact_min_deleted = compact_min_deleted
+        self._lock = threading.RLock()
+        self._reset()
+    
+    def _reset(self):
+        self.postings: Dict[str, bytearray] = {}
+        self.last_doc: Dict[str, int] = {}
+        self.docs: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.previews: List[str] = []
+        self.lengths = np.zeros(1024, dtype=np.int32)
+        self.alive = np.zeros(1024, dtype=bool)
+        self.total_length = 0
+        self.deleted = 0
+    
+    def __len__(self) -> int:
+        return len(self.docs)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.docs
+    
+    def add(self, doc_id: str, text: str):
+        """Index a document, replacing any earlier version with the same id"""
+        counts = Counter(tokenize(text))
+        with self._lock:
+            if self._remove(doc_id):
+                self._maybe_compact()
+            doc = len(self.ids)
+            self._ensure_capacity(doc + 1)
+            for term, tf in counts.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = bytearray()
+                _encode_varints((doc - self.last_doc.get(term, 0), tf), postings)
+                self.last_doc[term] = doc
+            length = sum(counts.values())
+            self.ids.append(doc_id)
+            self.previews.append(text[:self.preview_chars])
+            self.docs[doc_id] = doc
+            self.lengths[doc] = length
+            self.alive[doc] = True
+            self.total_length += length
+    
+    def remove(self, doc_id: str) -> bool:
+        with self._lock:
+            removed = self._remove(doc_id)
+            if removed:
+                self._maybe_compact()
+            return removed
+    
+    def clear(self):
+        with self._lock:
+            self._reset()
+    
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Return up to top_k (id, BM25 score), best first"""
+        terms = set(tokenize(query))
+        with self._lock:
+            if not self.docs or not terms:
+                return []
+            count = len(self.ids)
+            live = len(self.docs)
+            average_length = self.total_length / live
+            scores = np.zeros(count, dtype=np.float32)
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings is None:
+                    continue
+                docs, tfs = self._decode(postings)
+                keep = self.alive[docs]
+                docs, tfs = docs[keep], tfs[keep]
+                if not len(docs):
+                    continue
+                idf = math.log(1 + (live - len(docs) + 0.5) / (len(docs) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[docs] / average_length)
+                scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+            
+            matched = np.flatnonzero(scores)
+            if len(matched) > top_k:
+                matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+            matched = matched[np.argsort(-scores[matched], kind="stable")]
+            return [(self.ids[doc], float(scores[doc])) for doc in matched]
+    
+    def preview(self, doc_id: str) -> Optional[str]:
+        doc = self.docs.get(doc_id)
+        return self.previews[doc] if doc is not None else None
+    
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self.docs),
+                "terms": len(self.postings),
+                "posting_bytes": sum(len(postings) for postings in self.postings.values()),
+                "deleted_pending_compaction": self.deleted
+            }
+    
+    def _remove(self, doc_id: str) -> bool:
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return False
+        self.alive[doc] = False
+        self.total_length -= int(self.lengths[doc])
+        self.previews[doc] = ""
+        self.deleted += 1
+        return True
+    
+    @staticmethod
+    def _decode(postings: bytearray) -> Tuple[np.ndarray, np.ndarray]:
+        values = _decode_varints(postings)
+        return np.cumsum(values[0::2]), values[1::2]
+    
+    def _maybe_compact(self):
+        if self.deleted >= self.compact_min_deleted and self.deleted > self.compact_fraction * len(self.ids):
+            self._compact()
+    
+    def _compact(self):
+        """Drop deleted documents everywhere, renumbering the live ones from 0"""
+        count = len(self.ids)
+        live = np.flatnonzero(self.alive[:count])
+        # Renumbering keeps the order, so posting lists stay sorted
+        renumbered = np.zeros(count, dtype=np.int64)
+        renumbered[live] = np.arange(len(live))
+        for term in list(self.postings):
+            docs, tfs = self._decode(self.postings[term])
+            keep = self.alive[docs]
+            if not keep.any():
+                del self.postings[term]
+                del self.last_doc[term]
+                continue
+            docs, tfs = renumbered[docs[keep]], tfs[keep]
+            gaps = np.diff(docs, prepend=0)
+            postings = bytearray()
+            _encode_varints(np.column_stack((gaps, tfs)).ravel().tolist(), postings)
+            self.postings[term] = postings
+            # The next add() encodes its gap from the last doc still in the list
+            self.last_doc[term] = int(docs[-1])
+        
+        capacity = max(1024, 2 * len(live))
+        lengths = np.zeros(capacity, dtype=np.int32)
+        lengths[:len(live)] = self.lengths[live]
+        self.lengths = lengths
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.alive[:len(live)] = True
+        self.ids = [self.ids[doc] for doc in live]
+        self.previews = [self.previews[doc] for doc in live]
+        self.docs = {doc_id: doc for doc, doc_id in enumerate(self.ids)}
+        self.deleted = 0
+    
+    def _ensure_capacity(self, size: int):
+        capacity = len(self.lengths)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        self.lengths = np.concatenate((self.lengths, np.zeros(new_capacity - capacity, dtype=np.int32)))
+        self.alive = np.concatenate((self.alive, np.zeros(new_capacity - capacity, dtype=bool)))
@@ -0,0 +1,111 @@
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.services.cache_service import SimilarityCache
+from app.services.embedding_service import embedding_service
+from app.services.vector_index import VectorIndex
+from app.services.vector_metadata import compact_metadata, format_match, score_metadata
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class LocalVectorService:
+    """Drop-in replacement for PineconeService backed by an in-process VectorIndex"""
+    
+    def __init__(self):
+        self.index = VectorIndex(
+            dimension=settings.VECTOR_DIMENSION,
+            path=settings.LOCAL_VECTOR_INDEX_PATH,
+            mode=settings.LOCAL_VECTOR_INDEX_MODE,
+            nprobe=settings.LOCAL_VECTOR_IVF_NPROBE
+        )
+        self.similar_cache = SimilarityCache()
+        self._cached_version = self.index.version
+        logger.info(f"Local vector index loaded with {len(self.index)} resumes")
+    
+    async def create_embedding(self, text: str) -> np.ndarray:
+        """Create embedding for text using OpenAI (cached and micro-batched)"""
+        return await embedding_service.embed(text)
+    
+    async def store_resume(self, resume_id: str, content: str, feedback: Dict[str, Any]):
+        """Store resume content and feedback in the local index"""
+        try:
+            await self.store_resumes([(resume_id, content, feedback)])
+            logger.info(f"Stored resume {resume_id} in local vector index")
+        except Exception as e:
+            logger.error(f"Failed to store resume in local vector index: {e}")
+    
+    async def store_resumes(self, resumes: List[Tuple[str, str, Dict[str, Any]]]):
+        """Embed and upsert (resume_id, content, feedback) items in one batch; errors propagate"""
+        embeddings = await embedding_service.embed_many([content for _, content, _ in resumes])
+        items = [
+            (resume_id, embedding, compact_metadata(resume_id, content, feedback))
+            for (resume_id, content, feedback), embedding in zip(resumes, embeddings)
+        ]
+        with stage_timer("vector_upsert"):
+            await run_in_threadpool(self.index.upsert, items)
+        self.similar_cache.invalidate()
+    
+    async def find_similar_resumes(self, content: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Find similar resumes using vector similarity search"""
+        try:
+            query_embedding = await self.create_embedding(content)
+            with stage_timer("vector_query"):
+                matches = await run_in_threadpool(self.index.query, query_embedding, top_k)
+            return [format_match(*match) for match in matches]
+        except Exception as e:
+            logger.error(f"Failed to find similar resumes: {e}")
+            return []
+    
+    async def find_similar_by_id(self, resume_id: str, top_k: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """Find resumes similar to an indexed one using its stored vector.
+        
+        Costs no embedding call. Returns None when the id is not (yet) indexed.
+        """
+        if self.index.stale():
+            # Another worker process wrote to the shared index
+            await run_in_threadpool(self.index.refresh)
+        if self.index.version != self._cached_version:
+            self.similar_cache.invalidate()
+            self._cached_version = self.index.version
+        cached = self.similar_cache.get(resume_id, top_k)
+        if cached is not None:
+            return cached
+        
+        generation = self.similar_cache.generation
+        existing = await run_in_threadpool(self.index.fetch, [resume_id])
+        if resume_id not in existing:
+            return None
+        
+        vector, _ = existing[resume_id]
+        with stage_timer("vector_query"):
+            matches = await run_in_threadpool(self.index.query, vector, top_k, [resume_id])
+        similar_resumes = [format_match(*match) for match in matches]
+        self.similar_cache.put(resume_id, top_k, similar_resumes, generation)
+        return similar_resumes
+    
+    async def update_resume_feedback(self, resume_id: str, feedback: Dict[str, Any]):
+        """Update the score fields stored for an existing resume"""
+        try:
+            existing = await run_in_threadpool(self.index.fetch, [resume_id])
+            if resume_id in existing:
+                embedding, metadata = existing[resume_id]
+                metadata = {**metadata, **score_metadata(feedback)}
+                metadata.pop("feedback_summary", None)  # Full feedback from before the compact schema
+                await run_in_threadpool(self.index.upsert, [(resume_id, embedding, metadata)])
+                self.similar_cache.invalidate()
+        except Exception as e:
+            logger.error(f"Failed to update resume feedback: {e}")
+    
+    async def delete_resume(self, resume_id: str):
+        """Delete a resume from the index"""
+        try:
+            await run_in_threadpool(self.index.delete, [resume_id])
+            self.similar_cache.invalidate()
+        except Exception as e:
+            logger.error(f"Failed to delete resume: {e}")
+    
+    def close(self):
+        self.index.close()
@@ -0,0 +1,141 @@
+from app.core.config import settings
+from app.models.resume import ResumeSubmission
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+import time
+
+TIERS = ("fast", "standard", "premium")
+
+class ModelStats:
+    """Observed calls, latency, tokens and cost for one model"""
+    
+    def __init__(self, prices: Optional[list] = None):
+        self.prices = prices  # [input, output] USD per 1K tokens, if known
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_latency = 0.0
+        self.recent = deque(maxlen=200)  # (finished at, seconds) of recent successful calls
+    
+    def latency_quantile(self, q: float, window: Optional[float] = None) -> Optional[float]:
+        """Latency quantile over recent calls, optionally only those in the last ``window`` seconds"""
+        cutoff = time.monotonic() - window if window else None
+        samples = sorted(elapsed for finished, elapsed in self.recent if cutoff is None or finished >= cutoff)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+    
+    @property
+    def cost(self) -> Optional[float]:
+        if not self.prices:
+            return None
+        return (self.prompt_tokens * self.prices[0] + self.completion_tokens * self.prices[1]) / 1000
+    
+    def snapshot(self) -> dict:
+        cost = self.cost
+        return {
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "failures": self.failures,
+            "avg_latency": round(self.total_latency / max(1, self.calls - self.failures), 3),
+            "latency_p95": self.latency_quantile(0.95),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "estimated_cost_usd": round(cost, 4) if cost is not None else None
+        }
+
+class ModelRouter:
+    """Picks the model for each analysis and accounts for what each model costs.
+    
+    The tier comes from the submission when the caller sets one; otherwise
+    experience levels listed in ROUTER_PREMIUM_EXPERIENCE_LEVELS go to the premium
+    model, short resumes to the fast model and the rest to the standard model.
+    Requests are moved to the fast model while the chosen one is overloaded (too
+    many calls in flight, p95 latency over the limit, or its circuit open).
+    """
+    
+    def __init__(self, models: Optional[Dict[str, str]] = None):
+        self.models = models or {
+            "fast": settings.LLM_MODEL_FAST,
+            "standard": settings.LLM_MODEL_STANDARD,
+            "premium": settings.LLM_MODEL_PREMIUM
+        }
+        self.premium_levels = {
+            level.strip().lower() for level in settings.ROUTER_PREMIUM_EXPERIENCE_LEVELS.split(",") if level.strip()
+        }
+        self.stats: Dict[str, ModelStats] = {}
+        self.routed = {tier: 0 for tier in TIERS}
+        self.fallbacks = 0
+    
+    @property
+    def default_model(self) -> str:
+        return self.models["standard"]
+    
+    def choose(self, submission: ResumeSubmission, unavailable: Iterable[str] = ()) -> Tuple[str, str]:
+        """Return the (tier, model) to use; ``unavailable`` lists models whose circuit
+        is open. Nothing is counted until ``record`` (cache hits are not routed)."""
+        tier = self.tier_for(submission)
+        model = self.models[tier]
+        fast = self.models["fast"]
+        if model != fast and (model in unavailable or self._overloaded(model)):
+            tier, model = "fast", fast
+        return tier, model
+    
+    def record(self, submission: ResumeSubmission, tier: str):
+        """Count a request sent to the model of ``tier``"""
+        if tier != self.tier_for(submission):
+            self.fallbacks += 1
+        self.routed[tier] += 1
+    
+    def tier_for(self, submission: ResumeSubmission) -> str:
+        requested = (submission.tier or "").strip().lower()
+        if requested in TIERS:
+            return requested
+        if (submission.experience_level or "").strip().lower() in self.premium_levels:
+            return "premium"
+        if len(submission.content.split()) <= settings.ROUTER_FAST_MAX_WORDS:
+            return "fast"
+        return "standard"
+    
+    def start(self, model: str) -> float:
+        """Mark a call to ``model`` as in flight; returns the start time for ``finish``"""
+        self._stats(model).in_flight += 1
+        return time.perf_counter()
+    
+    def finish(self, model: str, started: float, success: bool,
+               prompt_tokens: int = 0, completion_tokens: int = 0):
+        stats = self._stats(model)
+        stats.in_flight -= 1
+        stats.calls += 1
+        if not success:
+            stats.failures += 1
+            return
+        elapsed = time.perf_counter() - started
+        stats.total_latency += elapsed
+        stats.recent.append((time.monotonic(), elapsed))
+        stats.prompt_tokens += prompt_tokens
+        stats.completion_tokens += completion_tokens
+    
+    def get_stats(self) -> dict:
+        return {
+            "routed": dict(self.routed),
+            "fallbacks": self.fallbacks,
+            "models": {model: stats.snapshot() for model, stats in self.stats.items()}
+        }
+    
+    def _overloaded(self, model: str) -> bool:
+        stats = self.stats.get(model)
+        if stats is None:
+            return False
+        if stats.in_flight >= settings.ROUTER_OVERLOAD_IN_FLIGHT:
+            return True
+        # Only recent calls count, so a model recovers once the slow samples age out
+        p95 = stats.latency_quantile(0.95, window=settings.ROUTER_OVERLOAD_WINDOW_SECONDS)
+        return p95 is not None and p95 > settings.ROUTER_OVERLOAD_P95_SECONDS
+    
+    def _stats(self, model: str) -> ModelStats:
+        if model not in self.stats:
+            self.stats[model] = ModelStats(settings.LLM_MODEL_PRICES.get(model))
+        return self.stats[model]
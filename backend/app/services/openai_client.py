@@ -0,0 +1,45 @@
+import asyncio
+import httpx
+import openai
+from app.core.config import settings
+from typing import Optional
+
+# Shared across OpenAIService and PineconeService so every call reuses the
+# same pooled connections instead of opening a new TLS session per request.
+_client: Optional[openai.AsyncOpenAI] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """Return the process-wide async OpenAI client"""
+    global _client
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=httpx.Timeout(
+                settings.OPENAI_TIMEOUT,
+                connect=settings.OPENAI_CONNECT_TIMEOUT
+            )
+        )
+        _client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=http_client,
+            max_retries=settings.OPENAI_MAX_RETRIES
+        )
+    return _client
+
+def get_openai_semaphore() -> asyncio.Semaphore:
+    """Return the semaphore bounding concurrent OpenAI calls in this worker"""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+    return _semaphore
+
+async def close_openai_client():
+    """Close the pooled HTTP transport on shutdown"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
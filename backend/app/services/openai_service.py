@@ -1,195 +1,230 @@
-import openai
 from app.core.config import settings
+from app.core.metrics import LLM_TOKENS, observe_stage, stage_timer
 from app.models.resume import ResumeSubmission, ResumeFeedback
-import json
+from app.services.openai_client import get_openai_client, get_openai_semaphore
+from app.services.cache_service import analysis_cache, make_cache_key
+from app.services.feedback_schema import (
+    FEEDBACK_TOOL, FEEDBACK_TOOL_CHOICE, coerce_field, feedback_from_data, parse_feedback
+)
+from app.services.json_stream import IncrementalJSONParser
+from app.services.prompt_builder import PromptBuilder, TokenUsage
+from app.services.model_router import ModelRouter
+from app.services.resilience import ResilientCaller, TokenBucket
+from app.services.scoring_engine import scoring_engine
+import logging
 import time
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 class OpenAIService:
+    PROMPT_VERSION = "4"  # Bump whenever the prompt changes so cached results are not reused
+    LOCAL_MODEL = "local-heuristic"  # Reported as the source when the heuristic fallback answers
+    
     def __init__(self):
-        openai.api_key = settings.OPENAI_API_KEY
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        # Retries are handled by the resilience layer, not the SDK
+        self.client = get_openai_client().with_options(max_retries=0)
+        self.cache = analysis_cache
+        self.response_format = settings.OPENAI_RESPONSE_FORMAT
+        # With a tool schema the shape is enforced by the API, so the prompt can omit it
+        self.router = ModelRouter()
+        self.prompt_builder = PromptBuilder(self.router.default_model, include_schema=self.response_format != "tool")
+        self.token_usage = TokenUsage()
+        self.callers: Dict[str, ResilientCaller] = {}  # Per model, so one degraded model does not trip the others
+        # ...but one rate limit for the worker, whichever model a request goes to
+        self.rate_limiter = TokenBucket(settings.LLM_RATE_LIMIT_RPS, settings.LLM_RATE_LIMIT_BURST)
     
     async def analyze_resume(self, submission: ResumeSubmission) -> ResumeFeedback:
-        """Analyze resume using GPT-3.5-turbo and return structured feedback"""
-        start_time = time.time()
+        """Analyze resume using the routed model and return structured feedback"""
+        feedback, _ = await self.analyze_resume_with_source(submission)
+        return feedback
+    
+    async def analyze_resume_with_source(self, submission: ResumeSubmission,
+                                         on_call: Optional[Callable[[], None]] = None) -> Tuple[ResumeFeedback, str]:
+        """Like analyze_resume, but also returns what produced the feedback: the model
+        name, or LOCAL_MODEL when the heuristic fallback was used. ``on_call`` runs if
+        the model is actually called (not on a cache hit or an open breaker)"""
+        tier, model = self._choose_model(submission)
+        cache_key = make_cache_key(submission, model, self.PROMPT_VERSION)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached, model
+        self.router.record(submission, tier)
+        
+        # Create the analysis prompt, trimmed to the token budget
+        with stage_timer("prompt_build"):
+            prompt = self.prompt_builder.build(submission, model)
+        raw = ""
+        
+        async def request():
+            async with get_openai_semaphore():
+                return await self.client.chat.completions.create(
+                    model=model,
+                    messages=prompt.messages,
+                    temperature=0.3,
+                    max_tokens=settings.OPENAI_MAX_OUTPUT_TOKENS,
+                    **self._response_options()
+                )
         
-        # Create the analysis prompt
-        prompt = self._create_analysis_prompt(submission)
+        started = None
+        success = False
+        prompt_tokens = completion_tokens = 0
+        
+        def admitted():
+            nonlocal started
+            started = self.router.start(model)
+            if on_call is not None:
+                on_call()
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert resume reviewer and career coach. Analyze resumes and provide detailed, actionable feedback."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=2000
-            )
+            with stage_timer("llm_call"):
+                response = await self._caller(model).call(request, on_admit=admitted)
+            success = True
+            prompt_tokens, completion_tokens = self.token_usage.record(prompt, response.usage)
             
-            # Parse the response
-            feedback_data = json.loads(response.choices[0].message.content)
+            # Parse the response, repairing malformed JSON rather than discarding the call
+            raw = self._message_text(response.choices[0].message)
+            with stage_timer("json_parse"):
+                feedback, repaired = parse_feedback(raw)
+            if repaired:
+                logger.info("Repaired malformed JSON in OpenAI response")
             
-            # Calculate processing time
-            processing_time = time.time() - start_time
-            
-            # Create ResumeFeedback object
-            feedback = ResumeFeedback(
-                overall_score=feedback_data.get("overall_score", 0),
-                technical_clarity=feedback_data.get("technical_clarity", 0),
-                impact_phrasing=feedback_data.get("impact_phrasing", 0),
-                structure_format=feedback_data.get("structure_format", 0),
-                suggestions=feedback_data.get("suggestions", []),
-                strengths=feedback_data.get("strengths", []),
-                areas_for_improvement=feedback_data.get("areas_for_improvement", []),
-                keyword_analysis=feedback_data.get("keyword_analysis", {
-                    "relevant_keywords": [],
-                    "missing_keywords": [],
-                    "keyword_density": 0.0
-                }),
-                industry_alignment=feedback_data.get("industry_alignment", 0)
-            )
+            # Only real model output is cached; mock fallbacks are not
+            await self.cache.set(cache_key, feedback)
             
-            return feedback
+            return feedback, model
             
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON response: {e}")
-            print(f"Raw response: {response.choices[0].message.content}")
-            raise Exception("Failed to parse AI response")
+        except ValueError as e:
+            logger.warning(f"Unrecoverable OpenAI response ({e}), using local feedback")
+            logger.debug(f"Raw response: {raw}")
+            return self._get_mock_feedback(submission), self.LOCAL_MODEL
         except Exception as e:
-            print(f"Error in OpenAI API call: {e}")
-            # Return mock data if OpenAI fails (for testing)
-            print("⚠️ OpenAI API failed, returning mock data for testing")
-            return self._get_mock_feedback(submission)
+            # Fall back to the local heuristic rather than failing the request
+            logger.warning(f"OpenAI API call failed ({e}), using local feedback")
+            return self._get_mock_feedback(submission), self.LOCAL_MODEL
+        finally:
+            # A call the open breaker turned away never reached the model
+            if started is not None:
+                self._record_call(model, started, success, prompt_tokens, completion_tokens)
     
-    def _create_analysis_prompt(self, submission: ResumeSubmission) -> str:
-        """Create a detailed prompt for resume analysis"""
-        prompt = f"""
-        Please analyze the following resume and provide detailed feedback in JSON format.
+    async def stream_analysis(self, submission: ResumeSubmission,
+                              on_call: Optional[Callable[[], None]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream analysis fields as the model completes them.
         
-        Resume Content:
-        {submission.content}
-        
-        Target Job Title: {submission.job_title or "Not specified"}
-        Target Industry: {submission.industry or "Not specified"}
-        Experience Level: {submission.experience_level or "Not specified"}
-        
-        Please provide feedback in the following JSON format:
-        {{
-            "overall_score": <float 0-100>,
-            "technical_clarity": <float 0-100>,
-            "impact_phrasing": <float 0-100>,
-            "structure_format": <float 0-100>,
-            "suggestions": ["suggestion1", "suggestion2", ...],
-            "strengths": ["strength1", "strength2", ...],
-            "areas_for_improvement": ["area1", "area2", ...],
-            "keyword_analysis": {{
-                "relevant_keywords": ["keyword1", "keyword2", ...],
-                "missing_keywords": ["keyword1", "keyword2", ...],
-                "keyword_density": <float>
-            }},
-            "industry_alignment": <float 0-100>
-        }}
-        
-        Focus on:
-        1. Technical clarity and impact of achievements
-        2. Proper use of action verbs and quantifiable results
-        3. Structure and formatting
-        4. Keyword optimization for ATS systems
-        5. Industry-specific alignment
+        Yields ("field", (name, value)) for each top-level feedback field and finishes with
+        ("feedback", (ResumeFeedback, source)). The final feedback is authoritative: if the
+        stream fails part-way, the mock fallback replaces any fields already sent.
         """
-        return prompt
-    
-    async def get_similar_resumes(self, content: str, top_k: int = 5) -> list:
-        """Find similar resumes using semantic search"""
-        # This would integrate with Pinecone for vector search
-        # For now, return mock data
-        return [
-            {
-                "id": "resume_1",
-                "similarity_score": 0.85,
-                "content_preview": "Software Engineer with 5 years experience...",
-                "feedback_summary": "Strong technical skills, good structure"
-            }
-        ] 
-
-    def _get_mock_feedback(self, submission: ResumeSubmission) -> ResumeFeedback:
-        """Return dynamic mock feedback based on actual resume content"""
-        content = submission.content.lower()
-        
-        # Analyze the actual content for keywords and structure
-        words = content.split()
-        word_count = len(words)
-        
-        # Extract potential keywords from the content
-        technical_keywords = ["python", "javascript", "react", "node", "java", "sql", "aws", "docker", "kubernetes", "git", "agile", "scrum"]
-        leadership_keywords = ["led", "managed", "supervised", "coordinated", "directed", "oversaw"]
-        action_keywords = ["developed", "implemented", "created", "built", "designed", "optimized", "improved"]
+        tier, model = self._choose_model(submission)
+        cache_key = make_cache_key(submission, model, self.PROMPT_VERSION)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            for field in cached.dict().items():
+                yield "field", field
+            yield "feedback", (cached, model)
+            return
+        self.router.record(submission, tier)
         
-        found_technical = [kw for kw in technical_keywords if kw in content]
-        found_leadership = [kw for kw in leadership_keywords if kw in content]
-        found_action = [kw for kw in action_keywords if kw in content]
+        with stage_timer("prompt_build"):
+            prompt = self.prompt_builder.build(submission, model)
+        parser = IncrementalJSONParser()
+        received = []
         
-        # Calculate scores based on content analysis
-        technical_score = min(95, 70 + len(found_technical) * 5)
-        impact_score = min(90, 65 + len(found_action) * 4)
-        structure_score = min(95, 75 + (word_count // 50))  # Better structure with more content
-        
-        # Generate suggestions based on content
-        suggestions = []
-        if len(found_technical) < 3:
-            suggestions.append("Add more technical skills and technologies")
-        if len(found_action) < 5:
-            suggestions.append("Use more action verbs to describe achievements")
-        if word_count < 200:
-            suggestions.append("Expand on your experience with more details")
-        if not any(word in content for word in ["%", "percent", "increased", "decreased", "reduced"]):
-            suggestions.append("Add quantifiable achievements with specific metrics")
+        def request():
+            return self.client.chat.completions.create(
+                model=model,
+                messages=prompt.messages,
+                temperature=0.3,
+                max_tokens=settings.OPENAI_MAX_OUTPUT_TOKENS,
+                stream=True,
+                **self._response_options()
+            )
         
-        # Generate strengths based on content
-        strengths = []
-        if len(found_technical) >= 3:
-            strengths.append("Good technical skills presentation")
-        if len(found_leadership) >= 2:
-            strengths.append("Strong leadership experience")
-        if word_count > 300:
-            strengths.append("Comprehensive experience description")
-        if "experience" in content or "worked" in content:
-            strengths.append("Clear work history")
+        started = None
+        success = False
+        prompt_tokens = completion_tokens = 0
         
-        # Areas for improvement
-        areas = []
-        if len(found_technical) < 5:
-            areas.append("Add more technical skills")
-        if word_count < 250:
-            areas.append("Provide more detailed descriptions")
-        if not any(word in content for word in ["achieved", "improved", "increased"]):
-            areas.append("Include more quantifiable achievements")
+        def admitted():
+            nonlocal started
+            started = self.router.start(model)
+            if on_call is not None:
+                on_call()
         
-        # Keyword analysis based on actual content
-        relevant_keywords = found_technical + found_action[:3]
-        missing_keywords = [kw for kw in technical_keywords[:8] if kw not in content]
-        keyword_density = len(found_technical) / max(1, len(words) // 20)
+        try:
+            async with get_openai_semaphore():
+                # Retries cover opening the stream; once chunks flow, a failure falls back
+                stream = await self._caller(model).call(request, hedge=False, on_admit=admitted)
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    text = self._message_text(chunk.choices[0].delta)
+                    if not text:
+                        continue
+                    received.append(text)
+                    for name, value in parser.feed(text):
+                        yield "field", (name, coerce_field(name, value))
+            observe_stage("llm_call", time.perf_counter() - started)
+            
+            # Streamed responses carry no usage block, so count the completion locally
+            raw = "".join(received)
+            prompt_tokens, completion_tokens = self.token_usage.record(
+                prompt, completion_tokens=self.prompt_builder.counter_for(model).count(raw)
+            )
+            
+            # Recover anything a malformed or truncated stream held back
+            for name, value in parser.finish():
+                yield "field", (name, coerce_field(name, value))
+            
+            feedback = feedback_from_data(parser.fields)
+            await self.cache.set(cache_key, feedback)
+            source = model
+            success = True
+        except Exception as e:
+            logger.warning(f"OpenAI streaming call failed ({e}), using local feedback")
+            feedback = self._get_mock_feedback(submission)
+            source = self.LOCAL_MODEL
+            for field in feedback.dict().items():
+                yield "field", field
+        finally:
+            if started is not None:
+                self._record_call(model, started, success, prompt_tokens, completion_tokens)
         
-        return ResumeFeedback(
-            overall_score=min(90, (technical_score + impact_score + structure_score) // 3),
-            technical_clarity=technical_score,
-            impact_phrasing=impact_score,
-            structure_format=structure_score,
-            suggestions=suggestions[:4],  # Limit to 4 suggestions
-            strengths=strengths[:3],  # Limit to 3 strengths
-            areas_for_improvement=areas[:3],  # Limit to 3 areas
-            keyword_analysis={
-                "relevant_keywords": relevant_keywords[:5],
-                "missing_keywords": missing_keywords[:5],
-                "keyword_density": min(1.0, keyword_density)
-            },
-            industry_alignment=min(90, 75 + len(found_technical) * 2)
-        ) 
\ No newline at end of file
+        yield "feedback", (feedback, source)
+    
+    def _choose_model(self, submission: ResumeSubmission) -> Tuple[str, str]:
+        unavailable = [model for model, caller in self.callers.items() if caller.breaker.state == "open"]
+        return self.router.choose(submission, unavailable)
+    
+    def _record_call(self, model: str, started: float, success: bool, prompt_tokens: int, completion_tokens: int):
+        self.router.finish(model, started, success, prompt_tokens, completion_tokens)
+        if success:
+            LLM_TOKENS.inc(prompt_tokens, model, "prompt")
+            LLM_TOKENS.inc(completion_tokens, model, "completion")
+    
+    def _caller(self, model: str) -> ResilientCaller:
+        if model not in self.callers:
+            self.callers[model] = ResilientCaller(bucket=self.rate_limiter)
+        return self.callers[model]
+    
+    def get_llm_stats(self) -> dict:
+        return {model: caller.get_stats() for model, caller in self.callers.items()}
+    
+    def _response_options(self) -> Dict[str, Any]:
+        """Request arguments that make the API return the feedback as structured JSON"""
+        if self.response_format == "tool":
+            return {"tools": [FEEDBACK_TOOL], "tool_choice": FEEDBACK_TOOL_CHOICE}
+        if self.response_format == "json_object":
+            return {"response_format": {"type": "json_object"}}
+        return {}
+    
+    @staticmethod
+    def _message_text(message) -> str:
+        """JSON text of a message or stream delta: tool-call arguments, else the content"""
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            return "".join(call.function.arguments or "" for call in tool_calls if call.function)
+        return message.content or ""
+    
+    def _get_mock_feedback(self, submission: ResumeSubmission) -> ResumeFeedback:
+        """Return dynamic mock feedback based on actual resume content"""
+        return scoring_engine.score(submission)
@@ -1,8 +1,11 @@
 from pinecone import Pinecone
+from fastapi.concurrency import run_in_threadpool
 from app.core.config import settings
-from typing import List, Dict, Any
-import openai
-import json
+from app.core.metrics import stage_timer
+from app.services.cache_service import SimilarityCache
+from app.services.embedding_service import embedding_service
+from app.services.vector_metadata import compact_metadata, format_match, score_metadata
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,7 +16,7 @@ class PineconeService:
             # Use the newer Pinecone client format
             self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
             self.index_name = settings.PINECONE_INDEX_NAME
-            self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            self.similar_cache = SimilarityCache()
             
             # Initialize index if it doesn't exist
             self._ensure_index_exists()
@@ -48,12 +51,9 @@ class PineconeService:
         return self.pc.Index(self.index_name)
     
     async def create_embedding(self, text: str) -> List[float]:
-        """Create embedding for text using OpenAI"""
-        response = self.openai_client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
-        return response.data[0].embedding
+        """Create embedding for text using OpenAI (cached and micro-batched)"""
+        embedding = await embedding_service.embed(text)
+        return embedding.tolist()
     
     async def store_resume(self, resume_id: str, content: str, feedback: Dict[str, Any]):
         """Store resume content and feedback in Pinecone"""
@@ -62,25 +62,30 @@ class PineconeService:
             return
             
         try:
-            # Create embedding for resume content
-            embedding = await self.create_embedding(content)
-            
-            # Prepare metadata
-            metadata = {
-                "content": content[:1000],  # Truncate for metadata
-                "feedback_summary": json.dumps(feedback),
-                "resume_id": resume_id
-            }
-            
-            # Upsert to Pinecone
-            index = self.get_index()
-            index.upsert(
-                vectors=[(resume_id, embedding, metadata)]
-            )
+            await self.store_resumes([(resume_id, content, feedback)])
             logger.info(f"Stored resume {resume_id} in Pinecone")
         except Exception as e:
             logger.error(f"Failed to store resume in Pinecone: {e}")
     
+    async def store_resumes(self, resumes: List[Tuple[str, str, Dict[str, Any]]]):
+        """Embed and upsert (resume_id, content, feedback) items in one multi-vector upsert.
+        
+        Unlike store_resume, errors propagate so callers can retry.
+        """
+        # Create embeddings for resume content (coalesced into one API call)
+        embeddings = await embedding_service.embed_many([content for _, content, _ in resumes])
+        
+        vectors = [
+            (resume_id, embedding.tolist(), compact_metadata(resume_id, content, feedback))
+            for (resume_id, content, feedback), embedding in zip(resumes, embeddings)
+        ]
+        
+        # Upsert to Pinecone
+        index = self.get_index()
+        with stage_timer("vector_upsert"):
+            await run_in_threadpool(index.upsert, vectors=vectors)
+        self.similar_cache.invalidate()
+    
     async def find_similar_resumes(self, content: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Find similar resumes using vector similarity search"""
         if not self.pinecone_available:
@@ -93,51 +98,62 @@ class PineconeService:
             
             # Search in Pinecone
             index = self.get_index()
-            results = index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True
-            )
+            with stage_timer("vector_query"):
+                results = await run_in_threadpool(
+                    index.query,
+                    vector=query_embedding,
+                    top_k=top_k,
+                    include_metadata=True
+                )
             
             # Process results
-            similar_resumes = []
-            for match in results.matches:
-                metadata = match.metadata
-                similar_resumes.append({
-                    "id": match.id,
-                    "similarity_score": match.score,
-                    "content_preview": metadata.get("content", "")[:200] + "...",
-                    "feedback_summary": json.loads(metadata.get("feedback_summary", "{}"))
-                })
-            
-            return similar_resumes
+            return [format_match(match.id, match.score, match.metadata or {}) for match in results.matches]
         except Exception as e:
             logger.error(f"Failed to find similar resumes: {e}")
             return []
     
+    async def find_similar_by_id(self, resume_id: str, top_k: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """Find resumes similar to an already-indexed one by querying with its stored vector.
+        
+        Costs no embedding call. Returns None when the id is not (yet) indexed.
+        """
+        if not self.pinecone_available:
+            return []
+        
+        cached = self.similar_cache.get(resume_id, top_k)
+        if cached is not None:
+            return cached
+        
+        generation = self.similar_cache.generation
+        index = self.get_index()
+        with stage_timer("vector_query"):
+            results = await run_in_threadpool(
+                index.query,
+                id=resume_id,
+                top_k=top_k + 1,  # The resume itself is always the best match
+                include_metadata=True
+            )
+        if not results.matches:
+            return None
+        
+        similar_resumes = [
+            format_match(match.id, match.score, match.metadata or {})
+            for match in results.matches if match.id != resume_id
+        ][:top_k]
+        self.similar_cache.put(resume_id, top_k, similar_resumes, generation)
+        return similar_resumes
+    
     async def update_resume_feedback(self, resume_id: str, feedback: Dict[str, Any]):
-        """Update feedback for an existing resume"""
+        """Update the score fields stored for an existing resume"""
         if not self.pinecone_available:
             logger.warning("Pinecone not available, skipping feedback update")
             return
             
         try:
-            # Get the existing vector
+            # Metadata-only update; no need to fetch and re-upsert the vector
             index = self.get_index()
-            fetch_response = index.fetch(ids=[resume_id])
-            
-            if resume_id in fetch_response.vectors:
-                vector_data = fetch_response.vectors[resume_id]
-                embedding = vector_data.values
-                
-                # Update metadata with new feedback
-                metadata = vector_data.metadata
-                metadata["feedback_summary"] = json.dumps(feedback)
-                
-                # Upsert updated vector
-                index.upsert(
-                    vectors=[(resume_id, embedding, metadata)]
-                )
+            await run_in_threadpool(index.update, id=resume_id, set_metadata=score_metadata(feedback))
+            self.similar_cache.invalidate()
         except Exception as e:
             logger.error(f"Failed to update resume feedback: {e}")
     
@@ -149,6 +165,11 @@ class PineconeService:
             
         try:
             index = self.get_index()
-            index.delete(ids=[resume_id])
+            await run_in_threadpool(index.delete, ids=[resume_id])
+            self.similar_cache.invalidate()
         except Exception as e:
-            logger.error(f"Failed to delete resume: {e}") 
\ No newline at end of file
+            logger.error(f"Failed to delete resume: {e}")
+    
+    def close(self):
+        """Nothing to release; the Pinecone client holds no local state"""
+        pass
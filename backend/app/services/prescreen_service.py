@@ -0,0 +1,161 @@
+from app.core.config import settings
+from app.models.resume import ResumeSubmission, ResumeFeedback
+from app.services.scoring_engine import ScoringEngine, scoring_engine
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import numpy as np
+import re
+
+WORD_RE = re.compile(r"\w+")
+
+# Words that almost every resume contains at least one of; the section names are
+# also listed in the other languages resumes commonly arrive in
+RESUME_SIGNALS = {
+    "experience", "education", "skills", "work", "employment", "projects", "university",
+    "college", "degree", "summary", "certifications", "internship", "responsibilities",
+    "bachelor", "master", "engineer", "manager", "developer", "analyst",
+    # Spanish and Portuguese
+    "experiencia", "experiência", "educación", "educação", "formación", "formação",
+    "habilidades", "competencias", "universidad", "universidade", "ingeniero", "engenheiro",
+    # French
+    "expérience", "expériences", "formation", "compétences", "université", "ingénieur",
+    # German and Dutch
+    "berufserfahrung", "erfahrung", "ausbildung", "kenntnisse", "fähigkeiten", "universität",
+    "ingenieur", "ervaring", "opleiding", "vaardigheden", "universiteit",
+    # Italian
+    "esperienza", "esperienze", "istruzione", "competenze", "università", "ingegnere"
+}
+# Longer texts are escalated whatever their vocabulary: the signals above cannot
+# cover every language, and a wrong rejection costs more than an LLM call
+SIGNAL_CHECK_MAX_WORDS = 120
+
+def simhash(words: List[str], shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles; similar texts differ in few bits"""
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles],
+        dtype=np.uint64
+    )
+    # One row of 64 bits per shingle; each bit votes +1/-1 and the sign of the sum wins
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+    return int(np.packbits(votes > 0, bitorder="little").view("<u8")[0])
+
+@dataclass
+class ScreenResult:
+    tier: str  # "rejected", "duplicate" or "llm"
+    feedback: Optional[ResumeFeedback] = None
+    reason: Optional[str] = None
+    model: Optional[str] = None  # For duplicates, the model that produced the reused feedback
+    fingerprint: Optional[Tuple[str, int]] = None
+
+class PreScreener:
+    """Cheap local tier in front of the LLM.
+    
+    Rejects submissions that are empty or clearly not resumes (answering them with
+    the local scoring engine) and reuses earlier LLM feedback for near-duplicates of
+    recent submissions, found by SimHash. Only what is left is escalated to the LLM.
+    """
+    
+    MODEL = "local-prescreen"
+    
+    def __init__(self, engine: ScoringEngine = scoring_engine, min_words: Optional[int] = None,
+                 recent_size: Optional[int] = None, threshold: Optional[int] = None):
+        self.engine = engine
+        self.min_words = min_words or settings.PRESCREEN_MIN_WORDS
+        self.recent_size = recent_size or settings.PRESCREEN_RECENT_SIZE
+        self.threshold = threshold if threshold is not None else settings.PRESCREEN_SIMHASH_THRESHOLD
+        self._recent: "OrderedDict[Tuple[str, int], Tuple[ResumeFeedback, str]]" = OrderedDict()
+        # threshold + 1 bands: a pair within threshold bits differs in at most that
+        # many bands, so by pigeonhole it shares at least one band exactly
+        self.bands = min(self.threshold + 1, 64)
+        widths = [64 // self.bands + (i < 64 % self.bands) for i in range(self.bands)]
+        self._band_shifts = [(sum(widths[:i]), (1 << width) - 1) for i, width in enumerate(widths)]
+        self._bands: List[Dict[Tuple[str, int], set]] = [{} for _ in range(self.bands)]
+        self.counts = {"rejected": 0, "duplicate": 0, "llm": 0}
+    
+    def screen(self, submission: ResumeSubmission) -> ScreenResult:
+        words = WORD_RE.findall(submission.content.lower())
+        
+        reason = self._rejection_reason(words)
+        if reason:
+            self.counts["rejected"] += 1
+            feedback = self.engine.score(submission)
+            feedback.suggestions = [reason] + feedback.suggestions[:3]
+            return ScreenResult(tier="rejected", feedback=feedback, reason=reason)
+        
+        fingerprint = (self._context(submission), simhash(words))
+        duplicate = self._find_near_duplicate(fingerprint)
+        if duplicate is not None:
+            self.counts["duplicate"] += 1
+            feedback, model = self._recent[duplicate]
+            return ScreenResult(tier="duplicate", feedback=feedback, model=model, fingerprint=fingerprint)
+        
+        # Not counted as "llm" yet: the analysis cache may answer it without a model call
+        return ScreenResult(tier="llm", fingerprint=fingerprint)
+    
+    def record_llm_call(self):
+        """Count an escalated submission that reached the LLM"""
+        self.counts["llm"] += 1
+    
+    def remember(self, result: ScreenResult, feedback: ResumeFeedback, model: str):
+        """Record LLM feedback so later near-duplicates can reuse it"""
+        fingerprint = result.fingerprint
+        if fingerprint is None or fingerprint in self._recent:
+            return
+        self._recent[fingerprint] = (feedback, model)
+        for band, table in zip(self._split(fingerprint[1]), self._bands):
+            table.setdefault((fingerprint[0], band), set()).add(fingerprint)
+        while len(self._recent) > self.recent_size:
+            oldest, _ = self._recent.popitem(last=False)
+            for band, table in zip(self._split(oldest[1]), self._bands):
+                bucket = table.get((oldest[0], band))
+                if bucket:
+                    bucket.discard(oldest)
+                    if not bucket:
+                        del table[(oldest[0], band)]
+    
+    def get_stats(self) -> dict:
+        return {
+            **self.counts,
+            "llm_calls_saved": self.counts["rejected"] + self.counts["duplicate"],
+            "remembered": len(self._recent)
+        }
+    
+    def _rejection_reason(self, words: List[str]) -> Optional[str]:
+        if len(words) < self.min_words:
+            return f"Resume is too short to analyze ({len(words)} words); add your experience, skills and education"
+        alphabetic = sum(1 for word in words if word.isalpha())
+        if alphabetic < len(words) / 2:
+            return "Content is mostly non-text; paste the resume text rather than data or markup"
+        if len(words) < SIGNAL_CHECK_MAX_WORDS and RESUME_SIGNALS.isdisjoint(words):
+            return "Content does not look like a resume; include sections such as experience, education and skills"
+        return None
+    
+    def _find_near_duplicate(self, fingerprint: Tuple[str, int]) -> Optional[Tuple[str, int]]:
+        context, value = fingerprint
+        best, best_distance = None, self.threshold + 1
+        for band, table in zip(self._split(value), self._bands):
+            for candidate in table.get((context, band), ()):
+                distance = bin(candidate[1] ^ value).count("1")
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        return best
+    
+    def _split(self, value: int) -> List[int]:
+        return [(value >> shift) & mask for shift, mask in self._band_shifts]
+    
+    @staticmethod
+    def _context(submission: ResumeSubmission) -> str:
+        # Feedback depends on the target role, so only compare within the same target
+        return "|".join(
+            (field or "").strip().lower()
+            for field in (submission.job_title, submission.industry, submission.experience_level)
+        )
+
+prescreener = PreScreener()
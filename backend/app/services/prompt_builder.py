@@ -0,0 +1,275 @@
+from app.core.config import settings
+from app.models.resume import ResumeSubmission
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "You are an expert resume reviewer and career coach. Analyze resumes and provide detailed, actionable feedback."
+
+# Static instructions shared by every request; sent first so the provider can reuse the prefix
+INSTRUCTIONS = (
+    "Analyze the resume below and return your feedback as a JSON object (scores are floats 0-100). "
+    "Focus on: technical clarity and impact of achievements; action verbs and quantifiable "
+    "results; structure and formatting; keyword optimization for ATS systems; industry alignment."
+)
+# Only needed when the response shape is not already enforced by a tool schema
+SCHEMA_HINT = (
+    "Reply with only a JSON object of this shape:\n"
+    '{"overall_score":0,"technical_clarity":0,"impact_phrasing":0,"structure_format":0,'
+    '"industry_alignment":0,"suggestions":[""],"strengths":[""],"areas_for_improvement":[""],'
+    '"keyword_analysis":{"relevant_keywords":[""],"missing_keywords":[""],"keyword_density":0.0}}'
+)
+
+# Lines that carry no signal for a review and often repeat on every page
+BOILERPLATE_RE = re.compile(
+    r"^(page \d+( of \d+)?|references (available )?(up)?on request\.?|curriculum vitae|resume|cv|confidential)$",
+    re.IGNORECASE
+)
+HEADING_RE = re.compile(
+    r"^(summary|profile|objective|experience|work experience|professional experience|employment( history)?|"
+    r"education|skills|technical skills|projects|certifications|awards|publications|volunteer(ing)?|"
+    r"interests|languages|achievements)\s*:?$",
+    re.IGNORECASE
+)
+
+# Repeats of lines at least this long are page headers/footers (name and contact
+# details); shorter ones such as a job title, location or dates can recur legitimately
+MIN_REPEATED_LINE_CHARS = 40
+# Without tiktoken, truncation assumes this few characters per token so that dense
+# text (numbers, code, non-English) still fits; counts keep the usual ~4 estimate
+TRUNCATE_CHARS_PER_TOKEN = 2
+# For models this tiktoken release cannot map; counts a little high for newer encodings
+FALLBACK_ENCODING = "cl100k_base"
+
+class TokenCounter:
+    """Counts tokens with tiktoken when its encoding is available locally, otherwise
+    estimates with the usual ~4 characters per token rule"""
+    
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+    
+    def count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens (TRUNCATE_CHARS_PER_TOKEN characters each without tiktoken)"""
+        encoding = self._get_encoding()
+        if encoding is None:
+            return text[:max_tokens * TRUNCATE_CHARS_PER_TOKEN]
+        tokens = encoding.encode(text, disallowed_special=())
+        return encoding.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+    
+    def _get_encoding(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        import tiktoken
+                        try:
+                            self._encoding = tiktoken.encoding_for_model(self.model)
+                        except KeyError:
+                            self._encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+                    except Exception as e:
+                        logger.info(f"tiktoken unavailable ({e}), estimating token counts")
+                    self._loaded = True
+        return self._encoding
+
+@dataclass
+class PromptBundle:
+    messages: List[Dict[str, str]]
+    prompt_tokens: int
+    content_tokens: int
+    original_content_tokens: int
+    
+    @property
+    def trimmed(self) -> bool:
+        return self.content_tokens < self.original_content_tokens
+
+class PromptBuilder:
+    """Builds compact analysis prompts that fit a token budget.
+    
+    Resume text is whitespace-normalized and stripped of boilerplate lines and
+    repeated page headers/footers. If it is still over ``max_content_tokens`` each
+    section keeps its heading and as many leading lines as its share of the budget
+    allows, with a note of how much was left out, so every section stays
+    represented. Tokens are counted with the encoding of the model the request is
+    routed to.
+    """
+    
+    def __init__(self, model: str, max_content_tokens: Optional[int] = None, include_schema: bool = True):
+        self.counter = TokenCounter(model)
+        self._counters: Dict[str, TokenCounter] = {model: self.counter}
+        self.max_content_tokens = max_content_tokens or settings.PROMPT_MAX_CONTENT_TOKENS
+        self.instructions = f"{INSTRUCTIONS}\n{SCHEMA_HINT}" if include_schema else INSTRUCTIONS
+        self._prefix_tokens: Dict[str, int] = {}
+    
+    def counter_for(self, model: Optional[str] = None) -> TokenCounter:
+        """The token counter for ``model`` (the default model when None)"""
+        if model is None:
+            return self.counter
+        if model not in self._counters:
+            self._counters[model] = TokenCounter(model)
+        return self._counters[model]
+    
+    def build(self, submission: ResumeSubmission, model: Optional[str] = None) -> PromptBundle:
+        counter = self.counter_for(model)
+        content = self.normalize(submission.content)
+        original_tokens = counter.count(content)
+        if original_tokens > self.max_content_tokens:
+            content = self.fit(content, self.max_content_tokens, counter)
+        content_tokens = counter.count(content)
+        
+        target = (
+            f"Target Job Title: {submission.job_title or 'Not specified'}\n"
+            f"Target Industry: {submission.industry or 'Not specified'}\n"
+            f"Experience Level: {submission.experience_level or 'Not specified'}"
+        )
+        user_prompt = f"{self.instructions}\n\n{target}\n\nResume:\n{content}"
+        
+        return PromptBundle(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            prompt_tokens=self.prefix_tokens(counter) + counter.count(target) + content_tokens,
+            content_tokens=content_tokens,
+            original_content_tokens=original_tokens
+        )
+    
+    def prefix_tokens(self, counter: TokenCounter) -> int:
+        """Tokens in the static system/instruction prefix, counted once per model"""
+        if counter.model not in self._prefix_tokens:
+            self._prefix_tokens[counter.model] = counter.count(SYSTEM_PROMPT) + counter.count(self.instructions)
+        return self._prefix_tokens[counter.model]
+    
+    @staticmethod
+    def normalize(content: str) -> str:
+        """Collapse whitespace, drop boilerplate and repeated page headers/footers, keep
+        single blank lines"""
+        lines = []
+        seen = set()
+        for raw in content.splitlines():
+            line = " ".join(raw.split())
+            if not line:
+                if lines and lines[-1]:
+                    lines.append("")
+                continue
+            if BOILERPLATE_RE.match(line):
+                continue
+            if len(line) >= MIN_REPEATED_LINE_CHARS:
+                key = line.lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines.append(line)
+        return "\n".join(lines).strip()
+    
+    def fit(self, content: str, budget: int, counter: Optional[TokenCounter] = None) -> str:
+        """Trim normalized content to roughly ``budget`` tokens, section by section"""
+        counter = counter or self.counter
+        sections = self._split_sections(content)
+        costs = [[counter.count(line) + 1 for line in lines] for _, lines in sections]
+        heading_cost = sum(counter.count(heading) + 1 for heading, _ in sections if heading)
+        shares = self._allocate([sum(section_costs) for section_costs in costs], max(0, budget - heading_cost))
+        
+        output = []
+        for (heading, lines), section_costs, share in zip(sections, costs, shares):
+            if heading:
+                output.append(heading)
+            used = 0
+            kept = 0
+            for line, cost in zip(lines, section_costs):
+                if used + cost > share:
+                    # Keep the start of an oversized line (e.g. a resume pasted as one paragraph)
+                    partial = line[:int(len(line) * (share - used) / cost)].rsplit(" ", 1)[0]
+                    if partial:
+                        output.append(partial + " ...")
+                        kept += 1
+                    break
+                output.append(line)
+                used += cost
+                kept += 1
+            if kept < len(lines):
+                output.append(f"[... {len(lines) - kept} more lines omitted]")
+        return "\n".join(output)
+    
+    @staticmethod
+    def _allocate(sizes: List[int], budget: int) -> List[float]:
+        """Split the budget so small sections are kept whole and only the largest are cut,
+        so a long experience section cannot crowd out education or skills"""
+        shares = [0.0] * len(sizes)
+        remaining = list(range(len(sizes)))
+        while remaining:
+            fair = budget / len(remaining)
+            fits = [i for i in remaining if sizes[i] <= fair]
+            if not fits:
+                for i in remaining:
+                    shares[i] = fair
+                break
+            for i in fits:
+                shares[i] = sizes[i]
+                budget -= sizes[i]
+            remaining = [i for i in remaining if sizes[i] > fair]
+        return shares
+    
+    @staticmethod
+    def _split_sections(content: str) -> List[Tuple[Optional[str], List[str]]]:
+        sections: List[Tuple[Optional[str], List[str]]] = [(None, [])]
+        for line in content.splitlines():
+            if HEADING_RE.match(line):
+                sections.append((line, []))
+            elif line:
+                sections[-1][1].append(line)
+        return [section for section in sections if section[0] or section[1]]
+
+class TokenUsage:
+    """Running token totals for analysis requests"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.trimmed_requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tokens_trimmed = 0
+    
+    def record(self, bundle: PromptBundle, usage=None, completion_tokens: int = 0) -> Tuple[int, int]:
+        """Record one request and return its (prompt, completion) token counts; ``usage``
+        is the API's usage object when the response had one"""
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or bundle.prompt_tokens
+        completion_tokens = getattr(usage, "completion_tokens", None) or completion_tokens
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            if bundle.trimmed:
+                self.trimmed_requests += 1
+                self.tokens_trimmed += bundle.original_content_tokens - bundle.content_tokens
+        logger.debug(
+            f"Analysis request: {prompt_tokens} prompt tokens, {completion_tokens} completion tokens"
+            + (f", content trimmed from {bundle.original_content_tokens}" if bundle.trimmed else "")
+        )
+        return prompt_tokens, completion_tokens
+    
+    def get_stats(self) -> dict:
+        with self._lock:
+            requests = max(1, self.requests)
+            return {
+                "requests": self.requests,
+                "trimmed_requests": self.trimmed_requests,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "avg_prompt_tokens": round(self.prompt_tokens / requests, 1),
+                "avg_completion_tokens": round(self.completion_tokens / requests, 1),
+                "tokens_trimmed": self.tokens_trimmed
+            }
@@ -0,0 +1,250 @@
+from app.core.config import settings
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+import openai
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open"""
+
+class TokenBucket:
+    """Client-side rate limiter: ``rate`` requests per second with bursts up to ``capacity``"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None  # Created on first use, inside the event loop
+    
+    async def acquire(self) -> float:
+        """Take one token, waiting for it if necessary; returns the seconds waited"""
+        if self.rate <= 0:
+            return 0.0
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            # Waiting under the lock keeps callers in FIFO order
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            if wait > 0:
+                await asyncio.sleep(wait)
+            return wait
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and fails fast for
+    ``reset_seconds``; then lets a single trial call through (half-open) and closes
+    again if it succeeds"""
+    
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._trial_in_flight = False
+    
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+    
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+    
+    def release(self):
+        """End a half-open trial that neither succeeded nor failed (cancelled, or
+        rejected for a reason unrelated to provider health); the next call is the trial"""
+        self._trial_in_flight = False
+    
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+                logger.warning(f"LLM circuit breaker opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+class LatencyWindow:
+    """Latencies of the most recent successful calls, for the hedging threshold"""
+    
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+    
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, timeouts, connection errors and 5xx are worth retrying; other 4xx are not"""
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class ResilientCaller:
+    """Runs provider calls with client-side rate limiting, retries with exponential
+    backoff and full jitter (honoring Retry-After), optional hedging once a call
+    outlives the recent latency quantile, and a circuit breaker.
+    
+    ``call`` takes a factory so each attempt (and each hedge) issues a fresh request.
+    Calls made with ``hedge=False`` (opening a stream) stay out of the latency
+    window: time to first byte would drag down the threshold for full completions.
+    """
+    
+    def __init__(self, max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, hedge: Optional[bool] = None,
+                 bucket: Optional[TokenBucket] = None):
+        self.max_attempts = max_attempts or settings.LLM_RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else settings.LLM_RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else settings.LLM_RETRY_MAX_DELAY
+        self.hedge = settings.LLM_HEDGE_ENABLED if hedge is None else hedge
+        # Pass one bucket to several callers to give them a single shared limit
+        self.bucket = bucket or TokenBucket(settings.LLM_RATE_LIMIT_RPS, settings.LLM_RATE_LIMIT_BURST)
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURE_THRESHOLD, settings.LLM_BREAKER_RESET_SECONDS)
+        self.latency = LatencyWindow()
+        self.paused_until = 0.0  # Monotonic deadline set from Retry-After on 429s
+        self.counts = {
+            "calls": 0, "attempts": 0, "retries": 0, "failures": 0, "short_circuited": 0,
+            "hedged": 0, "hedge_wins": 0
+        }
+        self.rate_limit_wait = 0.0
+    
+    async def call(self, factory: Callable[[], Awaitable[Any]], hedge: bool = True,
+                   on_admit: Optional[Callable[[], None]] = None) -> Any:
+        """Run ``factory`` under the retry policy; ``on_admit`` is called once the
+        breaker lets the call through (not when it raises CircuitOpenError)"""
+        self.counts["calls"] += 1
+        if not self.breaker.allow():
+            self.counts["short_circuited"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+        trial = self.breaker.state == "half_open"
+        
+        try:
+            if on_admit is not None:
+                on_admit()
+            for attempt in range(1, self.max_attempts + 1):
+                await self._wait_turn()
+                try:
+                    if hedge and self.hedge:
+                        result = await self._hedged(factory)
+                    else:
+                        result = await self._timed(factory, record=hedge)
+                except Exception as e:
+                    if not is_retryable(e):
+                        # Our own request was bad; that says nothing about provider health
+                        raise
+                    if attempt == self.max_attempts or self.breaker.state != "closed":
+                        self.counts["failures"] += 1
+                        self.breaker.record_failure()
+                        raise
+                    self.counts["retries"] += 1
+                    delay = self._backoff(attempt, e)
+                    logger.info(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                self.breaker.record_success()
+                return result
+        finally:
+            # A trial cancelled by a client disconnect (CancelledError is not an
+            # Exception) or rejected as a bad request must not hold the slot forever
+            if trial:
+                self.breaker.release()
+    
+    def get_stats(self) -> dict:
+        return {
+            **self.counts,
+            "breaker_state": self.breaker.state,
+            "breaker_opens": self.breaker.opens,
+            "rate_limit_wait_seconds": round(self.rate_limit_wait, 3),
+            "latency_p95": self.latency.quantile(0.95)
+        }
+    
+    async def _wait_turn(self):
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+            self.rate_limit_wait += pause
+        self.rate_limit_wait += await self.bucket.acquire()
+        self.counts["attempts"] += 1
+    
+    async def _timed(self, factory: Callable[[], Awaitable[Any]], record: bool = True) -> Any:
+        start = time.perf_counter()
+        result = await factory()
+        if record:
+            self.latency.add(time.perf_counter() - start)
+        return result
+    
+    async def _hedged(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Send a second request if the first outlives the latency quantile; first wins"""
+        threshold = None
+        if len(self.latency.samples) >= settings.LLM_HEDGE_MIN_SAMPLES:
+            threshold = self.latency.quantile(settings.LLM_HEDGE_QUANTILE)
+        if threshold is None:
+            return await self._timed(factory)
+        
+        first = asyncio.ensure_future(self._timed(factory))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=threshold)
+            if done:
+                return first.result()
+            
+            self.counts["hedged"] += 1
+            await self.bucket.acquire()
+            second = asyncio.ensure_future(self._timed(factory))
+            pending.add(second)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.counts["hedge_wins"] += 1
+                        return task.result()
+            # Both failed; surface the original request's error
+            return first.result()
+        finally:
+            # Also reached when the caller is cancelled mid-wait: no request may outlive it
+            for task in pending:
+                task.cancel()
+    
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        server_delay = retry_after(error)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+            if isinstance(error, openai.RateLimitError):
+                # Hold back every caller, not just this one
+                self.paused_until = max(self.paused_until, time.monotonic() + server_delay)
+        return delay
@@ -0,0 +1,172 @@
+from app.core.config import settings
+from app.models.resume import ResumeSubmission, ResumeFeedback
+from typing import Dict, List, Optional
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Keyword lists per category. Industry entries override the default lists they name.
+DEFAULT_DICTIONARIES: Dict[str, Dict[str, List[str]]] = {
+    "default": {
+        "technical": ["python", "javascript", "react", "node", "java", "sql", "aws", "docker", "kubernetes", "git", "agile", "scrum"],
+        "leadership": ["led", "managed", "supervised", "coordinated", "directed", "oversaw"],
+        "action": ["developed", "implemented", "created", "built", "designed", "optimized", "improved"],
+        "metrics": ["%", "percent", "increased", "decreased", "reduced"],
+        "achievement": ["achieved", "improved", "increased"],
+        "history": ["experience", "worked"]
+    },
+    "finance": {
+        "technical": ["excel", "sql", "python", "financial modeling", "valuation", "forecasting", "bloomberg", "gaap", "risk management", "accounting", "cfa", "vba"]
+    },
+    "healthcare": {
+        "technical": ["patient care", "emr", "epic", "hipaa", "clinical", "cpr", "triage", "medication administration", "bls", "charting", "icu", "telemetry"]
+    },
+    "marketing": {
+        "technical": ["seo", "sem", "google analytics", "content strategy", "social media", "hubspot", "salesforce", "a/b testing", "copywriting", "crm", "email marketing", "branding"]
+    },
+    "consulting": {
+        "technical": ["strategy", "stakeholder management", "excel", "powerpoint", "financial modeling", "market research", "due diligence", "sql", "tableau", "process improvement", "change management", "agile"]
+    }
+}
+
+# Words, or single punctuation marks, so "c++" -> c + + and "40%" -> 40 %
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+class KeywordMatcher:
+    """Word-boundary-correct matcher for one keyword dictionary.
+    
+    The text is tokenized once; single-token keywords are found with one set
+    intersection and multi-token keywords ("financial modeling", "c++") with a
+    substring search over the space-joined tokens, so every category is matched in
+    a single pass instead of a substring scan per keyword.
+    """
+    
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.categories = {
+            category: [kw.lower() for kw in words] for category, words in categories.items()
+        }
+        self.single = set()
+        self.multi: Dict[str, str] = {}  # Keyword -> " token token " search form
+        for words in self.categories.values():
+            for kw in words:
+                tokens = TOKEN_RE.findall(kw)
+                if len(tokens) == 1:
+                    self.single.add(tokens[0])
+                else:
+                    self.multi[kw] = " " + " ".join(tokens) + " "
+    
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """Return the keywords found in lowercased text per category, in dictionary order"""
+        tokens = TOKEN_RE.findall(text)
+        found = self.single.intersection(tokens)
+        if self.multi:
+            joined = " " + " ".join(tokens) + " "
+            found.update(kw for kw, needle in self.multi.items() if needle in joined)
+        return {
+            category: [kw for kw in words if kw in found]
+            for category, words in self.categories.items()
+        }
+
+class ScoringEngine:
+    """Offline heuristic resume scorer, used as a fast pre-grade and as the LLM fallback"""
+    
+    def __init__(self, dictionaries: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        dictionaries = dictionaries or self._load_dictionaries()
+        default = dictionaries["default"]
+        # Industry dictionaries fall back to the default lists for categories they omit
+        self.matchers: Dict[str, KeywordMatcher] = {
+            industry: KeywordMatcher({**default, **categories})
+            for industry, categories in dictionaries.items()
+        }
+    
+    def score(self, submission: ResumeSubmission) -> ResumeFeedback:
+        return ResumeFeedback(**self.score_text(submission.content, submission.industry))
+    
+    def score_many(self, submissions: List[ResumeSubmission]) -> List[ResumeFeedback]:
+        return [self.score(submission) for submission in submissions]
+    
+    def score_text(self, text: str, industry: Optional[str] = None) -> dict:
+        """Score raw text and return the ResumeFeedback fields as a dict"""
+        content = text.lower()
+        word_count = len(content.split())
+        matcher = self.matchers.get((industry or "").strip().lower(), self.matchers["default"])
+        found = matcher.match(content)
+        
+        technical_keywords = matcher.categories["technical"]
+        found_technical = found["technical"]
+        found_leadership = found["leadership"]
+        found_action = found["action"]
+        
+        # Calculate scores based on content analysis
+        technical_score = min(95, 70 + len(found_technical) * 5)
+        impact_score = min(90, 65 + len(found_action) * 4)
+        structure_score = min(95, 75 + (word_count // 50))  # Better structure with more content
+        
+        # Generate suggestions based on content
+        suggestions = []
+        if len(found_technical) < 3:
+            suggestions.append("Add more technical skills and technologies")
+        if len(found_action) < 5:
+            suggestions.append("Use more action verbs to describe achievements")
+        if word_count < 200:
+            suggestions.append("Expand on your experience with more details")
+        if not found["metrics"]:
+            suggestions.append("Add quantifiable achievements with specific metrics")
+        
+        # Generate strengths based on content
+        strengths = []
+        if len(found_technical) >= 3:
+            strengths.append("Good technical skills presentation")
+        if len(found_leadership) >= 2:
+            strengths.append("Strong leadership experience")
+        if word_count > 300:
+            strengths.append("Comprehensive experience description")
+        if found["history"]:
+            strengths.append("Clear work history")
+        
+        # Areas for improvement
+        areas = []
+        if len(found_technical) < 5:
+            areas.append("Add more technical skills")
+        if word_count < 250:
+            areas.append("Provide more detailed descriptions")
+        if not found["achievement"]:
+            areas.append("Include more quantifiable achievements")
+        
+        # Keyword analysis based on actual content
+        relevant_keywords = found_technical + found_action[:3]
+        missing_keywords = [kw for kw in technical_keywords[:8] if kw not in found_technical]
+        keyword_density = len(found_technical) / max(1, word_count // 20)
+        
+        return {
+            "overall_score": min(90, (technical_score + impact_score + structure_score) // 3),
+            "technical_clarity": technical_score,
+            "impact_phrasing": impact_score,
+            "structure_format": structure_score,
+            "suggestions": suggestions[:4],  # Limit to 4 suggestions
+            "strengths": strengths[:3],  # Limit to 3 strengths
+            "areas_for_improvement": areas[:3],  # Limit to 3 areas
+            "keyword_analysis": {
+                "relevant_keywords": relevant_keywords[:5],
+                "missing_keywords": missing_keywords[:5],
+                "keyword_density": min(1.0, keyword_density)
+            },
+            "industry_alignment": min(90, 75 + len(found_technical) * 2)
+        }
+    
+    @staticmethod
+    def _load_dictionaries() -> Dict[str, Dict[str, List[str]]]:
+        """Built-in dictionaries, extended by SCORING_DICTIONARY_PATH when configured"""
+        dictionaries = {industry: dict(categories) for industry, categories in DEFAULT_DICTIONARIES.items()}
+        if settings.SCORING_DICTIONARY_PATH:
+            try:
+                with open(settings.SCORING_DICTIONARY_PATH) as f:
+                    for industry, categories in json.load(f).items():
+                        dictionaries.setdefault(industry.lower(), {}).update(categories)
+            except Exception as e:
+                logger.warning(f"Could not load scoring dictionaries: {e}")
+        return dictionaries
+
+scoring_engine = ScoringEngine()
@@ -0,0 +1,87 @@
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.models.resume import ResumeFeedback
+from typing import Any, Dict, List, Optional, Tuple
+
+SEARCH_MODES = ("hybrid", "lexical", "vector")
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: each list contributes 1 / (k + rank) per id. Uses only
+    ranks, so BM25 and cosine scores need no common scale."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, 1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+class SearchService:
+    """Resume search over the analysis store's BM25 index and the vector index.
+    
+    ``lexical`` answers from the in-process inverted index alone (no API call),
+    ``vector`` embeds the query and searches the vector index, and ``hybrid``
+    runs both and fuses the rankings with reciprocal rank fusion. Without a
+    vector index, or when embedding fails, hybrid search falls back to lexical.
+    """
+    
+    def __init__(self, analysis_store, vector_service=None):
+        self.analysis_store = analysis_store
+        self.vector_service = vector_service
+        self.searches = {mode: 0 for mode in SEARCH_MODES}
+    
+    async def search(self, query: str, top_k: int = 10, mode: str = "hybrid") -> List[Dict[str, Any]]:
+        """Return up to top_k hits with their fused, BM25 and vector scores, a
+        preview, and the stored feedback (None when not in the local store)"""
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        self.searches[mode] += 1
+        candidates = max(top_k, settings.SEARCH_CANDIDATES)
+        rankings = []
+        
+        lexical: Dict[str, float] = {}
+        if mode in ("hybrid", "lexical"):
+            with stage_timer("search_lexical"):
+                await self.analysis_store.sync_lexical_index()
+                lexical = dict(await run_in_threadpool(self.analysis_store.lexical.search, query, candidates))
+            rankings.append(list(lexical))
+        
+        vector: Dict[str, Dict[str, Any]] = {}
+        if mode in ("hybrid", "vector") and self.vector_service:
+            with stage_timer("search_vector"):
+                matches = await self.vector_service.find_similar_resumes(query, top_k=candidates)
+            vector = {match["id"]: match for match in matches}
+            rankings.append(list(vector))
+        
+        fused = reciprocal_rank_fusion(rankings, settings.SEARCH_RRF_K)[:top_k]
+        feedback = await self.analysis_store.get_feedback_many([item_id for item_id, _ in fused])
+        
+        hits = []
+        for item_id, score in fused:
+            if item_id not in feedback and item_id not in vector:
+                # Deleted by another worker since this one indexed it
+                self.analysis_store.lexical.remove(item_id)
+                continue
+            hits.append(self._hit(item_id, score, lexical.get(item_id), vector.get(item_id), feedback.get(item_id)))
+        return hits
+    
+    def _hit(self, item_id: str, score: float, lexical_score: Optional[float],
+             match: Optional[Dict[str, Any]], feedback: Optional[ResumeFeedback]) -> Dict[str, Any]:
+        if match is not None:
+            preview = match["content_preview"]
+        else:
+            preview = (self.analysis_store.lexical.preview(item_id) or "") + "..."
+        return {
+            "id": item_id,
+            "score": score,
+            "lexical_score": lexical_score,
+            "similarity_score": match["similarity_score"] if match else None,
+            "content_preview": preview,
+            "overall_score": match["overall_score"] if match else None,
+            "feedback": feedback
+        }
+    
+    def get_stats(self) -> dict:
+        return {
+            "searches": dict(self.searches),
+            "lexical_index": self.analysis_store.lexical.get_stats()
+        }
@@ -0,0 +1,239 @@
+from app.core.shared_memory import FileLock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import math
+import os
+import threading
+
+StatRow = Tuple[float, float, Optional[str]]  # overall_score, processing_time, industry
+
+class QuantileSketch:
+    """Relative-error quantile sketch (DDSketch-style log buckets).
+    
+    Values are bucketed by ceil(log_gamma(x)), so any quantile is reported within
+    ``relative_accuracy`` of the true value using a bounded number of buckets,
+    no matter how many values were added.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-6):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+    
+    def add(self, value: float):
+        self._update(value, 1)
+    
+    def remove(self, value: float):
+        self._update(value, -1)
+    
+    def quantile(self, q: float) -> float:
+        if self.count <= 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+                return 2 * self.gamma ** index / (1 + self.gamma)
+        return 2 * self.gamma ** max(self.buckets) / (1 + self.gamma)
+    
+    def to_state(self) -> dict:
+        return {"buckets": self.buckets, "zero_count": self.zero_count, "count": self.count}
+    
+    def load_state(self, state: dict):
+        self.buckets = {int(index): count for index, count in state["buckets"].items()}
+        self.zero_count = state["zero_count"]
+        self.count = state["count"]
+    
+    def _update(self, value: float, delta: int):
+        self.count += delta
+        if value <= self.min_value:
+            self.zero_count += delta
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        remaining = self.buckets.get(index, 0) + delta
+        if remaining > 0:
+            self.buckets[index] = remaining
+        else:
+            self.buckets.pop(index, None)
+
+class HeavyHitters:
+    """Approximate top-k counter using the Space-Saving algorithm.
+    
+    Keeps at most ``capacity`` counters; any item whose true frequency exceeds
+    total/capacity is guaranteed to be tracked.
+    """
+    
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+    
+    def add(self, item: str):
+        if item in self.counts or len(self.counts) < self.capacity:
+            self.counts[item] = self.counts.get(item, 0) + 1
+            return
+        # Evict the smallest counter; the newcomer inherits its count as error bound
+        victim = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(victim)
+        self.counts[item] = floor + 1
+    
+    def remove(self, item: str):
+        if item in self.counts:
+            self.counts[item] -= 1
+            if self.counts[item] <= 0:
+                del self.counts[item]
+    
+    def top(self, n: int) -> List[str]:
+        return sorted(self.counts, key=self.counts.get, reverse=True)[:n]
+    
+    def to_state(self) -> dict:
+        return dict(self.counts)
+    
+    def load_state(self, state: dict):
+        self.counts = dict(state)
+
+def industry_key(industry: Optional[str]) -> Optional[str]:
+    """Free-text industry as counted: "Tech", "tech" and " tech " are one industry"""
+    return " ".join(industry.split()).lower() if industry else None
+
+class AnalysisStats:
+    """Running aggregates over stored analyses, updated on every write and delete"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+    
+    def _clear(self):
+        self.total = 0
+        self.score_sum = 0.0
+        self.processing_time_sum = 0.0
+        self.processing_times = QuantileSketch()
+        self.industries = HeavyHitters()
+    
+    def record(self, overall_score: float, processing_time: float, industry: Optional[str]):
+        with self._lock:
+            self.total += 1
+            self.score_sum += overall_score
+            self.processing_time_sum += processing_time
+            self.processing_times.add(processing_time)
+            industry = industry_key(industry)
+            if industry:
+                self.industries.add(industry)
+    
+    def discard(self, overall_score: float, processing_time: float, industry: Optional[str]):
+        with self._lock:
+            self.total -= 1
+            self.score_sum -= overall_score
+            self.processing_time_sum -= processing_time
+            self.processing_times.remove(processing_time)
+            industry = industry_key(industry)
+            if industry:
+                self.industries.remove(industry)
+    
+    def reset(self):
+        with self._lock:
+            self._clear()
+    
+    def rebuild(self, rows: Callable[[], Iterable[StatRow]]):
+        """Replace the aggregates with ones computed from ``rows`` (the full history)"""
+        self.reset()
+        for overall_score, processing_time, industry in rows():
+            self.record(overall_score, processing_time, industry)
+    
+    def snapshot(self, top_n: int = 4) -> dict:
+        with self._lock:
+            total = self.total
+            return {
+                "total_analyses": total,
+                "average_score": round(self.score_sum / total, 1) if total else 0.0,
+                "processing_time_avg": round(self.processing_time_sum / total, 2) if total else 0.0,
+                "processing_time_p50": round(self.processing_times.quantile(0.50), 3),
+                "processing_time_p95": round(self.processing_times.quantile(0.95), 3),
+                "processing_time_p99": round(self.processing_times.quantile(0.99), 3),
+                "top_industries": self.industries.top(top_n)
+            }
+    
+    def to_state(self) -> dict:
+        return {
+            "total": self.total,
+            "score_sum": self.score_sum,
+            "processing_time_sum": self.processing_time_sum,
+            "processing_times": self.processing_times.to_state(),
+            "industries": self.industries.to_state()
+        }
+    
+    def load_state(self, state: dict):
+        self.total = state["total"]
+        self.score_sum = state["score_sum"]
+        self.processing_time_sum = state["processing_time_sum"]
+        self.processing_times.load_state(state["processing_times"])
+        self.industries.load_state(state["industries"])
+
+class SharedAnalysisStats(AnalysisStats):
+    """AnalysisStats kept in a file (on tmpfs under serve.py) that every worker
+    process reads and updates under a file lock, so /stats reflects the writes of
+    all workers instead of just the one answering.
+    
+    Each operation loads the current state, applies the change and writes it
+    back; the state is a few KB, and writes happen once per stored analysis.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.file_lock = FileLock(path + ".lock")
+        super().__init__()
+    
+    def record(self, overall_score: float, processing_time: float, industry: Optional[str]):
+        with self.file_lock:
+            self._load()
+            super().record(overall_score, processing_time, industry)
+            self._store()
+    
+    def discard(self, overall_score: float, processing_time: float, industry: Optional[str]):
+        with self.file_lock:
+            self._load()
+            super().discard(overall_score, processing_time, industry)
+            self._store()
+    
+    def reset(self):
+        with self.file_lock:
+            super().reset()
+            self._store()
+    
+    def rebuild(self, rows: Callable[[], Iterable[StatRow]]):
+        """Recompute from history, replacing whatever the file holds (a previous run's
+        aggregates would double-count). Runs once, before the workers start writing."""
+        with self.file_lock:
+            AnalysisStats.reset(self)
+            for overall_score, processing_time, industry in rows():
+                AnalysisStats.record(self, overall_score, processing_time, industry)
+            self._store()
+    
+    def snapshot(self, top_n: int = 4) -> dict:
+        with self.file_lock:
+            self._load()
+            return super().snapshot(top_n)
+    
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            AnalysisStats.reset(self)
+            return
+        with self._lock:
+            self.load_state(state)
+    
+    def _store(self):
+        with self._lock:
+            state = self.to_state()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,98 @@
+# Plain-text extraction from uploaded resume files. Kept free of app imports so
+# process-pool workers start quickly: everything here is a pure function of the bytes.
+from typing import Optional
+from xml.etree import ElementTree
+import io
+import pypdf
+import zipfile
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT_EXTENSIONS = (".txt", ".text", ".md")
+
+# A resume's document.xml is tiny; anything this large is a zip bomb or not a resume
+MAX_DOCX_XML_BYTES = 50 * 1024 * 1024
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def detect_kind(filename: Optional[str], content_type: Optional[str], head: bytes) -> Optional[str]:
+    """pdf, docx or txt from the file's magic bytes and name; None when unsupported"""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04") and (name.endswith(".docx") or content_type == DOCX_MIME):
+        return "docx"
+    if name.endswith(TEXT_EXTENSIONS) or content_type.startswith("text/"):
+        return "txt"
+    return None
+
+def extract_text(data: bytes, kind: str) -> str:
+    """Extract text from file bytes; raises ValueError when the file cannot be read"""
+    if kind == "pdf":
+        text = extract_pdf(data)
+    elif kind == "docx":
+        text = extract_docx(data)
+    elif kind == "txt":
+        text = decode_text(data)
+    else:
+        raise ValueError(f"Unsupported file type: {kind}")
+    return clean_text(text)
+
+def clean_text(text: str) -> str:
+    """Collapse runs of spaces and blank lines left over from layout"""
+    lines = [" ".join(line.split()) for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    cleaned = []
+    for line in lines:
+        if line or (cleaned and cleaned[-1]):
+            cleaned.append(line)
+    return "\n".join(cleaned).strip()
+
+def decode_text(data: bytes) -> str:
+    if b"\x00" in data[:4096] and not data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        raise ValueError("File looks binary, not text")
+    for encoding in ("utf-8-sig", "utf-16"):
+        try:
+            if encoding == "utf-16" and not data.startswith((b"\xff\xfe", b"\xfe\xff")):
+                continue
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+    return data.decode("cp1252", errors="replace")
+
+def extract_docx(data: bytes) -> str:
+    """Paragraph text from word/document.xml, using only the standard library"""
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            info = archive.getinfo("word/document.xml")
+            if info.file_size > MAX_DOCX_XML_BYTES:
+                raise ValueError("DOCX document body is too large")
+            root = ElementTree.fromstring(archive.read(info))
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+        raise ValueError(f"Not a readable DOCX file: {e}")
+    
+    paragraphs = []
+    for paragraph in root.iter(WORD_NS + "p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == WORD_NS + "t":
+                parts.append(node.text or "")
+            elif node.tag == WORD_NS + "tab":
+                parts.append(" ")
+            elif node.tag in (WORD_NS + "br", WORD_NS + "cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+def extract_pdf(data: bytes) -> str:
+    """Text from a PDF via pypdf, which maps embedded-font glyph ids (the
+    Identity-H fonts Word and Google Docs write) back to Unicode. pypdf caps how
+    far each stream may inflate. Scanned PDFs have no text layer and need OCR."""
+    try:
+        reader = pypdf.PdfReader(io.BytesIO(data))
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise ValueError("PDF is password-protected")
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    except ValueError:
+        raise
+    except Exception as e:  # pypdf raises assorted errors on damaged files
+        raise ValueError(f"Not a readable PDF file: {e}")
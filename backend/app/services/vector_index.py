@@ -0,0 +1,387 @@
+from app.core.shared_memory import FileLock
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import numpy as np
+import os
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class VectorIndex:
+    """In-process cosine-similarity index over a contiguous float32 matrix.
+    
+    Vectors are L2-normalized on insert so a query is a single matrix-vector
+    product followed by an argpartition top-k. Rows stay contiguous: deleting a
+    row moves the last row into its slot.
+    
+    With a ``path`` the matrix lives in a memory-mapped file and id/metadata
+    changes are appended to a JSON-lines log that is replayed on load and
+    compacted by ``save()``. Several processes (serve.py workers) can open the
+    same path: writes take a file lock and first replay what the others appended,
+    so row numbers stay consistent, and queries pick up the others' writes. In
+    ``ivf`` mode the rows are clustered with k-means and a query only scores the
+    ``nprobe`` closest clusters.
+    """
+    
+    IVF_MIN_TRAIN_SIZE = 1024  # Below this an exact scan is already fast
+    
+    def __init__(self, dimension: int, path: Optional[str] = None, mode: str = "exact",
+                 nprobe: int = 8, initial_capacity: int = 1024):
+        if mode not in ("exact", "ivf"):
+            raise ValueError(f"Unknown vector index mode: {mode}")
+        self.dimension = dimension
+        self.path = path
+        self.mode = mode
+        self.nprobe = nprobe
+        self.count = 0
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+        self.centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self.version = 0  # Bumped on every change, including ones made by other processes
+        self._lock = threading.RLock()
+        self._log = None
+        self._log_epoch: Optional[bytes] = None  # First line of the log, new on every compaction
+        self._log_position = 0  # Bytes of the log already applied
+        self._log_signature: Optional[Tuple[int, int, int]] = None
+        self._file_lock = None
+        
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._log_path = os.path.join(path, "log.jsonl")
+            self._file_lock = FileLock(os.path.join(path, "index.lock"))
+            self._load(initial_capacity)
+        else:
+            self._vectors = np.zeros((initial_capacity, dimension), dtype=np.float32)
+            self._assignments = np.full(initial_capacity, -1, dtype=np.int32)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def upsert(self, items: List[Tuple[str, List[float], Dict[str, Any]]]):
+        """Insert or replace (id, vector, metadata) items"""
+        if not items:
+            return
+        vectors = self._normalize(np.asarray([vector for _, vector, _ in items], dtype=np.float32))
+        
+        with self._lock, self._exclusive():
+            self._sync()
+            for (item_id, _, metadata), vector in zip(items, vectors):
+                row = self.rows.get(item_id)
+                if row is None:
+                    self._ensure_capacity(self.count + 1)
+                    row = self.count
+                    self.count += 1
+                    self.ids.append(item_id)
+                    self.rows[item_id] = row
+                self._vectors[row] = vector
+                self.metadata[item_id] = metadata
+                if self.centroids is not None:
+                    self._assignments[row] = int(np.argmax(self.centroids @ vector))
+                self._append_log({"op": "upsert", "id": item_id, "metadata": metadata})
+            self.version += 1
+            
+            if self.mode == "ivf" and self._needs_training():
+                self._train()
+    
+    def delete(self, ids: List[str]):
+        with self._lock, self._exclusive():
+            self._sync()
+            for item_id in ids:
+                row = self.rows.pop(item_id, None)
+                if row is None:
+                    continue
+                self.metadata.pop(item_id, None)
+                last = self.count - 1
+                if row != last:
+                    moved_id = self.ids[last]
+                    self._vectors[row] = self._vectors[last]
+                    self._assignments[row] = self._assignments[last]
+                    self.ids[row] = moved_id
+                    self.rows[moved_id] = row
+                self.ids.pop()
+                self.count -= 1
+                self._append_log({"op": "delete", "id": item_id})
+                self.version += 1
+    
+    def stale(self) -> bool:
+        """Whether another process has written since this one last looked (one stat call)"""
+        return bool(self.path) and self._stat_log() != self._log_signature
+    
+    def refresh(self):
+        """Apply the writes of other processes sharing the path"""
+        with self._lock:
+            if self.stale():
+                with self._exclusive():
+                    self._sync()
+    
+    def fetch(self, ids: List[str]) -> Dict[str, Tuple[np.ndarray, Dict[str, Any]]]:
+        """Return stored (unit) vectors and metadata for the ids that exist"""
+        with self._lock:
+            self.refresh()
+            return {
+                item_id: (self._vectors[self.rows[item_id]].copy(), self.metadata[item_id])
+                for item_id in ids if item_id in self.rows
+            }
+    
+    def query(self, vector: List[float], top_k: int = 5,
+              exclude: Optional[List[str]] = None) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Return up to top_k (id, cosine similarity, metadata), best first"""
+        query = self._normalize(np.asarray(vector, dtype=np.float32)[None, :])[0]
+        excluded = set(exclude or ())
+        
+        with self._lock:
+            self.refresh()
+            if self.count == 0:
+                return []
+            candidates = self._candidate_rows(query)
+            if candidates is None:
+                scores = self._vectors[:self.count] @ query
+            else:
+                scores = self._vectors[candidates] @ query
+            
+            k = min(top_k + len(excluded), len(scores))
+            if k <= 0:
+                return []
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            
+            results = []
+            for position in best:
+                row = int(position if candidates is None else candidates[position])
+                item_id = self.ids[row]
+                if item_id in excluded:
+                    continue
+                results.append((item_id, float(scores[position]), self.metadata[item_id]))
+                if len(results) == top_k:
+                    break
+            return results
+    
+    def save(self):
+        """Flush the mapped matrix and compact the log into a snapshot"""
+        if not self.path:
+            return
+        with self._lock, self._exclusive():
+            self._sync()
+            self._vectors.flush()
+            snapshot = f"{self._log_path}.{os.getpid()}.tmp"
+            with open(snapshot, "w") as f:
+                f.write(self._epoch_line())
+                for item_id in self.ids:
+                    f.write(json.dumps({"op": "upsert", "id": item_id, "metadata": self.metadata[item_id]}) + "\n")
+            if self._log:
+                self._log.close()
+            # Other processes see the new epoch line and replay the snapshot from the start
+            os.replace(snapshot, self._log_path)
+            self._open_log()
+            
+            if self.centroids is not None:
+                np.save(os.path.join(self.path, "centroids.npy"), self.centroids)
+                np.save(os.path.join(self.path, "assignments.npy"), self._assignments[:self.count])
+    
+    def close(self):
+        self.save()
+        if self._log:
+            self._log.close()
+            self._log = None
+    
+    def _candidate_rows(self, query: np.ndarray) -> Optional[np.ndarray]:
+        """Rows in the nprobe clusters nearest the query, or None for an exact scan"""
+        if self.centroids is None:
+            return None
+        probe = np.argsort(-(self.centroids @ query))[:self.nprobe]
+        return np.flatnonzero(np.isin(self._assignments[:self.count], probe))
+    
+    def _needs_training(self) -> bool:
+        # Retrain whenever the index has doubled since the last k-means run
+        return self.count >= self.IVF_MIN_TRAIN_SIZE and self.count >= 2 * self._trained_size
+    
+    def _train(self, iterations: int = 10, sample_size: int = 20000):
+        """Spherical k-means over a sample, then assign every row to its nearest centroid"""
+        data = self._vectors[:self.count]
+        nlist = max(1, int(np.sqrt(self.count)))
+        rng = np.random.default_rng(0)
+        sample = data[rng.choice(self.count, size=min(sample_size, self.count), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = sample[labels == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+        
+        self.centroids = centroids
+        for start in range(0, self.count, 8192):
+            chunk = data[start:start + 8192]
+            self._assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        self._trained_size = self.count
+        logger.info(f"Trained IVF vector index with {nlist} lists over {self.count} vectors")
+    
+    def _assign(self, rows: Iterable[int]):
+        """Assign rows written by another process to their nearest centroid"""
+        rows = np.fromiter(rows, dtype=np.int64)
+        for start in range(0, len(rows), 8192):
+            chunk = rows[start:start + 8192]
+            self._assignments[chunk] = np.argmax(self._vectors[chunk] @ self.centroids.T, axis=1)
+    
+    def _ensure_capacity(self, size: int):
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        assignments = np.full(new_capacity, -1, dtype=np.int32)
+        assignments[:capacity] = self._assignments
+        self._assignments = assignments
+        
+        if self.path:
+            self._vectors.flush()
+            del self._vectors
+            self._vectors = self._map_vectors(new_capacity)
+        else:
+            vectors = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+            vectors[:capacity] = self._vectors
+            self._vectors = vectors
+    
+    def _map_vectors(self, capacity: int) -> np.memmap:
+        vectors_path = os.path.join(self.path, "vectors.f32")
+        required = capacity * self.dimension * 4
+        with open(vectors_path, "ab") as f:
+            if f.tell() < required:
+                f.truncate(required)
+        return np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+    
+    def _load(self, initial_capacity: int):
+        with self._exclusive():
+            with open(self._log_path, "a") as f:
+                if f.tell() == 0:
+                    f.write(self._epoch_line())
+            # Vector rows already reflect the final state on disk; only ids and metadata are replayed
+            self._replay_log()
+            self.count = len(self.ids)
+            
+            vectors_path = os.path.join(self.path, "vectors.f32")
+            existing_rows = os.path.getsize(vectors_path) // (self.dimension * 4) if os.path.exists(vectors_path) else 0
+            capacity = max(initial_capacity, existing_rows, self.count)
+            self._vectors = self._map_vectors(capacity)
+            self._assignments = np.full(capacity, -1, dtype=np.int32)
+            
+            if self.mode == "ivf":
+                centroids_path = os.path.join(self.path, "centroids.npy")
+                assignments_path = os.path.join(self.path, "assignments.npy")
+                if os.path.exists(centroids_path) and os.path.exists(assignments_path):
+                    assignments = np.load(assignments_path)
+                    if len(assignments) == self.count:
+                        self.centroids = np.load(centroids_path)
+                        self._assignments[:self.count] = assignments
+                        self._trained_size = self.count
+                if self.centroids is None and self.count >= self.IVF_MIN_TRAIN_SIZE:
+                    self._train()
+            
+            with open(self._log_path, "ab") as f:
+                if f.tell() > self._log_position:
+                    f.write(b"\n")  # Terminate a torn final write so appends start on a fresh line
+            self._open_log()
+    
+    def _sync(self):
+        """Replay what other processes appended to the log; the caller holds both locks"""
+        if not self.path:
+            return
+        epoch = self._log_epoch
+        touched = self._replay_log()
+        if self._log_epoch != epoch and self._log:
+            # Compacted by another process; our handle still points at the replaced file
+            self._log.close()
+            self._open_log()
+        if not touched:
+            return
+        self.count = len(self.ids)
+        self._ensure_capacity(self.count)  # Remap if another process grew the file
+        if self.centroids is not None:
+            self._assign(row for row in touched if row < self.count)
+        self.version += 1
+    
+    def _replay_log(self) -> set:
+        """Apply log entries past the last applied position; returns the rows they changed"""
+        try:
+            f = open(self._log_path, "rb")
+        except FileNotFoundError:
+            return set()
+        with f:
+            epoch = f.readline()
+            reloaded = epoch != self._log_epoch
+            if reloaded:
+                # First load, or another process compacted the log: rebuild from the start
+                self.ids, self.rows, self.metadata = [], {}, {}
+                self._log_epoch, self._log_position = epoch, 0
+            f.seek(self._log_position)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1  # A torn final write (crash) is left unapplied
+        self._log_position += complete
+        self._log_signature = self._stat_log()
+        
+        touched = set()
+        for line in data[:complete].splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            item_id = entry["id"]
+            if entry["op"] == "upsert":
+                if item_id not in self.rows:
+                    self.rows[item_id] = len(self.ids)
+                    self.ids.append(item_id)
+                self.metadata[item_id] = entry["metadata"]
+                touched.add(self.rows[item_id])
+            elif entry["op"] == "delete" and item_id in self.rows:
+                row = self.rows.pop(item_id)
+                self.metadata.pop(item_id, None)
+                moved_id = self.ids.pop()
+                if moved_id != item_id:
+                    self.ids[row] = moved_id
+                    self.rows[moved_id] = row
+                    touched.add(row)
+        return set(range(len(self.ids))) if reloaded else touched
+    
+    def _open_log(self):
+        self._log = open(self._log_path, "ab")
+        self._log_position = os.fstat(self._log.fileno()).st_size
+        self._log_signature = self._stat_log()
+        self._log_epoch = self._read_epoch()
+    
+    def _append_log(self, entry: Dict[str, Any]):
+        if self._log:
+            self._log.write((json.dumps(entry) + "\n").encode("utf-8"))
+            self._log.flush()
+            # Writes hold the file lock after a sync, so the log ends with this entry
+            self._log_position = self._log.tell()
+            self._log_signature = self._stat_log()
+    
+    def _stat_log(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self._log_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+    
+    def _read_epoch(self) -> bytes:
+        with open(self._log_path, "rb") as f:
+            return f.readline()
+    
+    @staticmethod
+    def _epoch_line() -> str:
+        return json.dumps({"op": "epoch", "id": uuid.uuid4().hex}) + "\n"
+    
+    def _exclusive(self):
+        return self._file_lock if self._file_lock is not None else nullcontext()
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
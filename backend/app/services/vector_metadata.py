@@ -0,0 +1,23 @@
+from app.services.feedback_schema import SCORE_FIELDS
+from typing import Any, Dict
+
+PREVIEW_CHARS = 200
+
+def compact_metadata(resume_id: str, content: str, feedback: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata stored with each resume vector: the id, the scores (usable as
+    query filters, e.g. overall_score >= 80) and a short preview. The full
+    feedback stays in the analysis store and is fetched only for returned matches."""
+    return {"resume_id": resume_id, "preview": content[:PREVIEW_CHARS], **score_metadata(feedback)}
+
+def score_metadata(feedback: Dict[str, Any]) -> Dict[str, float]:
+    return {field: float(feedback[field]) for field in SCORE_FIELDS if field in feedback}
+
+def format_match(match_id: str, score: float, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    # Vectors written before the compact schema carry 1000 chars of content instead of a preview
+    preview = metadata.get("preview") or metadata.get("content", "")[:PREVIEW_CHARS]
+    return {
+        "id": match_id,
+        "similarity_score": score,
+        "content_preview": preview + "...",
+        "overall_score": metadata.get("overall_score")
+    }
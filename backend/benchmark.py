@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the AI Resume Grader API
+
+Boots the FastAPI app in-process with a fake OpenAI client (configurable latency
+and error rate) and the local vector index in place of Pinecone, then drives
+/analyze, /analyze/batch, /similar and /search at a given concurrency and reports
+throughput and p50/p95/p99 latency. Needs no network or API keys.
+
+    python benchmark.py --requests 500 --concurrency 50 --llm-latency-ms 300
+    python benchmark.py --json results.json --max-p95-ms 800   # CI gate
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from urllib.parse import quote
+
+# The app reads its settings at import time, so configure it before importing it
+_workdir = tempfile.mkdtemp(prefix="resume-grader-bench-")
+os.environ.update({
+    "OPENAI_API_KEY": "benchmark",
+    "PINECONE_API_KEY": "benchmark",
+    "PINECONE_ENVIRONMENT": "benchmark",
+    "VECTOR_BACKEND": "local",
+    "LOCAL_VECTOR_INDEX_PATH": "",  # In-memory index
+    "DATABASE_URL": f"sqlite:///{os.path.join(_workdir, 'benchmark.db')}",
+    "REDIS_URL": "",
+})
+
+import httpx
+import openai
+
+SKILLS = [
+    "python", "javascript", "react", "node", "java", "sql", "aws", "docker", "kubernetes", "git",
+    "agile", "scrum", "terraform", "postgresql", "redis", "kafka", "spark", "airflow", "go", "rust"
+]
+VERBS = ["Developed", "Implemented", "Led", "Designed", "Built", "Optimized", "Managed", "Created", "Improved"]
+OBJECTS = [
+    "a payment platform", "data pipelines", "the billing service", "a search API", "CI/CD workflows",
+    "a mobile backend", "internal tooling", "the analytics stack", "a recommendation engine"
+]
+
+FEEDBACK = {
+    "overall_score": 78, "technical_clarity": 80, "impact_phrasing": 72, "structure_format": 81,
+    "industry_alignment": 76,
+    "suggestions": ["Quantify the impact of each project", "Move skills above education"],
+    "strengths": ["Strong technical stack", "Clear progression"],
+    "areas_for_improvement": ["Summary is generic"],
+    "keyword_analysis": {"relevant_keywords": ["python", "aws"], "missing_keywords": ["kubernetes"], "keyword_density": 0.12}
+}
+
+def make_resume(rng: random.Random, index: int) -> dict:
+    """A realistic-length resume that is unique per index"""
+    lines = [f"Candidate {index}", "SUMMARY", f"Engineer with {rng.randint(2, 15)} years of experience.", "EXPERIENCE"]
+    for _ in range(rng.randint(8, 14)):
+        lines.append(
+            f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)} and {rng.choice(SKILLS)}, "
+            f"improving throughput by {rng.randint(5, 80)}% for {rng.randint(2, 90)} teams"
+        )
+    lines += ["EDUCATION", f"BSc Computer Science, class of {rng.randint(1995, 2022)}",
+              "SKILLS", ", ".join(rng.sample(SKILLS, 8))]
+    return {
+        "content": "\n".join(lines),
+        "job_title": rng.choice(["Software Engineer", "Data Engineer", "Backend Engineer"]),
+        "industry": "Technology",
+        "experience_level": rng.choice(["entry", "mid", "senior"])
+    }
+
+class FakeOpenAI:
+    """Stand-in for openai.AsyncOpenAI covering the calls the app makes"""
+    
+    def __init__(self, latency_ms: float, sigma: float, error_rate: float, embedding_latency_ms: float,
+                 dimension: int, seed: int):
+        self.latency = latency_ms / 1000
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.embedding_latency = embedding_latency_ms / 1000
+        self.dimension = dimension
+        self.rng = random.Random(seed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+        self.embeddings = SimpleNamespace(create=self._embed)
+        self.calls = {"chat": 0, "embeddings": 0, "errors": 0}
+    
+    def with_options(self, **kwargs):
+        return self
+    
+    async def close(self):
+        pass
+    
+    async def _sleep(self, median: float):
+        if median > 0:
+            # Log-normal around the median, like real API latency
+            await asyncio.sleep(self.rng.lognormvariate(math.log(median), self.sigma))
+    
+    async def _complete(self, **kwargs):
+        self.calls["chat"] += 1
+        await self._sleep(self.latency)
+        if self.rng.random() < self.error_rate:
+            self.calls["errors"] += 1
+            request = httpx.Request("POST", "https://fake.openai/v1/chat/completions")
+            raise openai.InternalServerError("fake upstream error", response=httpx.Response(500, request=request), body=None)
+        
+        arguments = json.dumps(FEEDBACK)
+        if kwargs.get("tools"):
+            message = SimpleNamespace(content=None, tool_calls=[SimpleNamespace(function=SimpleNamespace(arguments=arguments))])
+        else:
+            message = SimpleNamespace(content=arguments, tool_calls=None)
+        usage = SimpleNamespace(prompt_tokens=len(kwargs["messages"][-1]["content"]) // 4, completion_tokens=len(arguments) // 4)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+    
+    async def _embed(self, model: str, input: list):
+        self.calls["embeddings"] += 1
+        await self._sleep(self.embedding_latency)
+        import numpy as np
+        data = []
+        for i, text in enumerate(input):
+            # Deterministic per text so identical resumes embed identically
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+            data.append(SimpleNamespace(index=i, embedding=vector.tolist()))
+        return SimpleNamespace(data=data)
+
+def percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def run_scenario(name: str, client: httpx.AsyncClient, requests: list, concurrency: int) -> dict:
+    """Send (method, url, json) requests with at most ``concurrency`` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    responses = []
+    
+    async def send(method: str, url: str, body):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                if response.status_code >= 400:
+                    errors += 1
+                else:
+                    responses.append(response.json())
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(send(*request) for request in requests))
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "scenario": name,
+        "requests": len(requests),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(requests) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "_responses": responses
+    }
+
+async def benchmark(args) -> list:
+    from app.core.config import settings
+    from app.services import openai_client
+    
+    fake = FakeOpenAI(args.llm_latency_ms, args.latency_sigma, args.error_rate,
+                      args.embedding_latency_ms, settings.VECTOR_DIMENSION, args.seed)
+    openai_client._client = fake  # Every service gets its client from here
+    
+    from app.main import app
+    from app.services.container import services
+    
+    rng = random.Random(args.seed)
+    unique = max(1, int(args.requests * (1 - args.duplicate_ratio)))
+    resumes = [make_resume(rng, i) for i in range(unique)]
+    submissions = [resumes[i] if i < unique else rng.choice(resumes) for i in range(args.requests)]
+    
+    results = []
+    # httpx's ASGI transport does not send lifespan events, so run startup/shutdown here
+    async with app.router.lifespan_context(app):
+        if not await services.wait_ready():
+            raise RuntimeError(f"Startup failed: {services.error}")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+            analyze = await run_scenario(
+                "analyze", client,
+                [("POST", "/api/v1/analyze", submission) for submission in submissions],
+                args.concurrency
+            )
+            results.append(analyze)
+            
+            if args.batch_size:
+                batches = [
+                    {"submissions": [make_resume(rng, unique + b * args.batch_size + i) for i in range(args.batch_size)]}
+                    for b in range(args.batches)
+                ]
+                results.append(await run_scenario(
+                    "batch", client,
+                    [("POST", "/api/v1/analyze/batch", batch) for batch in batches],
+                    max(1, args.concurrency // args.batch_size)
+                ))
+            
+            # Let the write-behind indexer catch up so /similar hits indexed vectors
+            deadline = time.monotonic() + 30
+            while services.indexer and services.indexer.get_stats()["pending"] and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            
+            ids = [analysis["id"] for analysis in analyze["_responses"]]
+            if ids:
+                results.append(await run_scenario(
+                    "similar", client,
+                    [("GET", f"/api/v1/similar/{rng.choice(ids)}", None) for _ in range(args.similar_requests)],
+                    args.concurrency
+                ))
+            
+            # Keyword-only search (no API call), then hybrid search (one embedding per query)
+            for mode in ("lexical", "hybrid"):
+                queries = [" ".join(rng.sample(SKILLS, 2)) for _ in range(args.search_requests)]
+                results.append(await run_scenario(
+                    "search" if mode == "lexical" else "hybrid", client,
+                    [("GET", f"/api/v1/search?mode={mode}&q={quote(query)}", None) for query in queries],
+                    args.concurrency
+                ))
+            
+            stats = (await client.get("/api/v1/stats")).json()
+            readiness = (await client.get("/ready")).json()
+    
+    for result in results:
+        result.pop("_responses")
+    results.append({"scenario": "startup", **{k: v for k, v in readiness.items() if k != "status"}})
+    results.append({"scenario": "backend_calls", **fake.calls,
+                    "analysis_cache_hits": stats["cache"]["hits"],
+                    "prescreen_llm_calls_saved": stats["prescreen"]["llm_calls_saved"]})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark with fake OpenAI and vector backends")
+    parser.add_argument("--requests", type=int, default=200, help="/analyze requests to send")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight at once")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2, help="Fraction of /analyze requests repeating an earlier resume")
+    parser.add_argument("--batch-size", type=int, default=10, help="Resumes per /analyze/batch request (0 skips batches)")
+    parser.add_argument("--batches", type=int, default=10, help="/analyze/batch requests to send")
+    parser.add_argument("--similar-requests", type=int, default=200, help="/similar requests to send")
+    parser.add_argument("--search-requests", type=int, default=200, help="/search requests to send per mode")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Median fake completion latency")
+    parser.add_argument("--embedding-latency-ms", type=float, default=30.0, help="Median fake embedding latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="Log-normal spread of fake latencies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of completions failing with a 500")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--max-p95-ms", type=float, help="Exit non-zero if any scenario's p95 exceeds this")
+    args = parser.parse_args()
+    
+    results = asyncio.run(benchmark(args))
+    scenarios = [result for result in results if "p95_ms" in result]
+    startup, backend_calls = results[-2:]
+    
+    print("📊 Benchmark results")
+    print("=" * 78)
+    print(f"{'scenario':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for result in scenarios:
+        print(f"{result['scenario']:<10}{result['requests']:>10}{result['errors']:>8}{result['throughput_rps']:>10}"
+              f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}")
+    print(f"\nStartup: import {startup['import_seconds']}s + warmup {startup['warmup_seconds']}s {startup['warmup_steps']}")
+    print(f"Backend calls: {backend_calls}")
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    
+    failed = any(result["errors"] for result in scenarios)
+    if args.max_p95_ms is not None:
+        slow = [r["scenario"] for r in scenarios if r["p95_ms"] > args.max_p95_ms]
+        if slow:
+            print(f"❌ p95 above {args.max_p95_ms} ms: {', '.join(slow)}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Production entry point for the AI Resume Grader API
+
+Pre-loads the app and its service modules once, binds the listening socket, then
+forks SERVER_WORKERS uvicorn workers that share both. Workers inherit the loaded
+code, keyword dictionaries and models copy-on-write. They share the embedding
+cache and /stats aggregates through files in SHARED_MEMORY_DIR (tmpfs), the local
+vector index through its lock-protected files, and the status of background jobs
+through the database.
+
+Each worker keeps its own analysis cache (unless REDIS_URL is set), pre-screen
+memory of recent resumes and job queue: a background job runs in the worker that
+accepted it, and polls reaching another worker read its stored status.
+
+SIGTERM or SIGINT stops the workers gracefully: they stop accepting, finish
+in-flight requests for up to SERVER_GRACEFUL_SHUTDOWN_SECONDS, run the app
+shutdown (job queue drain, index flush) and exit. Crashed workers are replaced.
+
+    python serve.py
+    SERVER_WORKERS=4 SERVER_PORT=8080 python serve.py
+"""
+
+import gc
+import importlib
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+
+import uvicorn
+
+from app.core.config import settings
+
+RESPAWN_BACKOFF_SECONDS = 1.0
+RESPAWN_BACKOFF_MAX_SECONDS = 30.0
+STABLE_WORKER_SECONDS = 10.0  # A worker that lived this long resets the crash backoff
+
+def worker_count() -> int:
+    return settings.SERVER_WORKERS or os.cpu_count() or 1
+
+def configure_shared_memory():
+    """Give the workers a private shared directory, emptied on every start"""
+    if settings.SHARED_MEMORY_DIR:
+        return
+    root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    settings.SHARED_MEMORY_DIR = os.path.join(root, f"resume-grader-{settings.SERVER_PORT}")
+    # Nothing from a previous run on the same port is reused
+    shutil.rmtree(settings.SHARED_MEMORY_DIR, ignore_errors=True)
+
+def preload():
+    """Import everything and build the database once, before forking"""
+    from app.main import app
+    from app.services.container import SERVICE_MODULES
+    for module in SERVICE_MODULES:
+        importlib.import_module(module)
+    # Creating tables, seeding the shared stats and failing jobs a previous run left
+    # unfinished happen here, once, so workers do not race on them; the keyword
+    # index built here is inherited by every worker
+    from app.core.database import engine
+    from app.services.analysis_store import analysis_store
+    analysis_store.init()
+    analysis_store.build_lexical_index()
+    engine.dispose()  # Connections must not be shared across the fork
+    # Keep the preloaded objects out of the collector so it does not touch
+    # (and un-share) their pages in the workers
+    gc.collect()
+    gc.freeze()
+    return app
+
+class Supervisor:
+    """Forks the workers, forwards shutdown signals and replaces crashed workers"""
+    
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.socket = config.bind_socket()
+        self.children = {}
+        self.stopping = False
+        self.backoff = RESPAWN_BACKOFF_SECONDS
+    
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGALRM, self._handle_kill)
+        for _ in range(self.workers):
+            self._spawn()
+        print(f"🚀 Serving on http://{self.config.host}:{self.config.port} with {self.workers} workers")
+        
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status) if hasattr(os, "waitstatus_to_exitcode") else status
+            print(f"⚠️  Worker {pid} exited with {code}, restarting")
+            if time.monotonic() - started >= STABLE_WORKER_SECONDS:
+                self.backoff = RESPAWN_BACKOFF_SECONDS
+            else:
+                time.sleep(self.backoff)
+                self.backoff = min(self.backoff * 2, RESPAWN_BACKOFF_MAX_SECONDS)
+            if not self.stopping:
+                self._spawn()
+        
+        signal.alarm(0)
+        self.socket.close()
+        print("👋 All workers stopped")
+        return 0
+    
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        self.children[pid] = time.monotonic()
+    
+    def _run_worker(self):
+        code = 0
+        try:
+            # Own process group, so a Ctrl+C in the terminal reaches only the
+            # supervisor, which then stops the workers itself
+            os.setpgid(0, 0)
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGALRM):
+                signal.signal(signum, signal.SIG_DFL)
+            uvicorn.Server(self.config).run(sockets=[self.socket])
+        except BaseException:
+            code = 1
+            import traceback
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    
+    def _handle_stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        print(f"🛑 Stopping {len(self.children)} workers (up to {self.config.timeout_graceful_shutdown:.0f}s for in-flight requests)")
+        self._signal_children(signal.SIGTERM)
+        # Workers also drain background jobs after the HTTP shutdown; give them a margin
+        signal.alarm(int(self.config.timeout_graceful_shutdown) + 10)
+    
+    def _handle_kill(self, signum, frame):
+        print(f"⏱️  Killing {len(self.children)} workers that did not stop in time")
+        self._signal_children(signal.SIGKILL)
+    
+    def _signal_children(self, signum: int):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+def main() -> int:
+    workers = worker_count()
+    if not hasattr(os, "fork"):
+        # No fork (Windows): uvicorn's own multiprocess mode, without preloading or shared caches
+        uvicorn.run(
+            "app.main:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            workers=workers,
+            timeout_graceful_shutdown=int(settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS)
+        )
+        return 0
+    
+    configure_shared_memory()
+    app = preload()
+    config = uvicorn.Config(
+        app,
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        timeout_graceful_shutdown=int(settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS),
+        log_level="info"
+    )
+    return Supervisor(config, workers).run()
+
+if __name__ == "__main__":
+    sys.exit(main())
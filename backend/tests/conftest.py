@@ -0,0 +1,14 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Settings requires these at import time; the unit tests never reach the APIs
+for name in ("OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT"):
+    os.environ.setdefault(name, "test")
+
+# The app's own database (used by the lifespan and route tests) lives in a scratch
+# directory rather than ./resume_grader.db
+_scratch = tempfile.mkdtemp(prefix="resume-grader-tests-")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch}/resume_grader.db")
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models import analysis_record  # noqa: F401  (registers the tables)
+from app.models.resume import AnalysisJob, ResumeAnalysis, ResumeSubmission
+from app.services.analysis_store import AnalysisStore
+from app.services.scoring_engine import scoring_engine
+
+def _store(path) -> AnalysisStore:
+    """A store on its own SQLite file; two stores on one file act like two workers"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    store = AnalysisStore(sessionmaker(bind=engine, expire_on_commit=False))
+    store.init()
+    store.build_lexical_index()
+    return store
+
+def _analysis(analysis_id: str, content: str, industry: str = "Technology") -> ResumeAnalysis:
+    submission = ResumeSubmission(content=content, job_title="Engineer", industry=industry)
+    return ResumeAnalysis(
+        id=analysis_id,
+        submission=submission,
+        feedback=scoring_engine.score(submission),
+        created_at=datetime.now(),
+        processing_time=1.5,
+        model_version="gpt-test"
+    )
+
+def test_saved_analyses_are_read_back_counted_and_searchable(tmp_path):
+    store = _store(tmp_path / "store.db")
+    first = _analysis("a", "Data engineer building kafka pipelines")
+    second = _analysis("b", "Nurse with intensive care experience", industry="Healthcare")
+    
+    async def run():
+        await store.save(first)
+        await store.save_many([second])
+        return (await store.get("a"), await store.get_many(["a", "b", "missing"]),
+                await store.get_feedback_many(["b"]), await store.get_stats())
+    
+    loaded, many, feedback, stats = asyncio.run(run())
+    
+    assert loaded == first
+    assert set(many) == {"a", "b"}
+    assert feedback == {"b": second.feedback}
+    assert stats["total_analyses"] == 2 and stats["processing_time_avg"] == 1.5
+    assert stats["top_industries"] == ["technology", "healthcare"]
+    assert [doc_id for doc_id, _ in store.lexical.search("kafka")] == ["a"]
+
+def test_delete_removes_the_row_its_stats_and_its_keywords(tmp_path):
+    store = _store(tmp_path / "store.db")
+    
+    async def run():
+        await store.save_many([_analysis("a", "kafka engineer"), _analysis("b", "spark engineer")])
+        deleted = await store.delete("a")
+        again = await store.delete("a")
+        return deleted, again, await store.get("a"), await store.get_stats()
+    
+    deleted, again, loaded, stats = asyncio.run(run())
+    
+    assert deleted and not again and loaded is None
+    assert stats["total_analyses"] == 1
+    assert store.lexical.search("kafka") == [] and "b" in store.lexical
+
+def test_another_worker_sees_history_and_new_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LEXICAL_SYNC_INTERVAL_SECONDS", 0.0)
+    path = tmp_path / "store.db"
+    writer = _store(path)
+    asyncio.run(writer.save(_analysis("old", "golang engineer")))
+    reader = _store(path)
+    asyncio.run(writer.save(_analysis("new", "golang developer")))
+    
+    asyncio.run(reader.sync_lexical_index())
+    
+    assert asyncio.run(reader.get_stats())["total_analyses"] == 1  # Seeded from history at init
+    assert {doc_id for doc_id, _ in reader.lexical.search("golang")} == {"old", "new"}
+
+def test_job_status_is_stored_and_unfinished_jobs_fail_on_restart(tmp_path):
+    path = tmp_path / "store.db"
+    store = _store(path)
+    job = AnalysisJob(id="job", status="running", created_at=datetime.now(), started_at=datetime.now())
+    asyncio.run(store.save_job(job))
+    assert asyncio.run(store.get_job("job")) == job
+    
+    restarted = _store(path)
+    failed = asyncio.run(restarted.get_job("job"))
+    
+    assert failed.status == "failed" and failed.error == "Interrupted by a server restart"
+    assert asyncio.run(restarted.delete_job("job")) and asyncio.run(restarted.get_job("job")) is None
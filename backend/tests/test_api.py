@@ -0,0 +1,114 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.container import services
+from app.services.scoring_engine import scoring_engine
+
+RESUME = (
+    "Senior data engineer with eight years of experience building streaming platforms. "
+    "Led a team of five engineers, designed kafka and spark pipelines in python and sql, "
+    "cut infrastructure costs by 30 percent and mentored junior developers. "
+    "Education: bachelor of science in computer science. Skills: python, sql, aws, docker."
+)
+
+@pytest.fixture(scope="module")
+def client():
+    # Similarity search needs the embeddings API; without a backend it is simply disabled
+    saved = settings.VECTOR_BACKEND
+    settings.VECTOR_BACKEND = "none"
+    try:
+        with TestClient(app) as client:  # Runs the lifespan: warmup on entry, shutdown on exit
+            yield client
+    finally:
+        settings.VECTOR_BACKEND = saved
+    assert services.job_queue.get_stats()["workers"] == 0
+
+@pytest.fixture
+def model_calls(client, monkeypatch):
+    """Answers escalated submissions locally, as if a model had"""
+    calls = []
+    
+    async def analyze(submission, on_call=None):
+        calls.append(submission)
+        if on_call is not None:
+            on_call()
+        return scoring_engine.score(submission), "gpt-test"
+    
+    monkeypatch.setattr(services.openai_service, "analyze_resume_with_source", analyze)
+    return calls
+
+def test_health_answers_and_ready_reports_warmup(client):
+    assert client.get("/health").json() == {"status": "healthy"}
+    
+    client.get("/api/v1/stats")  # API requests wait for warmup; /ready does not
+    ready = client.get("/ready")
+    
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready" and ready.json()["import_seconds"] > 0
+
+def test_analysis_is_stored_polled_searched_and_deleted(client, model_calls):
+    analyzed = client.post("/api/v1/analyze", json={"content": RESUME, "industry": "Tech"})
+    assert analyzed.status_code == 200
+    analysis_id = analyzed.json()["id"]
+    
+    feedback = client.get(f"/api/v1/feedback/{analysis_id}")
+    search = client.get("/api/v1/search", params={"q": "kafka spark", "mode": "lexical"})
+    stats = client.get("/api/v1/stats").json()
+    deleted = client.delete(f"/api/v1/{analysis_id}")
+    
+    assert analyzed.json()["model_version"] == "gpt-test" and len(model_calls) == 1
+    assert feedback.json()["status"] == "completed"
+    assert feedback.json()["feedback"] == analyzed.json()["feedback"]
+    assert [hit["id"] for hit in search.json()["results"]] == [analysis_id]
+    assert stats["total_analyses"] >= 1 and "tech" in stats["top_industries"]
+    assert "user_satisfaction" not in stats
+    assert stats["prescreen"]["llm"] >= 1
+    assert deleted.status_code == 200
+    assert client.get(f"/api/v1/feedback/{analysis_id}").status_code == 404
+
+def test_short_submissions_are_answered_locally(client, model_calls):
+    response = client.post("/api/v1/analyze", params={"include_content": "false"}, json={"content": "python developer"})
+    
+    assert response.status_code == 200
+    assert response.json()["model_version"] == "local-prescreen"
+    assert "content" not in response.json()["submission"]
+    assert model_calls == []
+
+def test_background_analysis_is_polled_until_complete(client, model_calls):
+    queued = client.post("/api/v1/analyze", params={"background": "true"}, json={"content": RESUME + " Kubernetes."})
+    assert queued.status_code == 202 and queued.json()["status"] == "queued"
+    analysis_id = queued.json()["id"]
+    
+    deadline = time.monotonic() + 10
+    poll = client.get(f"/api/v1/feedback/{analysis_id}")
+    while poll.status_code == 202 and time.monotonic() < deadline:
+        time.sleep(0.02)
+        poll = client.get(f"/api/v1/feedback/{analysis_id}")
+    
+    assert poll.status_code == 200 and poll.json()["status"] == "completed"
+
+def test_batch_responses_are_compressed(client, model_calls):
+    submissions = [{"content": RESUME}, {"content": RESUME}, {"content": "python developer"}]
+    
+    response = client.post("/api/v1/analyze/batch", json={"submissions": submissions},
+                           headers={"Accept-Encoding": "gzip"})
+    
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["total_submissions"] == 3 and response.json()["unique_submissions"] == 2
+
+def test_metrics_endpoint_reports_requests_and_services(client):
+    client.get("/api/v1/feedback/unknown-id")
+    
+    metrics = client.get("/metrics")
+    lines = metrics.text.splitlines()
+    
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "service_ready 1" in lines
+    assert any(line.startswith('http_request_duration_seconds_count{method="GET",route="/api/v1/feedback/{analysis_id}",status="404"}')
+               for line in lines)
+    assert any(line.startswith('queue_depth{queue="jobs"}') for line in lines)
+    assert any(line.startswith('prescreen_decisions_total{tier="rejected"}') for line in lines)
@@ -0,0 +1,67 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware
+
+BODY = "resume feedback " * 200
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(BODY)
+    
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+    
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            for i in range(3):
+                yield f"event: field\ndata: {i}\n\n" * 100
+        return StreamingResponse(events(), media_type="text/event-stream")
+    
+    return TestClient(app)
+
+def _get(client: TestClient, path: str, accept: str):
+    # Raw bytes, as sent: the test client would otherwise decode gzip itself
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+def test_large_bodies_are_gzipped(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    response, raw = _get(_client(), "/large", "br, gzip")
+    
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-length"] == str(len(raw))
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert gzip.decompress(raw).decode() == BODY
+
+def test_small_and_unaccepted_bodies_pass_through():
+    client = _client()
+    small, small_raw = _get(client, "/small", "gzip")
+    refused, refused_raw = _get(client, "/large", "gzip;q=0, identity")
+    
+    assert "content-encoding" not in small.headers and small_raw == b"ok"
+    assert "content-encoding" not in refused.headers and refused_raw.decode() == BODY
+
+def test_streamed_responses_are_not_compressed():
+    response, raw = _get(_client(), "/stream", "gzip")
+    
+    assert "content-encoding" not in response.headers
+    assert raw.decode().count("event: field") == 300
+
+def test_brotli_is_preferred_when_installed():
+    brotli = pytest.importorskip("brotli")
+    response, raw = _get(_client(), "/large", "gzip, br")
+    
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(raw).decode() == BODY
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.container import ServiceContainer
+
+@pytest.fixture(autouse=True)
+def no_vector_backend(monkeypatch):
+    # Similarity search needs the embeddings API; without a backend it is simply disabled
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "none")
+
+def test_warmup_builds_and_wires_the_services_then_stop_shuts_them_down():
+    container = ServiceContainer()
+    
+    async def run():
+        container.start(import_seconds=0.25)
+        starting = container.get_readiness()
+        assert await container.wait_ready()
+        readiness = container.get_readiness()
+        workers = container.job_queue.get_stats()["workers"]
+        await container.stop()
+        return starting, readiness, workers
+    
+    starting, readiness, workers = asyncio.run(run())
+    
+    assert starting["status"] == "starting" and starting["warmup_seconds"] is None
+    assert readiness["status"] == "ready" and readiness["error"] is None
+    assert set(readiness["warmup_steps"]) == {"imports", "database", "lexical_index", "vector_index", "tokenizer"}
+    assert readiness["import_to_ready_seconds"] == pytest.approx(0.25 + readiness["warmup_seconds"], abs=0.002)
+    assert workers == settings.JOB_WORKERS
+    assert container.analysis_pipeline.store is container.analysis_store
+    assert container.vector_service is None and container.indexer is None
+    assert container.job_queue.get_stats()["workers"] == 0  # Stopped
+
+def test_failed_warmup_is_reported_not_raised(monkeypatch):
+    container = ServiceContainer()
+    
+    def broken_wire():
+        raise RuntimeError("database unreachable")
+    
+    monkeypatch.setattr(container, "_wire", broken_wire)
+    
+    async def run():
+        ready = await container.wait_ready()
+        await container.stop()
+        return ready
+    
+    assert asyncio.run(run()) is False
+    assert not container.ready
+    assert container.get_readiness()["status"] == "failed"
+    assert container.get_readiness()["error"] == "database unreachable"
@@ -0,0 +1,102 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import openai
+import pytest
+
+from app.services import embedding_service
+from app.services.embedding_service import EmbeddingService, SharedEmbeddingCache
+from app.services.prompt_builder import TRUNCATE_CHARS_PER_TOKEN
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+
+class FakeEmbeddings:
+    """Embeds each text as [len(text), 1, 0, ...]; rejects any batch containing ``bad``"""
+    
+    def __init__(self, dimension: int = 4, bad: str = None):
+        self.dimension = dimension
+        self.bad = bad
+        self.calls = []
+    
+    async def create(self, model, input):
+        self.calls.append(list(input))
+        if self.bad in input:
+            raise openai.BadRequestError("bad input", response=httpx.Response(400, request=REQUEST), body=None)
+        data = []
+        for index, text in enumerate(input):
+            vector = [0.0] * self.dimension
+            vector[:2] = [float(len(text)), 1.0]
+            data.append(SimpleNamespace(index=index, embedding=vector))
+        return SimpleNamespace(data=list(reversed(data)))  # The API does not promise order
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    fake = FakeEmbeddings()
+    monkeypatch.setattr(embedding_service, "get_openai_client", lambda: SimpleNamespace(embeddings=fake))
+    return fake
+
+def _service(**options) -> EmbeddingService:
+    service = EmbeddingService("test-embedding-model")
+    service.window = 0.01
+    for name, value in options.items():
+        setattr(service, name, value)
+    return service
+
+def test_concurrent_texts_share_one_call(embeddings):
+    service = _service()
+    
+    async def run():
+        first = await service.embed_many(["a", "bb", "a", "ccc"])
+        again = await service.embed("bb")
+        return first, again
+    
+    first, again = asyncio.run(run())
+    
+    assert embeddings.calls == [["a", "bb", "ccc"]]
+    assert [vector[0] for vector in first] == [1.0, 2.0, 1.0, 3.0]
+    assert again[0] == 2.0 and first[0].dtype == np.float32
+    assert service.get_stats()["api_calls"] == 1 and service.get_stats()["cache_hits"] == 1
+
+def test_full_batches_flush_without_waiting(embeddings):
+    service = _service(max_batch_size=2, window=60.0)
+    
+    vectors = asyncio.run(service.embed_many(["a", "bb", "ccc", "dddd"]))
+    
+    assert embeddings.calls == [["a", "bb"], ["ccc", "dddd"]]
+    assert [vector[0] for vector in vectors] == [1.0, 2.0, 3.0, 4.0]
+
+def test_rejected_input_fails_only_its_caller(embeddings):
+    embeddings.bad = "bad"
+    service = _service()
+    
+    async def run():
+        return await asyncio.gather(service.embed("good"), service.embed("bad"), return_exceptions=True)
+    
+    good, bad = asyncio.run(run())
+    
+    assert good[0] == 4.0
+    assert isinstance(bad, openai.BadRequestError)
+    assert embeddings.calls == [["good", "bad"], ["good"], ["bad"]]
+
+def test_long_inputs_are_truncated_without_tiktoken(embeddings):
+    service = _service(max_input_tokens=10)
+    service.counter._encoding, service.counter._loaded = None, True
+    
+    vector = asyncio.run(service.embed("9" * 100))
+    
+    assert vector[0] == 10 * TRUNCATE_CHARS_PER_TOKEN
+    assert service.get_stats()["truncated"] == 1
+
+def test_shared_cache_of_another_dimension_is_skipped(embeddings, tmp_path):
+    service = _service()
+    service.cache = SharedEmbeddingCache(16, dimension=8, path=str(tmp_path / "embeddings.bin"))
+    
+    async def run():
+        return await service.embed_many(["a", "bb"])
+    
+    vectors = asyncio.run(run())
+    
+    assert [vector[0] for vector in vectors] == [1.0, 2.0]
+    assert len(service.cache) == 0 and service.cache.skipped == 2
@@ -0,0 +1,103 @@
+import asyncio
+
+from app.services.indexing_service import IndexingQueue
+
+class FakeVectorService:
+    """Records upserts and deletes; fails the first ``failures`` upserts"""
+    
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.stored = {}
+        self.deleted = []
+        self.upserting = asyncio.Event()
+        self.release = None
+    
+    async def store_resumes(self, items):
+        self.upserting.set()
+        if self.release is not None:
+            await self.release.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("index unavailable")
+        for resume_id, content, feedback in items:
+            self.stored[resume_id] = content
+    
+    async def delete_resume(self, resume_id):
+        self.deleted.append(resume_id)
+        self.stored.pop(resume_id, None)
+
+def _queue(service, **options):
+    return IndexingQueue(service, max_size=100, batch_size=10, flush_interval_ms=10, max_retries=3, **options)
+
+def test_pending_resumes_are_indexed_in_one_batch():
+    async def run():
+        service = FakeVectorService()
+        queue = _queue(service)
+        queue.start()
+        for i in range(3):
+            await queue.enqueue(f"r{i}", f"resume {i}", {})
+        await queue.stop()
+        return service, queue
+    
+    service, queue = asyncio.run(run())
+    
+    assert service.stored == {"r0": "resume 0", "r1": "resume 1", "r2": "resume 2"}
+    assert queue.get_stats()["indexed"] == 3 and queue.batches == 1
+    assert queue.get_stats()["pending"] == 0
+
+def test_discard_during_retry_backoff_skips_the_resume():
+    async def run():
+        service = FakeVectorService(failures=1)
+        queue = _queue(service)
+        queue.start()
+        await queue.enqueue("kept", "kept resume", {})
+        await queue.enqueue("deleted", "deleted resume", {})
+        await service.upserting.wait()
+        await asyncio.sleep(0)  # Let the failed attempt start its backoff
+        queue.discard("deleted")
+        await queue.stop()
+        return service, queue
+    
+    service, queue = asyncio.run(run())
+    
+    assert service.stored == {"kept": "kept resume"}
+    assert queue.retries == 1 and queue.indexed == 1
+
+def test_discard_during_upsert_removes_what_it_wrote():
+    async def run():
+        service = FakeVectorService()
+        service.release = asyncio.Event()
+        queue = _queue(service)
+        queue.start()
+        await queue.enqueue("deleted", "deleted resume", {})
+        await service.upserting.wait()
+        queue.discard("deleted")
+        service.release.set()
+        await queue.stop()
+        return service, queue
+    
+    service, queue = asyncio.run(run())
+    
+    assert service.stored == {}
+    assert service.deleted == ["deleted"]
+    assert queue.indexed == 0
+
+def test_re_enqueue_during_upsert_is_indexed():
+    async def run():
+        service = FakeVectorService()
+        service.release = asyncio.Event()
+        queue = _queue(service)
+        queue.start()
+        await queue.enqueue("resume", "first version", {})
+        await service.upserting.wait()
+        queue.discard("resume")
+        await queue.enqueue("resume", "second version", {})
+        service.release.set()
+        await queue.stop()
+        return service, queue
+    
+    service, queue = asyncio.run(run())
+    
+    assert service.stored == {"resume": "second version"}
+    assert service.deleted == []
+    assert queue.get_stats()["pending"] == 0 and queue.batches == 2
@@ -0,0 +1,146 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import analysis_record  # noqa: F401  (registers the tables)
+from app.models.resume import ResumeAnalysis, ResumeSubmission
+from app.services.analysis_store import AnalysisStore
+from app.services.job_queue import JobQueue
+from app.services.scoring_engine import scoring_engine
+
+RESUME = ResumeSubmission(content="Backend engineer with python, sql and aws experience")
+
+class FakePipeline:
+    """Scores locally; holds each analysis until ``release`` is set, if one is given"""
+    
+    def __init__(self, store: AnalysisStore):
+        self.store = store
+        self.release = None
+        self.running = asyncio.Event()
+        self.error = None
+    
+    async def analyze(self, submission, analysis_id=None, persist=True):
+        self.running.set()
+        if self.release is not None:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return ResumeAnalysis(
+            id=analysis_id,
+            submission=submission,
+            feedback=scoring_engine.score(submission),
+            created_at=datetime.now(),
+            processing_time=0.1,
+            model_version="local-heuristic"
+        )
+    
+    async def persist(self, analysis):
+        await self.store.save(analysis)
+    
+    async def delete(self, analysis_id):
+        return await self.store.delete(analysis_id)
+
+def _store(tmp_path) -> AnalysisStore:
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(engine)
+    store = AnalysisStore(sessionmaker(bind=engine, expire_on_commit=False))
+    store.init()
+    return store
+
+async def _until(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+async def _until_stored(store: AnalysisStore, job_id: str, status, timeout: float = 5.0):
+    """Wait for the stored status of a job (None: no row) to become ``status``"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await store.get_job(job_id)
+        if (job.status if job else None) == status:
+            return
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_completed_job_stores_its_analysis_and_drops_its_status(tmp_path):
+    store = _store(tmp_path)
+    queue = JobQueue(FakePipeline(store), workers=2)
+    
+    async def run():
+        queue.start()
+        job = await queue.submit(RESUME)
+        await _until(lambda: job.status == "completed")
+        # The status row goes once the analysis is stored; that answers polls now
+        await _until_stored(store, job.id, None)
+        analysis = await store.get(job.id)
+        await queue.stop()
+        return job, analysis
+    
+    job, analysis = asyncio.run(run())
+    
+    assert analysis == job.result and analysis.submission == RESUME
+    assert queue.get_stats()["completed"] == 1 and queue.get_stats()["queue_depth"] == 0
+
+def test_failed_job_is_visible_to_other_workers(tmp_path):
+    store = _store(tmp_path)
+    pipeline = FakePipeline(store)
+    pipeline.error = RuntimeError("model unavailable")
+    queue = JobQueue(pipeline, workers=1)
+    other_worker = JobQueue(FakePipeline(store), workers=1)
+    
+    async def run():
+        queue.start()
+        job = await queue.submit(RESUME)
+        await _until_stored(store, job.id, "failed")
+        seen = await other_worker.lookup(job.id)
+        await queue.stop()
+        return job, seen
+    
+    job, seen = asyncio.run(run())
+    
+    assert seen.status == "failed" and seen.error == "model unavailable"
+    assert asyncio.run(store.get(job.id)) is None
+
+def test_job_discarded_while_running_is_not_stored(tmp_path):
+    store = _store(tmp_path)
+    pipeline = FakePipeline(store)
+    pipeline.release = asyncio.Event()
+    queue = JobQueue(pipeline, workers=1)
+    
+    async def run():
+        queue.start()
+        job = await queue.submit(RESUME)
+        await pipeline.running.wait()
+        await queue.discard(job.id)
+        pipeline.release.set()
+        # One worker: once a later job completes, the discarded one has been handled
+        later = await queue.submit(RESUME)
+        await _until(lambda: later.status == "completed")
+        result = await store.get(job.id), await queue.lookup(job.id)
+        await queue.stop()
+        return result
+    
+    analysis, status = asyncio.run(run())
+    
+    assert analysis is None and status is None
+
+def test_stop_fails_unfinished_jobs(tmp_path):
+    store = _store(tmp_path)
+    pipeline = FakePipeline(store)
+    pipeline.release = asyncio.Event()
+    queue = JobQueue(pipeline, workers=1)
+    
+    async def run():
+        queue.start()
+        running = await queue.submit(RESUME)
+        queued = await queue.submit(RESUME)
+        await pipeline.running.wait()
+        await queue.stop()
+        return [await store.get_job(job.id) for job in (running, queued)]
+    
+    for job in asyncio.run(run()):
+        assert job.status == "failed" and job.error == "Interrupted by server shutdown"
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from app.services.json_stream import IncrementalJSONParser, parse_json_object, repair_json
+
+RESPONSE = '{"overall_score": 85, "suggestions": ["Add metrics", "Trim, {braces}"], "keyword_analysis": {"keyword_density": 0.4}}'
+
+def test_fields_are_emitted_once_complete_whatever_the_chunking():
+    for size in (1, 3, 7, len(RESPONSE)):
+        parser = IncrementalJSONParser()
+        emitted = []
+        for start in range(0, len(RESPONSE), size):
+            emitted += parser.feed(RESPONSE[start:start + size])
+        
+        assert emitted == list(json.loads(RESPONSE).items())
+        assert parser.complete and parser.finish() == []
+
+def test_partial_numbers_wait_for_their_delimiter():
+    parser = IncrementalJSONParser()
+    
+    assert parser.feed('```json\n{"overall_score": 8') == []
+    assert parser.feed('5') == []
+    assert parser.feed(', "technical_clarity"') == [("overall_score", 85)]
+
+def test_finish_recovers_fields_of_a_truncated_stream():
+    parser = IncrementalJSONParser()
+    parser.feed('{"overall_score": 70, "strengths": ["Clear history", "Good sk')
+    
+    remaining = parser.finish()
+    
+    assert remaining == [("strengths", ["Clear history", "Good sk"])]
+    assert parser.fields == {"overall_score": 70, "strengths": ["Clear history", "Good sk"]}
+
+def test_finish_raises_when_the_object_cannot_be_recovered():
+    parser = IncrementalJSONParser()
+    emitted = parser.feed('{"overall_score": 60, strengths: ["x"], "areas": [],}')
+    
+    assert emitted == [("overall_score", 60)]
+    with pytest.raises(ValueError):
+        parser.finish()
+
+@pytest.mark.parametrize("text, expected", [
+    ('Here you go:\n```json\n{"a": 1}\n```', {"a": 1}),
+    ('{"a": [1, 2,], "b": {"c": 3,},}', {"a": [1, 2], "b": {"c": 3}}),
+    ('{"a": True, "b": None, "c": False}', {"a": True, "b": None, "c": False}),
+    ('{"a": "line one\nline two"}', {"a": "line one\nline two"}),
+    ('{"a": "True story", "b": 1}', {"a": "True story", "b": 1}),
+    ('{"a": 1, "b": [1, 2', {"a": 1, "b": [1, 2]}),
+    ('{"a": 1, "b": "cut \\', {"a": 1, "b": "cut "}),
+    ('{"a": 1, "b": {"c": tr', {"a": 1}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+def test_parse_json_object_reports_repairs():
+    assert parse_json_object('{"a": 1}') == ({"a": 1}, False)
+    assert parse_json_object('{"a": 1,}') == ({"a": 1}, True)
+    with pytest.raises(ValueError):
+        parse_json_object("[1, 2]")
+    with pytest.raises(ValueError):
+        parse_json_object("no json here")
@@ -0,0 +1,97 @@
+import pytest
+
+from app.services.lexical_index import LexicalIndex, _decode_varints, _encode_varints, tokenize
+
+def test_add_after_compaction_keeps_postings_decodable():
+    index = LexicalIndex(compact_min_deleted=2)
+    index.add("keep", "kubernetes operator")
+    index.add("gone", "kubernetes admin")
+    for i in range(4):
+        index.add(f"filler-{i}", f"filler text {i}")
+    index.remove("gone")
+    for i in range(3):
+        index.remove(f"filler-{i}")
+    # 4 of 6 dead passes the 0.5 fraction: the last removal compacted and renumbered
+    assert index.get_stats()["deleted_pending_compaction"] == 0
+    assert index.ids == ["keep", "filler-3"] and index.docs == {"keep": 0, "filler-3": 1}
+    
+    index.add("new", "kubernetes guru")
+    
+    assert {doc_id for doc_id, _ in index.search("kubernetes")} == {"keep", "new"}
+    assert [doc_id for doc_id, _ in index.search("guru")] == ["new"]
+    assert index.preview("filler-3") == "filler text 3"
+
+def test_replacements_do_not_grow_the_index():
+    index = LexicalIndex()
+    for version in range(5000):
+        index.add("doc", f"resume version{version}")
+        index.add(f"other-{version % 10}", f"other resume {version}")
+    
+    assert len(index) == 11
+    assert len(index.ids) <= 2 * index.compact_min_deleted + len(index)
+    assert len(index.lengths) == 1024
+    assert [doc_id for doc_id, _ in index.search("version4999")] == ["doc"]
+    assert index.search("version4998") == []
+
+def test_varints_round_trip():
+    values = [0, 1, 127, 128, 300, 16383, 16384, 2 ** 40]
+    out = bytearray()
+    _encode_varints(values, out)
+    
+    assert _decode_varints(out).tolist() == values
+    assert len(out) == 1 + 1 + 1 + 2 + 2 + 2 + 3 + 6
+
+def test_tokens_keep_skill_names_intact():
+    assert tokenize("C++, C#, Node.js and CI/CD.") == ["c++", "c#", "node.js", "and", "ci", "cd"]
+
+def test_bm25_prefers_rare_terms_and_shorter_documents():
+    index = LexicalIndex()
+    index.add("short", "rust engineer")
+    index.add("long", "rust engineer with python python python experience in many many areas")
+    index.add("common", "python engineer")
+    
+    results = index.search("rust engineer", top_k=3)
+    
+    assert [doc_id for doc_id, _ in results] == ["short", "long", "common"]
+    assert results[0][1] > results[1][1] > results[2][1] > 0
+    assert [doc_id for doc_id, _ in index.search("rust", top_k=1)] == ["short"]
+
+def test_re_adding_a_document_replaces_it():
+    index = LexicalIndex()
+    index.add("doc", "golang developer")
+    index.add("doc", "kotlin developer")
+    
+    assert len(index) == 1
+    assert index.search("golang") == []
+    assert [doc_id for doc_id, _ in index.search("kotlin")] == ["doc"]
+    assert index.preview("doc") == "kotlin developer"
+
+def test_removed_documents_leave_results_and_stats():
+    index = LexicalIndex()
+    index.add("a", "terraform ansible")
+    index.add("b", "terraform puppet")
+    
+    assert index.remove("a") and not index.remove("a")
+    
+    assert [doc_id for doc_id, _ in index.search("terraform ansible")] == ["b"]
+    assert index.preview("a") is None
+    assert index.get_stats()["documents"] == 1 and index.get_stats()["deleted_pending_compaction"] == 1
+
+def test_compaction_preserves_scores():
+    index = LexicalIndex()
+    reference = LexicalIndex()
+    for i in range(1500):
+        text = f"engineer {'python' if i % 3 else 'java'} project{i % 7} team{i % 11}"
+        index.add(f"doc-{i}", text)
+        if i >= 1025:
+            reference.add(f"doc-{i}", text)
+    for i in range(1025):
+        index.remove(f"doc-{i}")
+    # Compacted along the way: at most half of what remains is dead
+    assert len(index.ids) < 1500 and index.deleted <= len(index.ids) / 2
+    
+    for query in ("python project3", "java team5 engineer", "project6"):
+        compacted = index.search(query, top_k=20)
+        expected = reference.search(query, top_k=20)
+        assert [doc_id for doc_id, _ in compacted] == [doc_id for doc_id, _ in expected]
+        assert [score for _, score in compacted] == pytest.approx([score for _, score in expected])
@@ -0,0 +1,45 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsMiddleware, Registry, registry
+
+def test_registry_renders_prometheus_text():
+    metrics = Registry()
+    calls = metrics.counter("calls", "Calls made", ("model",))
+    latency = metrics.histogram("latency_seconds", "Call latency", buckets=(0.1, 1.0))
+    metrics.gauge_callback("depth", "Queue depth", lambda: {("jobs",): 3, ("indexing",): None}, ("queue",))
+    metrics.gauge_callback("broken", "Always fails", lambda: 1 / 0)
+    calls.inc(2, "gpt-4o")
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+    
+    lines = metrics.render().splitlines()
+    
+    assert "# TYPE calls counter" in lines
+    assert 'calls_total{model="gpt-4o"} 2' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines and "latency_seconds_count 3" in lines
+    assert 'depth{queue="jobs"} 3' in lines
+    assert not any(line.startswith('depth{queue="indexing"}') for line in lines)  # None means not collected
+    assert "# broken collection failed: division by zero" in lines
+
+def test_requests_are_timed_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    
+    @app.get("/resumes/{resume_id}")
+    async def get_resume(resume_id: str):
+        return {"id": resume_id}
+    
+    client = TestClient(app)
+    for resume_id in ("a", "b"):
+        client.get(f"/resumes/{resume_id}")
+    client.get("/nowhere")
+    
+    lines = registry.render().splitlines()
+    
+    assert 'http_request_duration_seconds_count{method="GET",route="/resumes/{resume_id}",status="200"} 2' in lines
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in lines
+    assert not any('route="/resumes/a"' in line for line in lines)
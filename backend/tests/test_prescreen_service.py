@@ -0,0 +1,112 @@
+import asyncio
+import random
+
+from app.models.resume import ResumeFeedback, ResumeSubmission
+from app.services.analysis_pipeline import AnalysisPipeline
+from app.services.prescreen_service import PreScreener, ScreenResult, simhash
+from app.services.scoring_engine import scoring_engine
+
+RESUME = (
+    "Senior software engineer with eight years of experience building data platforms. "
+    "Led a team of five developers, designed streaming pipelines in python and sql, "
+    "reduced infrastructure costs by 30 percent and mentored junior engineers. "
+    "Education: bachelor of science in computer science, state university. "
+    "Skills: python, sql, aws, docker, kubernetes, airflow, spark."
+)
+
+def _feedback() -> ResumeFeedback:
+    return scoring_engine.score(ResumeSubmission(content=RESUME))
+
+def test_similar_texts_have_close_fingerprints():
+    words = RESUME.lower().split()
+    edited = words[:-1] + ["terraform."]
+    unrelated = "quarterly marketing report covering brand campaigns social reach and budget".split() * 5
+    
+    assert bin(simhash(words) ^ simhash(edited)).count("1") <= 12
+    assert bin(simhash(words) ^ simhash(unrelated)).count("1") > 12
+
+def test_every_pair_within_the_threshold_shares_a_band():
+    rng = random.Random(5)
+    for threshold in (0, 3, 6, 10):
+        screener = PreScreener(threshold=threshold)
+        assert screener.bands == threshold + 1
+        for _ in range(200):
+            value = rng.getrandbits(64)
+            near = value
+            for bit in rng.sample(range(64), threshold):
+                near ^= 1 << bit
+            screener.remember(ScreenResult(tier="llm", fingerprint=("ctx", value)), _feedback(), "gpt")
+            assert screener._find_near_duplicate(("ctx", near)) == ("ctx", value)
+
+def test_near_duplicate_reuses_feedback_for_the_same_target_only():
+    screener = PreScreener(threshold=6)
+    first = screener.screen(ResumeSubmission(content=RESUME, job_title="Data Engineer"))
+    assert first.tier == "llm"
+    feedback = _feedback()
+    screener.remember(first, feedback, "gpt-4o")
+    
+    again = screener.screen(ResumeSubmission(content=RESUME + " ", job_title="data engineer"))
+    other_role = screener.screen(ResumeSubmission(content=RESUME, job_title="Product Manager"))
+    
+    assert again.tier == "duplicate" and again.model == "gpt-4o"
+    assert again.feedback == feedback
+    assert other_role.tier == "llm"
+
+def test_oldest_fingerprints_are_forgotten():
+    screener = PreScreener(threshold=3, recent_size=2)
+    oldest, middle, newest = 0x5555555555555555, 0xAAAAAAAAAAAAAAAA, 0x0F0F0F0F0F0F0F0F
+    for value in (oldest, middle, newest):
+        screener.remember(ScreenResult(tier="llm", fingerprint=("ctx", value)), _feedback(), "gpt")
+    
+    assert screener.get_stats()["remembered"] == 2
+    assert screener._find_near_duplicate(("ctx", oldest)) is None
+    assert screener._find_near_duplicate(("ctx", newest ^ 0b111)) == ("ctx", newest)
+    assert all(("ctx", oldest) not in bucket for table in screener._bands for bucket in table.values())
+
+def test_short_and_non_resume_text_is_rejected():
+    screener = PreScreener()
+    
+    short = screener.screen(ResumeSubmission(content="python developer"))
+    invoice = screener.screen(ResumeSubmission(content=" ".join(["invoice total amount due payable"] * 10)))
+    
+    assert short.tier == "rejected" and "too short" in short.reason
+    assert invoice.tier == "rejected" and "does not look like a resume" in invoice.reason
+    assert screener.get_stats()["llm_calls_saved"] == 2
+
+def test_longer_resumes_in_other_languages_are_escalated():
+    screener = PreScreener()
+    german = (
+        "Berufserfahrung: Softwareentwicklerin bei der Beispiel GmbH in Berlin seit 2018. "
+        "Ausbildung: Informatik an der Technischen Universität München. "
+        "Kenntnisse: Python, SQL, AWS, Docker und Kubernetes. "
+    ) * 3
+    polish = " ".join(["Doświadczenie zawodowe programista w firmie w Warszawie od roku"] * 15)
+    
+    assert screener.screen(ResumeSubmission(content=german)).tier == "llm"
+    assert screener.screen(ResumeSubmission(content=polish)).tier == "llm"
+
+class FakeOpenAIService:
+    """Calls the model for the first analysis only; later ones are analysis-cache hits"""
+    
+    LOCAL_MODEL = "local-heuristic"
+    
+    def __init__(self):
+        self.cached = False
+    
+    async def analyze_resume_with_source(self, submission, on_call=None):
+        if not self.cached and on_call is not None:
+            on_call()
+        self.cached = True
+        return _feedback(), "gpt-4o"
+
+def test_llm_is_counted_only_when_the_model_is_called():
+    screener = PreScreener(threshold=0)
+    pipeline = AnalysisPipeline(FakeOpenAIService(), store=None, prescreener=screener)
+    
+    async def run():
+        await pipeline.analyze(ResumeSubmission(content=RESUME, job_title="Data Engineer"), persist=False)
+        await pipeline.analyze(ResumeSubmission(content=RESUME, job_title="Data Scientist"), persist=False)
+    
+    asyncio.run(run())
+    
+    assert screener.counts == {"rejected": 0, "duplicate": 0, "llm": 1}
@@ -0,0 +1,74 @@
+from app.models.resume import ResumeSubmission
+from app.services.prompt_builder import MIN_REPEATED_LINE_CHARS, PromptBuilder, TokenCounter
+
+HEADER = "Jane Doe | jane.doe@example.com | +1 555 0100 | Berlin"
+
+def test_short_repeated_lines_are_kept():
+    content = "\n".join([
+        "Experience",
+        "Software Engineer", "Acme Corp", "Berlin, Germany", "Python, SQL, AWS",
+        "",
+        "Software Engineer", "Globex", "Berlin, Germany", "Python, SQL, AWS",
+    ])
+    
+    normalized = PromptBuilder.normalize(content)
+    
+    assert normalized.count("Software Engineer") == 2
+    assert normalized.count("Berlin, Germany") == 2
+    assert normalized.count("Python, SQL, AWS") == 2
+
+def test_long_repeated_lines_are_dropped_after_the_first():
+    assert len(HEADER) >= MIN_REPEATED_LINE_CHARS
+    content = f"{HEADER}\nSummary\nBuilds data platforms\nPage 1 of 2\n\n\n{HEADER.upper()}\nExperience\nPage 2 of 2"
+    
+    normalized = PromptBuilder.normalize(content)
+    
+    assert normalized == f"{HEADER}\nSummary\nBuilds data platforms\n\nExperience"
+
+def test_whitespace_is_collapsed():
+    assert PromptBuilder.normalize("  Led   a\tteam  \n\n\n\nof five  ") == "Led a team\n\nof five"
+
+def test_fit_keeps_every_section_within_budget():
+    builder = PromptBuilder("gpt-3.5-turbo", max_content_tokens=60)
+    experience = [f"Built pipeline number {i} that processed events for team {i}" for i in range(40)]
+    content = "\n".join(["Experience", *experience, "Education", "B.Sc. Computer Science", "Skills", "Python, SQL"])
+    
+    fitted = builder.fit(content, 60)
+    
+    assert "B.Sc. Computer Science" in fitted and "Python, SQL" in fitted
+    assert "more lines omitted]" in fitted
+    assert builder.counter.count(fitted) <= 60 + 10  # Headings and omission notes are small
+
+def test_build_counts_with_the_routed_models_encoding():
+    builder = PromptBuilder("standard-model")
+    premium = builder.counter_for("premium-model")
+    # Stand-in encodings: the premium model's tokens are twice as long
+    builder.counter._encoding, builder.counter._loaded = _Encoding(4), True
+    premium._encoding, premium._loaded = _Encoding(8), True
+    submission = ResumeSubmission(content="x" * 800)
+    
+    standard_bundle = builder.build(submission)
+    premium_bundle = builder.build(submission, "premium-model")
+    
+    assert builder.counter_for("premium-model") is premium
+    assert standard_bundle.content_tokens == 200
+    assert premium_bundle.content_tokens == 100
+    assert premium_bundle.prompt_tokens < standard_bundle.prompt_tokens
+
+def test_unknown_models_still_get_a_count():
+    counter = TokenCounter("some-future-model")
+    
+    assert counter.count("a" * 40) > 0
+    assert len(counter.truncate("word " * 100, 10)) < 500
+
+class _Encoding:
+    """Fixed-width stand-in for a tiktoken encoding"""
+    
+    def __init__(self, width: int):
+        self.width = width
+    
+    def encode(self, text, disallowed_special=()):
+        return [text[i:i + self.width] for i in range(0, len(text), self.width)]
+    
+    def decode(self, tokens):
+        return "".join(tokens)
@@ -0,0 +1,184 @@
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from app.core.config import settings
+from app.services.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, TokenBucket
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+def _connection_error() -> Exception:
+    return openai.APIConnectionError(request=REQUEST)
+
+def _bad_request() -> Exception:
+    return openai.BadRequestError("bad request", response=httpx.Response(400, request=REQUEST), body=None)
+
+def _caller(**options) -> ResilientCaller:
+    caller = ResilientCaller(max_attempts=3, base_delay=0.0, max_delay=0.0, hedge=False, **options)
+    caller.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60.0)
+    return caller
+
+def _open(breaker: CircuitBreaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.opened_at -= breaker.reset_seconds  # Let the reset period elapse
+
+def test_breaker_opens_then_allows_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60.0)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    
+    breaker.opened_at -= 60.0
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # Only one trial at a time
+    
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0 and breaker.opens == 1
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60.0)
+    _open(breaker)
+    assert breaker.allow()
+    
+    breaker.record_failure()
+    
+    assert breaker.state == "open" and breaker.opens == 2 and not breaker.allow()
+
+def test_retryable_errors_are_retried():
+    caller = _caller()
+    attempts = []
+    
+    async def request():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _connection_error()
+        return "ok"
+    
+    assert asyncio.run(caller.call(request)) == "ok"
+    assert caller.counts["retries"] == 2 and caller.counts["failures"] == 0
+    assert caller.breaker.state == "closed"
+
+def test_bad_requests_neither_retry_nor_touch_the_breaker():
+    caller = _caller()
+    caller.breaker.record_failure()
+    
+    async def request():
+        raise _bad_request()
+    
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(caller.call(request))
+    assert caller.counts["attempts"] == 1
+    assert caller.breaker.failures == 1  # Not reset by the bad request either
+
+def test_open_breaker_short_circuits_without_admitting():
+    caller = _caller()
+    caller.breaker.record_failure()
+    caller.breaker.record_failure()
+    admitted = []
+    
+    async def request():
+        return "ok"
+    
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(caller.call(request, on_admit=lambda: admitted.append(1)))
+    assert admitted == [] and caller.counts["short_circuited"] == 1
+
+def test_cancelled_trial_releases_the_slot():
+    caller = _caller()
+    _open(caller.breaker)
+    
+    async def run():
+        started = asyncio.Event()
+        
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+        
+        trial = asyncio.ensure_future(caller.call(hang))
+        await started.wait()
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+        
+        async def request():
+            return "ok"
+        
+        return await caller.call(request)
+    
+    assert asyncio.run(run()) == "ok"
+    assert caller.breaker.state == "closed"
+
+def test_rejected_trial_releases_the_slot():
+    caller = _caller()
+    _open(caller.breaker)
+    
+    async def bad():
+        raise _bad_request()
+    
+    async def good():
+        return "ok"
+    
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(caller.call(bad))
+    assert caller.breaker.state == "half_open"
+    assert asyncio.run(caller.call(good)) == "ok"
+    assert caller.breaker.state == "closed"
+
+@pytest.mark.parametrize("threshold, expected", [(5.0, 1), (0.01, 2)])
+def test_cancelling_a_hedged_call_cancels_its_requests(threshold, expected):
+    # Cancelled while waiting out the hedge threshold, then while both requests are in flight
+    caller = ResilientCaller(max_attempts=1, hedge=True)
+    for _ in range(settings.LLM_HEDGE_MIN_SAMPLES):
+        caller.latency.add(threshold)
+    
+    async def run():
+        started, cancelled = [], []
+        
+        async def hang():
+            started.append(1)
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+        
+        call = asyncio.ensure_future(caller.call(hang))
+        while len(started) < expected:
+            await asyncio.sleep(0.005)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        await asyncio.sleep(0)
+        return len(started), len(cancelled)  # Before asyncio.run cancels any leftovers
+    
+    assert asyncio.run(run()) == (expected, expected)
+
+def test_callers_given_one_bucket_share_its_limit():
+    bucket = TokenBucket(rate=20.0, capacity=1)
+    fast, premium = _caller(bucket=bucket), _caller(bucket=bucket)
+    
+    async def request():
+        return "ok"
+    
+    async def run():
+        started = time.monotonic()
+        for _ in range(2):
+            await fast.call(request)
+            await premium.call(request)
+        return time.monotonic() - started
+    
+    elapsed = asyncio.run(run())
+    
+    # One token up front, then 20 per second for the other three calls
+    assert elapsed >= 0.14
+    assert fast.rate_limit_wait > 0 and premium.rate_limit_wait > 0
+
+def test_openai_service_callers_share_the_worker_rate_limit():
+    from app.services.openai_service import OpenAIService
+    
+    service = OpenAIService()
+    
+    assert service._caller("gpt-3.5-turbo").bucket is service._caller("gpt-4o").bucket is service.rate_limiter
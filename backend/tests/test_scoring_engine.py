@@ -0,0 +1,44 @@
+from app.services.scoring_engine import KeywordMatcher, ScoringEngine
+
+def test_keywords_match_on_word_boundaries():
+    matcher = KeywordMatcher({"technical": ["java", "c++", "financial modeling", "sql"], "metrics": ["%"]})
+    
+    found = matcher.match("javascript and c++ plus financial  modeling; mysql grew 40%")
+    
+    assert found["technical"] == ["c++", "financial modeling"]
+    assert found["metrics"] == ["%"]
+
+def test_industry_dictionary_overrides_only_the_categories_it_names():
+    engine = ScoringEngine()
+    text = "Led the team and managed budgets. Built valuation and forecasting models in excel and vba."
+    
+    finance = engine.score_text(text, industry=" Finance ")
+    default = engine.score_text(text)
+    
+    assert finance["keyword_analysis"]["relevant_keywords"][:4] == ["excel", "valuation", "forecasting", "vba"]
+    assert finance["technical_clarity"] == 90
+    assert default["technical_clarity"] == 70
+    assert "Strong leadership experience" in finance["strengths"]
+
+def test_scores_stay_within_their_caps():
+    engine = ScoringEngine()
+    words = "python javascript react node java sql aws docker kubernetes git agile scrum developed implemented created built designed optimized improved increased 30%"
+    feedback = engine.score_text(" ".join([words] * 60))
+    
+    assert feedback["technical_clarity"] == 95
+    assert feedback["impact_phrasing"] == 90
+    assert feedback["structure_format"] == 95
+    assert feedback["overall_score"] == 90
+    assert feedback["keyword_analysis"]["keyword_density"] <= 1.0
+    assert feedback["keyword_analysis"]["missing_keywords"] == []
+
+def test_custom_dictionaries_fall_back_to_the_default_lists():
+    engine = ScoringEngine({
+        "default": {"technical": ["python"], "leadership": [], "action": ["built"], "metrics": [], "achievement": [], "history": []},
+        "robotics": {"technical": ["ros", "python"]}
+    })
+    
+    feedback = engine.score_text("built ros nodes in python", industry="robotics")
+    
+    assert feedback["keyword_analysis"]["relevant_keywords"] == ["ros", "python", "built"]
+    assert "Add quantifiable achievements with specific metrics" in feedback["suggestions"]
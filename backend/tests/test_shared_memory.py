@@ -0,0 +1,123 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import serve
+from app.core import shared_memory
+from app.core.config import settings
+from app.core.shared_memory import FileLock, map_array, shared_path
+from app.services.analysis_store import AnalysisStore
+from app.services.embedding_service import EmbeddingService, SharedEmbeddingCache
+from app.services.stats_service import SharedAnalysisStats
+
+pytestmark = pytest.mark.skipif(shared_memory.fcntl is None, reason="needs fork and flock")
+
+def _in_child(work) -> int:
+    """Run work() in a forked child; returns its exit code"""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            work()
+            code = 0
+        finally:
+            os._exit(code)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+def test_file_lock_held_before_a_fork_excludes_the_child(tmp_path):
+    lock = FileLock(str(tmp_path / "stats.lock"))
+    log = tmp_path / "log"
+    
+    def append(line):
+        with open(log, "a") as f:
+            f.write(line + "\n")
+    
+    def child():
+        # Same FileLock object, inherited locked: it must reopen, not share the parent's lock
+        with lock:
+            append("child")
+    
+    with lock:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child()
+            finally:
+                os._exit(0)
+        time.sleep(0.2)
+        append("parent")
+    os.waitpid(pid, 0)
+    
+    assert log.read_text().splitlines() == ["parent", "child"]
+
+def test_stats_recorded_in_a_child_are_seen_by_the_parent(tmp_path):
+    stats = SharedAnalysisStats(str(tmp_path / "analysis_stats.json"))
+    stats.record(80.0, 1.0, "Tech")
+    
+    assert _in_child(lambda: stats.record(60.0, 3.0, "Finance")) == 0
+    
+    snapshot = stats.snapshot()
+    assert snapshot["total_analyses"] == 2 and snapshot["average_score"] == 70.0
+    assert snapshot["top_industries"] == ["tech", "finance"]
+
+def test_embeddings_cached_in_a_child_are_read_by_the_parent(tmp_path):
+    cache = SharedEmbeddingCache(8, dimension=4, path=str(tmp_path / "embeddings.bin"))
+    key = cache.key("model", "resume text")
+    vector = np.arange(4, dtype=np.float32)
+    
+    assert cache.get(key) is None
+    assert _in_child(lambda: cache.put(key, vector)) == 0
+    
+    assert np.array_equal(cache.get(key), vector) and len(cache) == 1
+
+def test_full_slot_pairs_evict_one_entry(tmp_path):
+    cache = SharedEmbeddingCache(2, dimension=2, path=str(tmp_path / "embeddings.bin"))
+    keys = [cache.key("model", f"text {i}") for i in range(3)]  # One pair: every key shares it
+    for i, key in enumerate(keys):
+        cache.put(key, np.full(2, i, dtype=np.float32))
+    
+    assert len(cache) == 2
+    assert cache.get(keys[2])[0] == 2
+    assert sum(cache.get(key) is not None for key in keys[:2]) == 1
+
+def test_mapped_file_of_another_layout_is_replaced(tmp_path):
+    path = str(tmp_path / "table.bin")
+    first = map_array(path, np.float32, 4, kind="table")
+    first[:] = 1.0
+    first.flush()
+    
+    same = map_array(path, np.float32, 4, kind="table")
+    resized = map_array(path, np.float32, 8, kind="table")
+    
+    assert same.tolist() == [1.0] * 4
+    assert resized.shape == (8,) and not resized.any()
+
+def test_configure_shared_memory_starts_from_an_empty_directory(monkeypatch):
+    monkeypatch.setattr(settings, "SHARED_MEMORY_DIR", None)
+    monkeypatch.setattr(settings, "SERVER_PORT", 65123)
+    serve.configure_shared_memory()
+    directory = settings.SHARED_MEMORY_DIR
+    try:
+        stale = shared_path("analysis_stats.json")
+        with open(stale, "w") as f:
+            f.write("{}")
+        
+        serve.configure_shared_memory()  # Already configured: left alone
+        assert os.path.exists(stale)
+        monkeypatch.setattr(settings, "SHARED_MEMORY_DIR", None)
+        serve.configure_shared_memory()
+        
+        assert settings.SHARED_MEMORY_DIR == directory and directory.endswith("resume-grader-65123")
+        assert not os.path.exists(stale)
+    finally:
+        serve.shutil.rmtree(directory, ignore_errors=True)
+
+def test_services_share_state_when_a_directory_is_configured(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SHARED_MEMORY_DIR", str(tmp_path / "shm"))
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_MAX_ENTRIES", 16)
+    
+    assert isinstance(AnalysisStore().stats, SharedAnalysisStats)
+    assert isinstance(EmbeddingService().cache, SharedEmbeddingCache)
+    assert sorted(os.listdir(tmp_path / "shm")) == ["embeddings.bin", "embeddings.bin.lock"]
@@ -0,0 +1,66 @@
+import random
+
+from app.services.stats_service import AnalysisStats, HeavyHitters, QuantileSketch, SharedAnalysisStats
+
+def test_quantiles_stay_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 2) for _ in range(20000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    
+    ordered = sorted(values)
+    for q in (0.0, 0.1, 0.5, 0.9, 0.95, 0.99, 1.0):
+        expected = ordered[int(q * (len(ordered) - 1))]
+        assert abs(sketch.quantile(q) - expected) <= 0.01 * expected
+    assert len(sketch.buckets) < 2000
+
+def test_removed_values_leave_the_sketch():
+    sketch = QuantileSketch()
+    for value in (1.0, 2.0, 3.0, 1000.0):
+        sketch.add(value)
+    sketch.remove(1000.0)
+    
+    assert sketch.count == 3
+    assert abs(sketch.quantile(1.0) - 3.0) <= 0.03
+
+def test_sketch_state_round_trips():
+    sketch = QuantileSketch()
+    for value in (0.0, 0.5, 4.0, 9.0):
+        sketch.add(value)
+    restored = QuantileSketch()
+    restored.load_state(sketch.to_state())
+    
+    assert restored.count == 4 and restored.zero_count == 1
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
+
+def test_frequent_items_are_always_tracked():
+    rng = random.Random(3)
+    # Two items above total / capacity hidden in a long tail of one-off items
+    stream = ["software"] * 300 + ["finance"] * 200 + [f"rare-{i}" for i in range(1500)]
+    rng.shuffle(stream)
+    hitters = HeavyHitters(capacity=16)
+    for item in stream:
+        hitters.add(item)
+    
+    assert len(hitters.counts) == 16
+    assert hitters.top(2) == ["software", "finance"]
+    # Space-Saving only overestimates
+    assert hitters.counts["software"] >= 300 and hitters.counts["finance"] >= 200
+
+def test_removing_an_item_drops_its_counter():
+    hitters = HeavyHitters(capacity=4)
+    hitters.add("healthcare")
+    hitters.remove("healthcare")
+    
+    assert hitters.top(4) == []
+
+def test_industries_are_counted_case_and_whitespace_insensitively(tmp_path):
+    for stats in (AnalysisStats(), SharedAnalysisStats(str(tmp_path / "stats.json"))):
+        for industry in ("Tech", "tech ", " TECH", "Health  Care", "finance"):
+            stats.record(80.0, 1.0, industry)
+        stats.record(80.0, 1.0, "   ")
+        stats.discard(80.0, 1.0, "FINANCE")
+        
+        assert stats.snapshot()["top_industries"] == ["tech", "health care"]
+        assert stats.snapshot()["total_analyses"] == 5
@@ -0,0 +1,123 @@
+import io
+import os
+import zipfile
+import zlib
+
+import pypdf
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from pypdf.generic import NameObject, StreamObject
+
+from app.services.document_service import DocumentError, DocumentService
+from app.services.text_extraction import detect_kind, extract_text
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def _fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+def _docx(*paragraphs: str) -> bytes:
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    xml = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", xml)
+    return buffer.getvalue()
+
+def test_identity_h_pdf_text_is_extracted():
+    # Glyph ids written as hex strings under a Type0/Identity-H font, as Word and Google Docs do
+    data = _fixture("identity_h_resume.pdf")
+    assert b"/Identity-H" in data
+    
+    text = extract_text(data, "pdf")
+    
+    assert text.splitlines()[0] == "Jane Müller — Senior Software Engineer"
+    assert "Technische Universität München" in text
+    assert "Skills: Python, SQL, AWS, Docker, Kubernetes" in text
+
+def test_damaged_pdf_raises_value_error():
+    with pytest.raises(ValueError):
+        extract_text(b"%PDF-1.4\nthis is not really a pdf", "pdf")
+
+def test_pdf_decompression_bomb_is_rejected():
+    # One page whose content stream inflates far past pypdf's limit
+    writer = pypdf.PdfWriter()
+    page = writer.add_blank_page(612, 792)
+    contents = StreamObject()
+    contents.set_data(zlib.compress(b"\0" * (200 * 1024 * 1024), 9))
+    contents[NameObject("/Filter")] = NameObject("/FlateDecode")
+    page[NameObject("/Contents")] = writer._add_object(contents)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    
+    with pytest.raises(ValueError, match="Limit reached"):
+        extract_text(buffer.getvalue(), "pdf")
+
+def test_docx_paragraphs_become_lines():
+    text = extract_text(_docx("Jane Doe", "Data   Engineer", "", "Python, SQL"), "docx")
+    
+    assert text == "Jane Doe\nData Engineer\n\nPython, SQL"
+
+def test_text_files_are_decoded():
+    assert extract_text("Résumé\r\n\r\n\r\nSkills".encode("utf-16"), "txt") == "Résumé\n\nSkills"
+    assert extract_text("Résumé".encode("cp1252"), "txt") == "Résumé"
+    with pytest.raises(ValueError):
+        extract_text(b"\x00\x01binary", "txt")
+
+def test_kind_comes_from_magic_bytes_then_name():
+    assert detect_kind("resume.txt", "text/plain", b"%PDF-1.7") == "pdf"
+    assert detect_kind("resume.docx", None, b"PK\x03\x04") == "docx"
+    assert detect_kind("archive.zip", "application/zip", b"PK\x03\x04") is None
+    assert detect_kind("notes.md", None, b"# Jane") == "txt"
+
+def _upload_client(service: DocumentService) -> TestClient:
+    app = FastAPI()
+    
+    @app.post("/upload")
+    async def upload(request: Request):
+        try:
+            text, fields = await service.ingest(request)
+        except DocumentError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        return {"text": text, "fields": fields}
+    
+    return TestClient(app)
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_uploaded_pdf_is_extracted(workers):
+    service = DocumentService(workers=workers)
+    client = _upload_client(service)
+    files = {"file": ("resume.pdf", _fixture("identity_h_resume.pdf"), "application/pdf")}
+    
+    try:
+        first = client.post("/upload", files=files, data={"job_title": "Data Engineer"})
+        again = client.post("/upload", files=files)
+    finally:
+        service.close()
+    
+    assert first.status_code == 200
+    assert first.json()["text"].startswith("Jane Müller — Senior Software Engineer")
+    assert first.json()["fields"] == {"job_title": "Data Engineer"}
+    assert again.json()["text"] == first.json()["text"]
+    assert service.get_stats()["cache_hits"] == 1 and service.get_stats()["by_kind"] == {"pdf": 1}
+
+def test_upload_errors_map_to_status_codes():
+    service = DocumentService(max_bytes=1024, workers=0)
+    client = _upload_client(service)
+    
+    too_large = client.post("/upload", files={"file": ("resume.txt", b"x" * 4096, "text/plain")})
+    unsupported = client.post("/upload", files={"file": ("photo.png", b"\x89PNG....", "image/png")})
+    missing = client.post("/upload", data={"job_title": "Engineer"}, files={"other": ("a.txt", b"a", "text/plain")})
+    empty = client.post("/upload", files={"file": ("resume.txt", b"   \n ", "text/plain")})
+    not_multipart = client.post("/upload", json={"content": "resume"})
+    
+    assert too_large.status_code == 413
+    assert unsupported.status_code == 415
+    assert missing.status_code == 400
+    assert empty.status_code == 422 and "No text found" in empty.json()["detail"]
+    assert not_multipart.status_code == 415
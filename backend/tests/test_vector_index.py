@@ -0,0 +1,91 @@
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+
+def _items(vectors, prefix="doc"):
+    return [(f"{prefix}-{i}", vector.tolist(), {"n": i}) for i, vector in enumerate(vectors)]
+
+def test_exact_query_ranks_by_cosine_similarity():
+    index = VectorIndex(dimension=3)
+    index.upsert([
+        ("a", [1.0, 0.0, 0.0], {"name": "a"}),
+        ("b", [1.0, 1.0, 0.0], {"name": "b"}),
+        ("c", [0.0, 0.0, 5.0], {"name": "c"}),
+    ])
+    
+    results = index.query([2.0, 0.0, 0.0], top_k=2)
+    
+    assert [item_id for item_id, _, _ in results] == ["a", "b"]
+    assert abs(results[0][1] - 1.0) < 1e-6
+    assert abs(results[1][1] - np.sqrt(0.5)) < 1e-6
+    assert results[0][2] == {"name": "a"}
+    assert [item_id for item_id, _, _ in index.query([1.0, 0.0, 0.0], top_k=2, exclude=["a"])] == ["b", "c"]
+
+def test_delete_keeps_the_remaining_rows_addressable():
+    index = VectorIndex(dimension=2)
+    index.upsert([("a", [1.0, 0.0], {}), ("b", [0.0, 1.0], {}), ("c", [1.0, 1.0], {})])
+    index.delete(["a", "missing"])
+    
+    assert len(index) == 2
+    assert [item_id for item_id, _, _ in index.query([1.0, 1.0], top_k=5)] == ["c", "b"]
+    assert set(index.fetch(["a", "b", "c"])) == {"b", "c"}
+
+def test_log_is_replayed_on_load(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(20, 8)).astype(np.float32)
+    index = VectorIndex(dimension=8, path=str(tmp_path))
+    index.upsert(_items(vectors))
+    index.delete(["doc-3"])
+    index.upsert([("doc-5", vectors[0].tolist(), {"n": "replaced"})])
+    index.close()
+    
+    reopened = VectorIndex(dimension=8, path=str(tmp_path))
+    
+    assert len(reopened) == 19
+    assert "doc-3" not in reopened.rows
+    stored, metadata = reopened.fetch(["doc-5"])["doc-5"]
+    assert metadata == {"n": "replaced"}
+    assert np.allclose(stored, vectors[0] / np.linalg.norm(vectors[0]), atol=1e-6)
+    reopened.close()
+
+def test_instances_sharing_a_path_see_each_others_writes(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(30, 8)).astype(np.float32)
+    first = VectorIndex(dimension=8, path=str(tmp_path))
+    second = VectorIndex(dimension=8, path=str(tmp_path))
+    
+    first.upsert(_items(vectors[:10], "first"))
+    assert second.stale()
+    second.upsert(_items(vectors[10:20], "second"))
+    first.delete(["second-0"])
+    # A compaction by one instance must not lose the other's later writes
+    second.save()
+    first.upsert(_items(vectors[20:], "third"))
+    
+    expected = {f"first-{i}" for i in range(10)} | {f"second-{i}" for i in range(1, 10)} | {f"third-{i}" for i in range(10)}
+    for index in (first, second):
+        fetched = index.fetch(sorted(expected | {"second-0"}))
+        assert set(fetched) == expected
+        vector, _ = fetched["third-4"]
+        assert np.allclose(vector, vectors[24] / np.linalg.norm(vectors[24]), atol=1e-6)
+        assert index.query(vectors[24].tolist(), top_k=1)[0][0] == "third-4"
+    first.close()
+    second.close()
+
+def test_ivf_finds_the_same_neighbours_as_an_exact_scan():
+    rng = np.random.default_rng(2)
+    centers = rng.normal(size=(16, 32))
+    vectors = (centers[rng.integers(0, 16, size=3000)] + rng.normal(scale=0.1, size=(3000, 32))).astype(np.float32)
+    exact = VectorIndex(dimension=32)
+    ivf = VectorIndex(dimension=32, mode="ivf", nprobe=4)
+    exact.upsert(_items(vectors))
+    ivf.upsert(_items(vectors))
+    
+    assert ivf.centroids is not None
+    queries = vectors[rng.choice(3000, size=50, replace=False)]
+    hits = 0
+    for query in queries:
+        expected = {item_id for item_id, _, _ in exact.query(query.tolist(), top_k=10)}
+        found = {item_id for item_id, _, _ in ivf.query(query.tolist(), top_k=10)}
+        hits += len(expected & found)
+    assert hits / (10 * len(queries)) >= 0.9
@@ -6,7 +6,7 @@ import axios from 'axios'
 interface DashboardStats {
   total_analyses: number
   average_score: number
-  user_satisfaction: number
+  user_satisfaction?: number  // Not reported by the API until ratings are collected
   processing_time_avg: number
   top_industries: string[]
 }
@@ -110,7 +110,7 @@ const Dashboard = () => {
             </div>
             <div className="ml-4">
               <p className="text-sm font-medium text-gray-400">User Satisfaction</p>
-              <p className="text-2xl font-bold text-white">{stats.user_satisfaction}%</p>
+              <p className="text-2xl font-bold text-white">{stats.user_satisfaction != null ? `${stats.user_satisfaction}%` : 'N/A'}</p>
             </div>
           </div>
         </div>
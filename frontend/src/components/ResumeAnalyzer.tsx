@@ -1,6 +1,5 @@
 import React, { useState } from 'react'
 import { FileText, Target, Building, User, TrendingUp } from 'lucide-react'
-import axios from 'axios'
 import FeedbackDisplay from './FeedbackDisplay'
 
 interface ResumeAnalyzerProps {
@@ -30,6 +29,22 @@ interface ResumeFeedback {
   industry_alignment: number
 }
 
+const emptyFeedback: ResumeFeedback = {
+  overall_score: 0,
+  technical_clarity: 0,
+  impact_phrasing: 0,
+  structure_format: 0,
+  suggestions: [],
+  strengths: [],
+  areas_for_improvement: [],
+  keyword_analysis: {
+    relevant_keywords: [],
+    missing_keywords: [],
+    keyword_density: 0
+  },
+  industry_alignment: 0
+}
+
 const ResumeAnalyzer = ({ setIsLoading }: ResumeAnalyzerProps) => {
   const [resumeContent, setResumeContent] = useState('')
   const [jobTitle, setJobTitle] = useState('')
@@ -208,16 +223,47 @@ const ResumeAnalyzer = ({ setIsLoading }: ResumeAnalyzerProps) => {
         experience_level: experienceLevel || undefined
       }
 
-      const response = await axios.post('http://localhost:8000/api/v1/analyze', submission)
-      
-      // Check if we're getting mock data (you can add a flag in the response if needed)
-      // For now, we'll assume mock data if OpenAI quota is exceeded
-      const responseData = response.data as any
-      if (responseData.feedback) {
-        setFeedback(responseData.feedback)
-        // If the backend is using mock data, we can detect it by checking for specific patterns
-        // For now, we'll show a note that this might be mock data due to API limits
-        setIsUsingMockData(true)
+      const response = await fetch('http://localhost:8000/api/v1/analyze/stream?include_content=false', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(submission)
+      })
+      if (!response.ok || !response.body) {
+        throw new Error(`Analysis request failed with status ${response.status}`)
+      }
+
+      // Render scores as soon as they stream in instead of waiting for the full completion
+      let partial: ResumeFeedback = { ...emptyFeedback }
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+
+        const events = buffer.split('\n\n')
+        buffer = events.pop() || ''
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1]
+          const data = raw.match(/^data: (.*)$/m)?.[1]
+          if (!event || !data) continue
+
+          const payload = JSON.parse(data)
+          if (event === 'field') {
+            partial = { ...partial, [payload.field]: payload.value }
+            setFeedback(partial)
+            setIsLoading(false)
+          } else if (event === 'complete') {
+            setFeedback(payload.feedback)
+            // If the backend is using mock data, we can detect it by checking for specific patterns
+            // For now, we'll show a note that this might be mock data due to API limits
+            setIsUsingMockData(true)
+          } else if (event === 'error') {
+            throw new Error(payload.detail)
+          }
+        }
       }
     } catch (err) {
       setError('Error analyzing resume. Please try again.')